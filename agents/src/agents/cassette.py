@@ -0,0 +1,302 @@
+"""Record/replay of external traffic (LLM adapters, Convex, Composio).
+
+In record mode every call to the wrapped clients runs for real and its result
+is appended to a JSONL cassette, together with the time it took. In replay
+mode nothing leaves the process: results are served back from the cassette,
+optionally sleeping for latency_scale x the recorded latency, so
+MasterAgent.run can be benchmarked and profiled offline.
+
+Calls are matched on a hash of (kind, method, arguments). Each key owns a
+FIFO queue of recorded results, so a call that repeats (e.g. polling for
+questionnaire responses) replays in recorded order, and concurrent agents
+interleaving differently from the recording still get their own answers.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from .integrations.composio_client import ComposioIntegration
+from .llm.cache import ResponseCache
+from .storage.convex_client import ConvexClient
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded result for a call."""
+
+
+class ReplayedError(RuntimeError):
+    """Re-raised in replay for a call that raised while recording."""
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str, latency_scale: float = 0.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected '{RECORD}' or '{REPLAY}')")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._queues: dict[str, deque[dict]] = {}
+        self._lock = threading.Lock()  # Composio calls may record from worker threads
+        self.stats = {"calls": 0, "misses": 0, "recorded_latency_s": 0.0, "injected_latency_s": 0.0}
+        if mode == RECORD:
+            open(path, "w", encoding="utf-8").close()
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._queues.setdefault(entry["key"], deque()).append(entry)
+        logger.info(f"Loaded cassette {self.path}: {sum(len(q) for q in self._queues.values())} entries")
+
+    @staticmethod
+    def make_key(kind: str, method: str, *args: Any) -> str:
+        return ResponseCache.make_key(kind, method, *args)
+
+    def record(self, kind: str, method: str, args: tuple, latency_s: float, value: Any = None, error: str = "") -> None:
+        self._append(kind, method, self.make_key(kind, method, *args), latency_s, value, error)
+
+    def _append(self, kind: str, method: str, key: str, latency_s: float, value: Any = None, error: str = "") -> None:
+        entry = {"key": key, "kind": kind, "method": method, "latency_s": round(latency_s, 4)}
+        if error:
+            entry["error"] = error
+        else:
+            entry["value"] = value
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["calls"] += 1
+            self.stats["recorded_latency_s"] += latency_s
+
+    def _take(self, kind: str, method: str, key: str) -> dict:
+        with self._lock:
+            self.stats["calls"] += 1
+            queue = self._queues.get(key)
+            if not queue:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded {kind}.{method} call matches ({key[:12]}) in {self.path}")
+            entry = queue.popleft()
+            self.stats["recorded_latency_s"] += entry["latency_s"]
+            self.stats["injected_latency_s"] += entry["latency_s"] * self.latency_scale
+        return entry
+
+    @staticmethod
+    def _result(entry: dict) -> Any:
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return entry["value"]
+
+    async def call(self, kind: str, method: str, args: tuple, fn: Callable[[], Awaitable[Any]]) -> Any:
+        key = self.make_key(kind, method, *args)
+        if self.mode == REPLAY:
+            entry = self._take(kind, method, key)
+            if self.latency_scale:
+                await asyncio.sleep(entry["latency_s"] * self.latency_scale)
+            return self._result(entry)
+        started = time.perf_counter()
+        try:
+            value = await fn()
+        except Exception as e:
+            self._append(kind, method, key, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        self._append(kind, method, key, time.perf_counter() - started, value=value)
+        return value
+
+    def call_sync(self, kind: str, method: str, args: tuple, fn: Callable[[], Any]) -> Any:
+        key = self.make_key(kind, method, *args)
+        if self.mode == REPLAY:
+            entry = self._take(kind, method, key)
+            if self.latency_scale:
+                time.sleep(entry["latency_s"] * self.latency_scale)
+            return self._result(entry)
+        started = time.perf_counter()
+        try:
+            value = fn()
+        except Exception as e:
+            self._append(kind, method, key, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        self._append(kind, method, key, time.perf_counter() - started, value=value)
+        return value
+
+    def skip(self, kind: str, method: str, args: tuple) -> None:
+        """Consume the recorded entry for a call that replay does not perform, if there is one."""
+        with self._lock:
+            queue = self._queues.get(self.make_key(kind, method, *args))
+            if queue:
+                queue.popleft()
+
+    def unused(self) -> int:
+        """Recorded entries that replay never consumed (non-zero means the run diverged)."""
+        return sum(len(q) for q in self._queues.values())
+
+
+class CassetteLLM:
+    """Wraps an LLM adapter (or CachedLLM) so its calls go through a Cassette.
+
+    Anything not intercepted (ledger, cleanup_files, ...) is delegated to the
+    wrapped adapter unchanged.
+    """
+
+    def __init__(self, inner, cassette: Cassette, provider: str):
+        self._inner = inner
+        self._cassette = cassette
+        self._provider = provider
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+    async def complete(self, prompt: str, system: str = "") -> str:
+        return await self._cassette.call(
+            self._provider, "complete", (system, prompt), lambda: self._inner.complete(prompt, system)
+        )
+
+    async def complete_messages(self, messages: list[dict], system: str = "") -> str:
+        return await self._cassette.call(
+            self._provider,
+            "complete_messages",
+            (system, messages),
+            lambda: self._inner.complete_messages(messages, system),
+        )
+
+    async def complete_with_tools(
+        self, prompt: str, tools: list[dict], system: str = ""
+    ) -> tuple[str, list[dict]]:
+        text, calls = await self._cassette.call(
+            self._provider,
+            "complete_with_tools",
+            (system, prompt, tools),
+            lambda: self._inner.complete_with_tools(prompt, tools, system),
+        )
+        return text, calls
+
+    async def complete_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> tuple[str, list[dict]]:
+        text, calls = await self._cassette.call(
+            self._provider,
+            "complete_with_tools_messages",
+            (system, messages, tools),
+            lambda: self._inner.complete_with_tools_messages(messages, tools, system),
+        )
+        return text, calls
+
+    async def stream_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> AsyncIterator[dict]:
+        # Recorded as one entry (the full event list); replay re-emits the events in order
+        args = (system, messages, tools)
+        if self._cassette.mode == REPLAY:
+            events = await self._cassette.call(self._provider, "stream_with_tools_messages", args, None)
+            for event in events:
+                yield event
+            return
+        events = []
+        started = time.perf_counter()
+        try:
+            async for event in self._inner.stream_with_tools_messages(messages, tools, system):
+                events.append(event)
+                yield event
+        except Exception as e:
+            self._cassette.record(
+                self._provider, "stream_with_tools_messages", args,
+                time.perf_counter() - started, error=f"{type(e).__name__}: {e}",
+            )
+            raise
+        self._cassette.record(
+            self._provider, "stream_with_tools_messages", args, time.perf_counter() - started, value=events
+        )
+
+    async def extract_multimodal(self, file_bytes: bytes, mime_type: str, prompt: str) -> str:
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        return await self._cassette.call(
+            self._provider,
+            "extract_multimodal",
+            (digest, mime_type, prompt),
+            lambda: self._inner.extract_multimodal(file_bytes, mime_type, prompt),
+        )
+
+
+class CassetteConvexClient(ConvexClient):
+    """ConvexClient whose HTTP requests go through a Cassette.
+
+    Payload fields that differ on every run (timestamps) are left out of the
+    key. Events and pipeline updates are recorded but not replayed: how many
+    are sent depends on timing (batching, coalescing) and nothing reads their
+    result, so replay consumes a matching entry if there is one and moves on.
+    """
+
+    _VOLATILE_FIELDS = ("lastActivity",)
+    _WRITE_ONLY_PATHS = ("/api/agent/event", "/api/agent/pipeline/update")
+
+    def __init__(self, *args, cassette: Cassette, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cassette = cassette
+
+    async def _post(
+        self, path: str, payload: dict, critical: bool = False, missing_route_ok: bool = False
+    ) -> dict | None:
+        args = (path, {k: v for k, v in payload.items() if k not in self._VOLATILE_FIELDS})
+        if self._cassette.mode == REPLAY and path in self._WRITE_ONLY_PATHS:
+            self._cassette.skip("convex", "POST", args)
+            return None
+        return await self._cassette.call(
+            "convex",
+            "POST",
+            args,
+            lambda: super(CassetteConvexClient, self)._post(path, payload, critical, missing_route_ok),
+        )
+
+    async def _get(self, path: str) -> dict | None:
+        return await self._cassette.call(
+            "convex", "GET", (path,), lambda: super(CassetteConvexClient, self)._get(path)
+        )
+
+    async def _send_events(self, events: list[dict]) -> None:
+        # Batch boundaries depend on timing: record one entry per event instead
+        for event in events:
+            await self._post("/api/agent/event", event, True)
+
+
+class CassetteComposio:
+    """Stands in for ComposioIntegration, recording or replaying its calls.
+
+    In replay mode inner may be None, so no Composio SDK or API key is needed.
+    """
+
+    is_composio_tool = staticmethod(ComposioIntegration.is_composio_tool)
+
+    def __init__(self, inner: ComposioIntegration | None, cassette: Cassette):
+        if inner is None and cassette.mode != REPLAY:
+            raise ValueError("CassetteComposio needs a real ComposioIntegration to record")
+        self._inner = inner
+        self._cassette = cassette
+
+    def get_tools_for_source(self, user_id: str, source_type: str) -> list[dict]:
+        return self._cassette.call_sync(
+            "composio",
+            "get_tools_for_source",
+            (user_id, source_type),
+            lambda: self._inner.get_tools_for_source(user_id, source_type),
+        )
+
+    def execute_tool(self, name: str, args: dict, user_id: str, max_chars: int | None = None) -> str:
+        return self._cassette.call_sync(
+            "composio",
+            "execute_tool",
+            (name, args, user_id, max_chars),
+            lambda: self._inner.execute_tool(name, args, user_id, max_chars),
+        )
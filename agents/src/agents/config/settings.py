@@ -12,12 +12,58 @@ class Settings(BaseSettings):
     COMPOSIO_GMAIL_AUTH_CONFIG_ID: str = ""
     COMPOSIO_DRIVE_AUTH_CONFIG_ID: str = ""
     COMPOSIO_SHEETS_AUTH_CONFIG_ID: str = ""
+    COMPOSIO_MAX_RESULT_CHARS: int = 30000  # inline cut for Composio results that are not spilled
     CLAUDE_MODEL: str = "claude-sonnet-4-20250514"
     GEMINI_MODEL: str = "gemini-2.5-pro"
+    GEMINI_INLINE_MAX_BYTES: int = 4194304  # larger files are uploaded once via the Files API
+    CLAUDE_MODEL_FAST: str = "claude-haiku-4-5-20251001"  # "fast" tier
+    CLAUDE_MODEL_STRONG: str = ""  # "strong" tier; empty means CLAUDE_MODEL
+    # call site -> tier; sites not listed use CLAUDE_MODEL
+    LLM_MODEL_ROUTES: str = "classify_relevance=fast,reconciliation=fast,tree_design=strong,questionnaire=strong"
+    CLAUDE_PROMPT_CACHING: bool = True  # cache system prompt, tool schemas and history prefix
     MAX_AGENT_TURNS: int = 20
+    TOOL_MAX_CONCURRENCY: int = 4  # concurrent tool calls per agent turn (serial tools excepted)
+    TOOL_RESULT_INLINE_CHARS: int = 8000  # larger results are saved to the workspace; 0 disables spilling
+    TOOL_RESULT_MAX_CHARS: int = 5000000  # cap on a single spilled result
+    STRUCTURER_WORKERS: int = 3    # structurer agents pulling from the shared file queue
+    STRUCTURER_BATCH_MAX_BYTES: int = 20000000  # estimated source bytes per structurer batch
+    STRUCTURER_BATCH_MAX_TOKENS: int = 60000    # estimated tokens per structurer batch
+    STRUCTURER_BATCH_MAX_ITEMS: int = 10
+    PIPELINED_PHASES: bool = False  # structure each source as soon as its explorer finishes
+    KNOWLEDGE_WRITER_CONCURRENCY: int = 4  # knowledge writers (one per tree domain) running at once
+    RECONCILIATION_CONCURRENCY: int = 4    # candidate contradiction groups checked at once
+    FORUM_REPLICA: bool = True     # answer check_forum from a local index preloaded at pipeline start
+    FORUM_PRELOAD_LIMIT: int = 200  # entries preloaded per (source type, phase)
+    FORUM_FLUSH_BATCH_SIZE: int = 20  # forum writes sent to Convex per batch
+    AGENT_DEADLINE_S: int = 900    # wall-clock budget per sub-agent; 0 disables it
+    AGENT_MAX_TOKENS: int = 0      # LLM token budget per sub-agent; 0 disables it
+    PHASE_DEADLINE_S: int = 2700   # wall-clock budget per pipeline phase (excludes the human wait)
+    PHASE_MAX_TOKENS: int = 0      # LLM token budget per pipeline phase; 0 disables it
+    CLAUDE_REQUESTS_PER_MINUTE: int = 50    # 0 disables the bucket
+    CLAUDE_TOKENS_PER_MINUTE: int = 80000   # input tokens; 0 disables the bucket
+    CLAUDE_MAX_IN_FLIGHT: int = 8
+    GEMINI_REQUESTS_PER_MINUTE: int = 150
+    GEMINI_TOKENS_PER_MINUTE: int = 0
+    GEMINI_MAX_IN_FLIGHT: int = 4
+    LLM_MAX_RETRIES: int = 5       # retries on 429/529/5xx, with jittered backoff
+    LLM_HEDGING: bool = False      # race a duplicate for slow critical-path master calls
+    LLM_HEDGE_PERCENTILE: float = 0.95  # hedge once a call exceeds this latency percentile
+    LLM_HEDGE_BUDGET: float = 0.1  # max hedges as a fraction of calls (capped at 1.0)
+    HISTORY_MAX_TOKENS: int = 60000  # agent history budget before old tool results are elided
+    HISTORY_KEEP_TURNS: int = 4      # most recent turns always sent verbatim
+    LLM_CACHE_DIR: str = ""        # on-disk LLM response cache; empty disables it
+    LLM_CACHE_MAX_MB: int = 512    # LRU eviction threshold for the cache directory
+    LLM_CACHE_TTL: int = 604800    # seconds (7 days) before a cached response expires
+    LLM_CACHE_PHASES: str = "explore,structure,verify,use"  # phases in which the cache is active
+    CASSETTE_MODE: str = ""        # "record" or "replay" external traffic; empty disables it
+    CASSETTE_PATH: str = "cassette.jsonl"
+    CASSETTE_LATENCY_SCALE: float = 0.0  # replay sleeps this multiple of each recorded latency
     AGENT_AUTH_TOKEN: str = ""
     VERIFY_TIMEOUT: int = 300      # seconds (5 min) — max wait for human responses
     CONVEX_TIMEOUT: int = 30       # seconds — HTTP timeout per Convex request
     CONVEX_MAX_RETRIES: int = 3    # retry count for transient Convex errors
+    EVENT_BATCH_SIZE: int = 50     # agent events per bulk request; 0 sends each event inline
+    EVENT_FLUSH_INTERVAL_S: float = 0.5  # max time an event waits in the buffer
+    PIPELINE_UPDATE_INTERVAL_S: float = 2.0  # min gap between progress updates within a phase; 0 sends all
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
@@ -1,3 +1,4 @@
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,12 @@ MAX_RESULT_CHARS = 30_000
 class ComposioIntegration:
     """Wrapper around Composio SDK for Google Workspace tools."""
 
-    def __init__(self, api_key: str, auth_config_ids: dict[str, str] | None = None):
+    def __init__(
+        self,
+        api_key: str,
+        auth_config_ids: dict[str, str] | None = None,
+        max_result_chars: int = MAX_RESULT_CHARS,
+    ):
         from composio import Composio
         from composio_anthropic import AnthropicProvider
 
@@ -25,6 +31,7 @@ class ComposioIntegration:
         self.composio = Composio(api_key=api_key, provider=self.provider)
         # Kept for potential future use with composio.tools.execute(connected_account_id=...)
         self.auth_config_ids = auth_config_ids or {}
+        self.max_result_chars = max_result_chars
         # Note: Composio SDK resolves auth via user_id at connection time.
         # tools.get() and execute_tool_call() do not accept auth_config_id.
 
@@ -43,8 +50,11 @@ class ComposioIntegration:
             logger.error(f"Failed to get Composio tools for {source_type}: {e}")
             return []
 
-    def execute_tool(self, name: str, args: dict, user_id: str) -> str:
-        """Execute a single Composio tool and return its result as a string."""
+    def execute_tool(self, name: str, args: dict, user_id: str, max_chars: int | None = None) -> str:
+        """Execute a single Composio tool and return its result as a string.
+
+        Results are cut at max_chars (default: self.max_result_chars; 0 disables the cut).
+        """
         import uuid
         from anthropic.types import ToolUseBlock
 
@@ -66,11 +76,18 @@ class ComposioIntegration:
             error = result.error
         logger.info(f"Composio {name} result: successful={successful}, data={str(data)[:200]}")
         if successful:
-            text = str(data) if data is not None else ""
-            if len(text) > MAX_RESULT_CHARS:
+            if data is None:
+                text = ""
+            elif isinstance(data, (dict, list)):
+                # JSON (not repr) so spilled results can be read back by json_path
+                text = json.dumps(data, ensure_ascii=False, default=str)
+            else:
+                text = str(data)
+            limit = self.max_result_chars if max_chars is None else max_chars
+            if limit and len(text) > limit:
                 original_len = len(text)
-                text = text[:MAX_RESULT_CHARS] + f"\n... (truncated from {original_len} chars)"
-                logger.warning(f"Composio {name} result truncated: {original_len} -> {MAX_RESULT_CHARS}")
+                text = text[:limit] + f"\n... (truncated from {original_len} chars)"
+                logger.warning(f"Composio {name} result truncated: {original_len} -> {limit}")
             return text
         return f"Composio error: {error}"
 
@@ -1,64 +1,245 @@
+import asyncio
+import hashlib
+import io
+import logging
+import time
+from contextlib import nullcontext
+from typing import AsyncIterator
+
 import anthropic
 import google.genai as genai
 from google.genai import types as genai_types
 
+from .budget import charge_current_budget
+from .hedging import HedgePolicy, hedging_enabled
+from .rate_limit import RateLimitGovernor, estimate_tokens
+from .router import DEFAULT_TIER, ModelRouter, current_call_site
+from .usage import UsageLedger
+
+logger = logging.getLogger(__name__)
+
+_EPHEMERAL = {"type": "ephemeral"}
+
 
 class AnthropicAdapter:
     """Adapter for Anthropic Claude API, implementing LLMProvider and ToolCapableLLM."""
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        prompt_caching: bool = True,
+        ledger: UsageLedger | None = None,
+        governor: RateLimitGovernor | None = None,
+        router: ModelRouter | None = None,
+        hedge_policy: HedgePolicy | None = None,
+    ):
+        # The governor owns retries when present; otherwise keep the SDK's own
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0 if governor else 2)
         self.model = model
+        self.prompt_caching = prompt_caching
+        self.ledger = ledger
+        self.governor = governor
+        self.router = router
+        # Hedging only applies inside hedged_requests() blocks (see llm.hedging)
+        self.hedge_policy = hedge_policy
+        # Cumulative token counts across every call made through this adapter
+        self.cache_stats = {
+            "input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "output_tokens": 0,
+        }
 
     async def complete(self, prompt: str, system: str = "") -> str:
-        kwargs: dict = {
-            "model": self.model,
-            "max_tokens": 4096,
-            "messages": [{"role": "user", "content": prompt}],
-        }
-        if system:
-            kwargs["system"] = system
-        response = await self.client.messages.create(**kwargs)
+        response = await self._create([{"role": "user", "content": prompt}], system)
         return self._extract_text(response)
 
     async def complete_messages(self, messages: list[dict], system: str = "") -> str:
-        kwargs: dict = {
-            "model": self.model,
-            "max_tokens": 4096,
-            "messages": messages,
-        }
-        if system:
-            kwargs["system"] = system
-        response = await self.client.messages.create(**kwargs)
+        response = await self._create(messages, system)
         return self._extract_text(response)
 
     async def complete_with_tools(
         self, prompt: str, tools: list[dict], system: str = ""
     ) -> tuple[str, list[dict]]:
-        kwargs: dict = {
-            "model": self.model,
-            "max_tokens": 4096,
-            "messages": [{"role": "user", "content": prompt}],
-            "tools": tools,
-        }
-        if system:
-            kwargs["system"] = system
-        response = await self.client.messages.create(**kwargs)
+        response = await self._create([{"role": "user", "content": prompt}], system, tools)
         return self._extract_text(response), self._extract_tool_calls(response)
 
     async def complete_with_tools_messages(
         self, messages: list[dict], tools: list[dict], system: str = ""
     ) -> tuple[str, list[dict]]:
+        response = await self._create(messages, system, tools)
+        return self._extract_text(response), self._extract_tool_calls(response)
+
+    async def stream_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> AsyncIterator[dict]:
+        """Streaming variant of complete_with_tools_messages.
+
+        Yields {"type": "tool_use", "id", "name", "input"} for each tool_use block as
+        soon as the model finishes writing it, then a final
+        {"type": "done", "text": str, "tool_calls": list[dict]} with the full turn.
+        """
+        request = self._build_request(messages, system, tools)
+        estimated = self._estimate_uncached_tokens(messages, system, tools)
+        started = time.perf_counter()
+        attempt = 0
+        emitted = False
+        while True:
+            try:
+                async with self.governor.admit(estimated) if self.governor else nullcontext():
+                    async with self.client.messages.stream(**request) as stream:
+                        if self.governor:
+                            self.governor.observe_headers(stream.response.headers)
+                        async for event in stream:
+                            if event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                                block = event.content_block
+                                emitted = True
+                                yield {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+                        response = await stream.get_final_message()
+                break
+            except Exception as e:
+                # Only retry before anything reached the caller — tools may already be running
+                delay = None if emitted or not self.governor else self.governor.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+        if self.governor:
+            self.governor.reconcile(estimated, self._uncached_input_tokens(response))
+        self._record_usage(response, time.perf_counter() - started)
+        yield {
+            "type": "done",
+            "text": self._extract_text(response),
+            "tool_calls": self._extract_tool_calls(response),
+        }
+
+    async def _create(self, messages: list[dict], system: str = "", tools: list[dict] | None = None):
+        request = self._build_request(messages, system, tools)
+        estimated = self._estimate_uncached_tokens(messages, system, tools)
+        started = time.perf_counter()
+        hedged = False
+        if self.hedge_policy is not None and hedging_enabled():
+            response, hedged = await self.hedge_policy.run(lambda: self._send(request, estimated))
+        else:
+            response = await self._send(request, estimated)
+        self._record_usage(response, time.perf_counter() - started, hedged=hedged)
+        return response
+
+    async def _send(self, request: dict, estimated: int):
+        if self.governor is None:
+            return await self.client.messages.create(**request)
+        response = await self.governor.run(lambda: self._send_raw(request), estimated)
+        self.governor.reconcile(estimated, self._uncached_input_tokens(response))
+        return response
+
+    async def _send_raw(self, request: dict):
+        """messages.create via the raw-response API so the governor can read rate-limit headers."""
+        raw = await self.client.messages.with_raw_response.create(**request)
+        self.governor.observe_headers(raw.headers)
+        return raw.parse()
+
+    def _build_request(self, messages: list[dict], system: str, tools: list[dict] | None) -> dict:
+        """Assemble messages.create kwargs, marking stable prefixes as cacheable.
+
+        Breakpoints go on the system prompt, the last tool schema, and the last two
+        user turns, so each agent-loop turn reads the previous turn's prefix from cache.
+        Inputs are copied, never mutated — callers keep appending to their own lists.
+        """
         kwargs: dict = {
-            "model": self.model,
+            "model": self.current_model(),
             "max_tokens": 4096,
             "messages": messages,
-            "tools": tools,
         }
+        if tools:
+            kwargs["tools"] = tools
         if system:
             kwargs["system"] = system
-        response = await self.client.messages.create(**kwargs)
-        return self._extract_text(response), self._extract_tool_calls(response)
+        if not self.prompt_caching:
+            return kwargs
+
+        if system:
+            kwargs["system"] = [{"type": "text", "text": system, "cache_control": _EPHEMERAL}]
+        if tools:
+            kwargs["tools"] = tools[:-1] + [{**tools[-1], "cache_control": _EPHEMERAL}]
+
+        cached_messages = list(messages)
+        user_turns = [i for i, m in enumerate(cached_messages) if m.get("role") == "user"]
+        for i in user_turns[-2:]:
+            cached_messages[i] = self._with_cache_breakpoint(cached_messages[i])
+        kwargs["messages"] = cached_messages
+        return kwargs
+
+    def _estimate_uncached_tokens(self, messages: list[dict], system: str, tools: list[dict] | None) -> int:
+        """Input tokens to admit against the TPM bucket: only what the cache won't serve.
+
+        Cache reads don't count towards the input-token rate limit. With caching on,
+        the previous turn wrote everything up to the second-to-last user turn (see
+        _build_request), so only the messages after it are charged up front; the
+        first turn of a conversation is charged in full. reconcile() settles the
+        difference once the response reports real usage.
+        """
+        if self.prompt_caching:
+            user_turns = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+            if len(user_turns) >= 2:
+                return estimate_tokens(messages[user_turns[-2] + 1:])
+        return estimate_tokens(system, messages, tools)
+
+    @staticmethod
+    def _uncached_input_tokens(response) -> int:
+        """Input tokens that counted towards the rate limit (uncached plus cache writes)."""
+        usage = response.usage
+        return (usage.input_tokens or 0) + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+
+    def current_model(self) -> str:
+        """Model for the call site active in the calling task (see llm.router)."""
+        return self.router.resolve()[1] if self.router else self.model
+
+    @staticmethod
+    def _with_cache_breakpoint(message: dict) -> dict:
+        """Return a copy of message whose last content block carries cache_control."""
+        content = message.get("content")
+        if isinstance(content, str):
+            if not content:
+                return message
+            blocks = [{"type": "text", "text": content}]
+        elif isinstance(content, list) and content:
+            blocks = list(content)
+        else:
+            return message
+        last = blocks[-1]
+        if not isinstance(last, dict):
+            return message
+        blocks[-1] = {**last, "cache_control": _EPHEMERAL}
+        return {**message, "content": blocks}
+
+    def _record_usage(self, response, latency_s: float, hedged: bool = False) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        counts = {key: getattr(usage, key, 0) or 0 for key in self.cache_stats}
+        for key, value in counts.items():
+            self.cache_stats[key] += value
+        charge_current_budget(sum(counts.values()))
+        if self.ledger is not None:
+            self.ledger.record(
+                "anthropic",
+                getattr(response, "model", self.model),
+                input_tokens=counts["input_tokens"],
+                output_tokens=counts["output_tokens"],
+                cache_read_tokens=counts["cache_read_input_tokens"],
+                cache_write_tokens=counts["cache_creation_input_tokens"],
+                latency_s=latency_s,
+                tier=self.router.resolve()[0] if self.router else DEFAULT_TIER,
+                call_site=current_call_site(),
+                hedged=hedged,
+            )
+        logger.info(
+            f"Claude usage: input={counts['input_tokens']} "
+            f"cache_read={counts['cache_read_input_tokens']} "
+            f"cache_write={counts['cache_creation_input_tokens']} "
+            f"output={counts['output_tokens']} latency={latency_s:.2f}s"
+        )
 
     @staticmethod
     def _extract_text(response) -> str:
@@ -80,17 +261,26 @@ class AnthropicAdapter:
 class GeminiAdapter:
     """Adapter for Google Gemini API, implementing LLMProvider."""
 
-    def __init__(self, api_key: str, model: str = "gemini-2.5-pro"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.5-pro",
+        ledger: UsageLedger | None = None,
+        governor: RateLimitGovernor | None = None,
+        inline_max_bytes: int = 4 * 1024 * 1024,
+    ):
         self.client = genai.Client(api_key=api_key)
         self.model_name = model
+        self.ledger = ledger
+        self.governor = governor
+        # Files larger than this go through the Files API once and are referenced by URI
+        self.inline_max_bytes = inline_max_bytes
+        self._uploads: dict[str, genai_types.File] = {}  # sha256 of bytes -> uploaded file
+        self._upload_locks: dict[str, asyncio.Lock] = {}
 
     async def complete(self, prompt: str, system: str = "") -> str:
         config = genai_types.GenerateContentConfig(system_instruction=system) if system else None
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=prompt,
-            config=config,
-        )
+        response = await self._generate(prompt, config, estimate_tokens(system, prompt))
         return response.text
 
     async def complete_messages(self, messages: list[dict], system: str = "") -> str:
@@ -105,20 +295,87 @@ class GeminiAdapter:
             contents.append(genai_types.Content(role=role, parts=[genai_types.Part(text=content)]))
 
         config = genai_types.GenerateContentConfig(system_instruction=system) if system else None
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=contents,
-            config=config,
-        )
+        response = await self._generate(contents, config, estimate_tokens(system, messages))
         return response.text
 
     async def extract_multimodal(self, file_bytes: bytes, mime_type: str, prompt: str) -> str:
-        """Process PDFs, images, and other files using Gemini's multimodal capabilities."""
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=[
-                genai_types.Part(inline_data=genai_types.Blob(mime_type=mime_type, data=file_bytes)),
-                prompt,
-            ],
+        """Process PDFs, images, and other files using Gemini's multimodal capabilities.
+
+        Small files are sent inline; large ones are uploaded once per adapter (i.e. per
+        pipeline) and reused by URI across prompts until cleanup_files().
+        """
+        if len(file_bytes) > self.inline_max_bytes:
+            uploaded = await self._get_or_upload(file_bytes, mime_type)
+            file_part = genai_types.Part.from_uri(
+                file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type
+            )
+        else:
+            file_part = genai_types.Part(inline_data=genai_types.Blob(mime_type=mime_type, data=file_bytes))
+        response = await self._generate(
+            [file_part, prompt],
+            estimated_tokens=estimate_tokens(prompt) + len(file_bytes) // 1000,
         )
         return response.text
+
+    async def _get_or_upload(self, file_bytes: bytes, mime_type: str) -> genai_types.File:
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        lock = self._upload_locks.setdefault(digest, asyncio.Lock())
+        async with lock:  # concurrent extract_content calls on one file share a single upload
+            if digest in self._uploads:
+                return self._uploads[digest]
+            uploaded = await self.client.aio.files.upload(
+                file=io.BytesIO(file_bytes),
+                config=genai_types.UploadFileConfig(mime_type=mime_type, display_name=digest[:16]),
+            )
+            while uploaded.state == genai_types.FileState.PROCESSING:
+                await asyncio.sleep(1)
+                uploaded = await self.client.aio.files.get(name=uploaded.name)
+            if uploaded.state == genai_types.FileState.FAILED:
+                raise RuntimeError(f"Gemini file upload failed for {mime_type} ({len(file_bytes)} bytes)")
+            logger.info(f"Uploaded {len(file_bytes)} bytes to Gemini Files API as {uploaded.name}")
+            self._uploads[digest] = uploaded
+            return uploaded
+
+    async def cleanup_files(self) -> None:
+        """Delete every file this adapter uploaded. Safe to call more than once."""
+        uploads, self._uploads = self._uploads, {}
+        self._upload_locks.clear()
+        for uploaded in uploads.values():
+            try:
+                await self.client.aio.files.delete(name=uploaded.name)
+            except Exception as e:
+                logger.warning(f"Failed to delete Gemini file {uploaded.name}: {e}")
+
+    async def _generate(self, contents, config=None, estimated_tokens: int = 0):
+        started = time.perf_counter()
+
+        def send():
+            return self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents,
+                config=config,
+            )
+
+        if self.governor is None:
+            response = await send()
+        else:
+            response = await self.governor.run(send, estimated_tokens)
+        self._record_usage(response, time.perf_counter() - started)
+        return response
+
+    def _record_usage(self, response, latency_s: float) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        charge_current_budget((usage.prompt_token_count or 0) + (usage.candidates_token_count or 0))
+        if self.ledger is None:
+            return
+        self.ledger.record(
+            "gemini",
+            self.model_name,
+            input_tokens=usage.prompt_token_count or 0,
+            output_tokens=usage.candidates_token_count or 0,
+            cache_read_tokens=usage.cached_content_token_count or 0,
+            latency_s=latency_s,
+            call_site=current_call_site(),
+        )
@@ -0,0 +1,99 @@
+"""Wall-clock and token budgets for agents and pipeline phases.
+
+An AgentBudget bounds one agent (or one phase) by a deadline and a token
+allowance; agent budgets usually have their phase's budget as parent, so a
+phase-wide limit also stops every agent inside it. Loops run each turn inside
+budget.limit(): the turn is cancelled once the deadline passes, and a new turn
+is refused once the tokens are spent, both surfacing as BudgetExceeded so the
+agent can return what it has gathered so far.
+
+LLM adapters charge tokens to the budget active in the calling task (set by
+limit(), a contextvar, so tool calls dispatched from the turn inherit it).
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+_current_budget: ContextVar["AgentBudget | None"] = ContextVar("agent_budget", default=None)
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, budget: "AgentBudget", reason: str):
+        super().__init__(f"Budget '{budget.name}' exceeded: {reason}")
+        self.budget = budget
+        self.reason = reason
+
+
+class AgentBudget:
+    def __init__(
+        self,
+        name: str,
+        deadline_s: float | None = None,
+        max_tokens: int | None = None,
+        parent: "AgentBudget | None" = None,
+        start: bool = True,
+    ):
+        self.name = name
+        self.parent = parent
+        self.max_tokens = max_tokens or None
+        self.tokens_used = 0
+        self._deadline_s = deadline_s or None
+        self._deadline: float | None = None
+        if start:
+            self.start()
+
+    def start(self) -> None:
+        """Start the deadline clock. A budget created with start=False has no deadline until then."""
+        if self._deadline_s is not None:
+            self._deadline = time.monotonic() + self._deadline_s
+
+    def remaining_s(self) -> float | None:
+        """Seconds until the nearest deadline (own or inherited), None when unbounded."""
+        remaining = self._deadline - time.monotonic() if self._deadline is not None else None
+        if self.parent is not None:
+            inherited = self.parent.remaining_s()
+            if inherited is not None and (remaining is None or inherited < remaining):
+                remaining = inherited
+        return remaining
+
+    def charge(self, tokens: int) -> None:
+        self.tokens_used += tokens
+        if self.parent is not None:
+            self.parent.charge(tokens)
+
+    def check(self) -> None:
+        """Raise BudgetExceeded if this budget or any parent is exhausted."""
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise BudgetExceeded(self, "deadline passed")
+        if self.max_tokens is not None and self.tokens_used >= self.max_tokens:
+            raise BudgetExceeded(self, f"{self.tokens_used}/{self.max_tokens} tokens used")
+        if self.parent is not None:
+            self.parent.check()
+
+    @asynccontextmanager
+    async def limit(self):
+        """Run the block under this budget: refuse to start when exhausted, cancel at the deadline."""
+        self.check()
+        token = _current_budget.set(self)
+        deadline = asyncio.timeout(self.remaining_s())
+        try:
+            async with deadline:
+                yield
+        except TimeoutError as e:
+            if deadline.expired():
+                raise BudgetExceeded(self, "deadline passed") from e
+            raise
+        finally:
+            _current_budget.reset(token)
+
+
+def charge_current_budget(tokens: int) -> None:
+    """Charge tokens to the budget of the calling task, if any."""
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.charge(tokens)
@@ -0,0 +1,221 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Used to make pipeline reruns (after a crash, or during development) replay
+identical Claude/Gemini calls from disk instead of paying for them again.
+Entries are keyed on a hash of provider, model, system prompt, messages and
+tool schemas; one JSON file per entry, written atomically so concurrent agents
+(and processes) sharing the directory never see partial files. Least-recently
+used entries are evicted once the directory exceeds its size budget, and
+entries older than the TTL are treated as misses.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator
+
+from .usage import current_phase
+
+logger = logging.getLogger(__name__)
+
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def llm_cache_disabled():
+    """Bypass the response cache for every LLM call made inside this block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class ResponseCache:
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, ttl: int = 7 * 86400):
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._approx_size: int | None = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        canonical = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry.get("created", 0) > self._ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # mtime doubles as last-access time for LRU eviction
+        except FileNotFoundError:
+            pass
+        return entry["value"]
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"created": time.time(), "value": value}, default=str)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        if self._approx_size is None:
+            self._approx_size = sum(size for _, size, _ in self._entries())
+        else:
+            self._approx_size += len(data)
+        if self._approx_size > self._max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Delete expired entries, then least-recently used ones until under max_bytes."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - self._ttl
+        for path, size, mtime in entries:
+            if total <= self._max_bytes and mtime >= cutoff:
+                continue
+            self._remove(path)
+            total -= size
+        self._approx_size = total
+
+    def _entries(self) -> Iterable[tuple[str, int, float]]:
+        for root, _, files in os.walk(self._dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class CachedLLM:
+    """Wraps an adapter with a ResponseCache, implementing the same LLM protocols.
+
+    Attributes and methods that are not cached (e.g. ledger, cleanup hooks) are
+    delegated to the wrapped adapter unchanged.
+    """
+
+    def __init__(self, inner, cache: ResponseCache, provider: str, phases: Iterable[str] | None = None):
+        self._inner = inner
+        self._cache = cache
+        self._provider = provider
+        # Phases in which the cache is active; None means every phase
+        self._phases = set(phases) if phases is not None else None
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+    @property
+    def _model(self) -> str:
+        # Routed adapters pick the model per call site, so resolve it per call
+        if hasattr(self._inner, "current_model"):
+            return self._inner.current_model()
+        return getattr(self._inner, "model", None) or getattr(self._inner, "model_name", "")
+
+    def _enabled(self) -> bool:
+        if _bypass.get():
+            return False
+        return self._phases is None or current_phase() in self._phases
+
+    async def _cached(self, method: str, key_parts: tuple, call):
+        if not self._enabled():
+            return await call()
+        key = ResponseCache.make_key(self._provider, self._model, method, *key_parts)
+        hit = self._cache.get(key)
+        if hit is not None:
+            logger.info(f"LLM cache hit: {self._provider} {method} ({key[:12]})")
+            return hit
+        value = await call()
+        self._cache.put(key, value)
+        return value
+
+    async def complete(self, prompt: str, system: str = "") -> str:
+        return await self._cached(
+            "complete", (system, prompt), lambda: self._inner.complete(prompt, system)
+        )
+
+    async def complete_messages(self, messages: list[dict], system: str = "") -> str:
+        return await self._cached(
+            "complete_messages", (system, messages), lambda: self._inner.complete_messages(messages, system)
+        )
+
+    async def complete_with_tools(
+        self, prompt: str, tools: list[dict], system: str = ""
+    ) -> tuple[str, list[dict]]:
+        text, calls = await self._cached(
+            "complete_with_tools",
+            (system, prompt, tools),
+            lambda: self._inner.complete_with_tools(prompt, tools, system),
+        )
+        return text, calls
+
+    async def complete_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> tuple[str, list[dict]]:
+        text, calls = await self._cached(
+            "complete_with_tools_messages",
+            (system, messages, tools),
+            lambda: self._inner.complete_with_tools_messages(messages, tools, system),
+        )
+        return text, calls
+
+    async def stream_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> AsyncIterator[dict]:
+        # Shares its key with complete_with_tools_messages — the turn content is identical
+        key = ResponseCache.make_key(
+            self._provider, self._model, "complete_with_tools_messages", system, messages, tools
+        )
+        enabled = self._enabled()
+        hit = self._cache.get(key) if enabled else None
+        if hit is not None:
+            logger.info(f"LLM cache hit: {self._provider} stream ({key[:12]})")
+            text, calls = hit
+            for tc in calls:
+                yield {"type": "tool_use", **tc}
+            yield {"type": "done", "text": text, "tool_calls": calls}
+            return
+        async for event in self._inner.stream_with_tools_messages(messages, tools, system):
+            if event["type"] == "done" and enabled:
+                self._cache.put(key, [event["text"], event["tool_calls"]])
+            yield event
+
+    async def extract_multimodal(self, file_bytes: bytes, mime_type: str, prompt: str) -> str:
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        return await self._cached(
+            "extract_multimodal",
+            (digest, mime_type, prompt),
+            lambda: self._inner.extract_multimodal(file_bytes, mime_type, prompt),
+        )
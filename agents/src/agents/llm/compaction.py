@@ -0,0 +1,122 @@
+"""Conversation history compaction for long agent loops.
+
+Agent loops resend the whole history every turn, and tool results (Composio
+payloads, command output) dominate it, so input tokens grow quadratically with
+the number of turns. HistoryCompactor elides the content of old tool_result
+blocks once the estimated history size passes a token budget. The most recent
+turns are kept verbatim, and every tool_use/tool_result block stays in place
+(only its content shrinks), so the pairing the API requires is never broken.
+
+Elision is sticky and oldest-first, so the compacted prefix only changes when
+another result is elided — prompt caching keeps hitting in between. A short
+last line (e.g. a note on how to fetch the rest) is kept after the preview.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CHARS_PER_TOKEN = 4
+
+
+class HistoryCompactor:
+    """Usage:
+        compactor = HistoryCompactor()
+        for turn in range(max_turns):
+            text, calls = await llm.complete_with_tools_messages(compactor.compact(messages), tools, system)
+    """
+
+    def __init__(self, max_tokens: int = 60_000, keep_recent_turns: int = 4, preview_chars: int = 300):
+        self._max_tokens = max_tokens
+        self._keep_recent_turns = keep_recent_turns
+        self._preview_chars = preview_chars
+        # tool_use_id -> elided content, so an elided result stays identical every turn
+        self._elided: dict[str, str] = {}
+
+    def compact(self, messages: list[dict]) -> list[dict]:
+        """Return messages with old tool results elided to fit the budget.
+
+        The input list is never modified; untouched messages are shared, not copied.
+        """
+        protected_from = self._protected_start(messages)
+        compacted = self._render(messages)
+        total = sum(_estimate_tokens(m) for m in compacted)
+        if total > self._max_tokens:
+            self._elide_until_under_budget(messages, protected_from, total)
+            compacted = self._render(messages)
+        return compacted
+
+    def _render(self, messages: list[dict]) -> list[dict]:
+        if not self._elided:
+            return messages
+        return [
+            {**msg, "content": [self._apply(block) for block in msg["content"]]}
+            if self._has_elided_results(msg) else msg
+            for msg in messages
+        ]
+
+    def _protected_start(self, messages: list[dict]) -> int:
+        """Index of the first message belonging to the most recent keep_recent_turns turns."""
+        assistant_turns = [i for i, m in enumerate(messages) if m.get("role") == "assistant"]
+        if len(assistant_turns) <= self._keep_recent_turns:
+            return 0 if not assistant_turns else assistant_turns[0]
+        return assistant_turns[-self._keep_recent_turns]
+
+    def _elide_until_under_budget(self, messages: list[dict], protected_from: int, total: int) -> None:
+        for msg in messages[:protected_from]:
+            if total <= self._max_tokens:
+                break
+            content = msg.get("content")
+            if msg.get("role") != "user" or not isinstance(content, list):
+                continue
+            for block in content:
+                if total <= self._max_tokens:
+                    break
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                tool_use_id = block.get("tool_use_id", "")
+                if tool_use_id in self._elided:
+                    continue
+                original = _content_text(block.get("content", ""))
+                if len(original) <= self._preview_chars * 2:
+                    continue
+                replacement = (
+                    f"{original[:self._preview_chars]}\n"
+                    f"... [older tool result elided to save context: {len(original)} chars total]"
+                )
+                last_line = original.rstrip().rsplit("\n", 1)[-1]
+                if len(last_line) <= self._preview_chars and last_line not in original[:self._preview_chars]:
+                    replacement += f"\n{last_line}"
+                self._elided[tool_use_id] = replacement
+                total -= (len(original) - len(replacement)) // _CHARS_PER_TOKEN
+        logger.info(f"History compacted: {len(self._elided)} tool results elided, ~{total} tokens")
+
+    def _has_elided_results(self, msg: dict) -> bool:
+        content = msg.get("content")
+        return isinstance(content, list) and any(
+            isinstance(b, dict) and b.get("type") == "tool_result" and b.get("tool_use_id") in self._elided
+            for b in content
+        )
+
+    def _apply(self, block):
+        if isinstance(block, dict) and block.get("type") == "tool_result" and block.get("tool_use_id") in self._elided:
+            return {**block, "content": self._elided[block["tool_use_id"]]}
+        return block
+
+
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            c.get("text", "") if isinstance(c, dict) else str(c) for c in content
+        )
+    return str(content)
+
+
+def _estimate_tokens(message: dict) -> int:
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return len(content) // _CHARS_PER_TOKEN
+    return len(json.dumps(content, default=str)) // _CHARS_PER_TOKEN
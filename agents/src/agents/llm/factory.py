@@ -1,8 +1,57 @@
 from .adapters import AnthropicAdapter, GeminiAdapter
+from .cache import CachedLLM, ResponseCache
+from .hedging import get_hedge_policy
+from .rate_limit import get_governor
+from .router import ModelRouter
+from .usage import UsageLedger
 
 
-def create_llm_providers(settings) -> tuple[AnthropicAdapter, GeminiAdapter]:
+def create_llm_providers(
+    settings, ledger: UsageLedger | None = None
+) -> tuple[AnthropicAdapter, GeminiAdapter]:
+    # Governors are process-wide: every pipeline in this process shares the same limits
+    claude_governor = get_governor(
+        "anthropic",
+        requests_per_minute=settings.CLAUDE_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.CLAUDE_TOKENS_PER_MINUTE,
+        max_in_flight=settings.CLAUDE_MAX_IN_FLIGHT,
+        max_retries=settings.LLM_MAX_RETRIES,
+    )
+    gemini_governor = get_governor(
+        "gemini",
+        requests_per_minute=settings.GEMINI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.GEMINI_TOKENS_PER_MINUTE,
+        max_in_flight=settings.GEMINI_MAX_IN_FLIGHT,
+        max_retries=settings.LLM_MAX_RETRIES,
+    )
+    claude = AnthropicAdapter(
+        api_key=settings.ANTHROPIC_API_KEY,
+        model=settings.CLAUDE_MODEL,
+        prompt_caching=settings.CLAUDE_PROMPT_CACHING,
+        ledger=ledger,
+        governor=claude_governor,
+        router=ModelRouter.from_settings(settings),
+        hedge_policy=get_hedge_policy(
+            percentile=settings.LLM_HEDGE_PERCENTILE, budget_ratio=settings.LLM_HEDGE_BUDGET
+        ) if settings.LLM_HEDGING else None,
+    )
+    gemini = GeminiAdapter(
+        api_key=settings.GEMINI_API_KEY,
+        model=settings.GEMINI_MODEL,
+        ledger=ledger,
+        governor=gemini_governor,
+        inline_max_bytes=settings.GEMINI_INLINE_MAX_BYTES,
+    )
+    if not settings.LLM_CACHE_DIR:
+        return claude, gemini
+
+    cache = ResponseCache(
+        settings.LLM_CACHE_DIR,
+        max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+        ttl=settings.LLM_CACHE_TTL,
+    )
+    phases = [p.strip() for p in settings.LLM_CACHE_PHASES.split(",") if p.strip()]
     return (
-        AnthropicAdapter(api_key=settings.ANTHROPIC_API_KEY, model=settings.CLAUDE_MODEL),
-        GeminiAdapter(api_key=settings.GEMINI_API_KEY, model=settings.GEMINI_MODEL),
+        CachedLLM(claude, cache, "anthropic", phases=phases),
+        CachedLLM(gemini, cache, "gemini", phases=phases),
     )
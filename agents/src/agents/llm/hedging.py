@@ -0,0 +1,130 @@
+"""Hedged requests for latency-critical LLM calls.
+
+When a call opted in with hedged_requests() has been running longer than a
+high percentile of recent latencies for its call site, a duplicate request is
+issued and whichever finishes first wins; the other is cancelled. Hedges are
+capped at budget_ratio of primary calls (never above 1.0), so hedging can at
+most double spend. One HedgePolicy is shared process-wide (get_hedge_policy)
+so latency history accumulates across pipelines.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+
+from .router import current_call_site
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_hedging: ContextVar[bool] = ContextVar("llm_hedging", default=False)
+
+
+@contextmanager
+def hedged_requests():
+    """Allow hedging for every LLM call made inside this block."""
+    token = _hedging.set(True)
+    try:
+        yield
+    finally:
+        _hedging.reset(token)
+
+
+def hedging_enabled() -> bool:
+    return _hedging.get()
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget_ratio: float = 0.1,
+        min_samples: int = 5,
+        min_delay: float = 2.0,
+        window: int = 200,
+    ):
+        self._percentile = percentile
+        self._budget_ratio = min(budget_ratio, 1.0)
+        self._min_samples = min_samples
+        self._min_delay = min_delay
+        self._window = window
+        self._latencies: dict[str, deque[float]] = {}
+        self.stats = {"primary_calls": 0, "hedges": 0, "hedge_wins": 0}
+
+    def observe(self, latency_s: float, call_site: str | None = None) -> None:
+        site = current_call_site() if call_site is None else call_site
+        self._latencies.setdefault(site, deque(maxlen=self._window)).append(latency_s)
+
+    def hedge_delay(self, call_site: str | None = None) -> float | None:
+        """Seconds to wait before hedging, or None while there is too little history."""
+        site = current_call_site() if call_site is None else call_site
+        samples = self._latencies.get(site)
+        if not samples or len(samples) < self._min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self._percentile))
+        return max(self._min_delay, ordered[index])
+
+    def _can_hedge(self) -> bool:
+        return self.stats["hedges"] < self._budget_ratio * self.stats["primary_calls"]
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run fn, hedging with a duplicate if it is slow. Returns (result, hedged)."""
+        self.stats["primary_calls"] += 1
+        site = current_call_site()
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(fn())
+        try:
+            delay = self.hedge_delay(site)
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self._can_hedge():
+                    return await self._race(primary, fn, site, started)
+            result = await primary
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        self.observe(time.perf_counter() - started, site)
+        return result, False
+
+    async def _race(
+        self, primary: asyncio.Future, fn: Callable[[], Awaitable[T]], site: str, started: float
+    ) -> tuple[T, bool]:
+        self.stats["hedges"] += 1
+        logger.info(f"Hedging slow LLM call ({site or 'unnamed'}), hedges so far: {self.stats['hedges']}")
+        hedge_started = time.perf_counter()
+        hedge = asyncio.ensure_future(fn())
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    winner = hedge if hedge in succeeded else succeeded[0]
+                    if winner is hedge:
+                        self.stats["hedge_wins"] += 1
+                        self.observe(time.perf_counter() - hedge_started, site)
+                    else:
+                        self.observe(time.perf_counter() - started, site)
+                    return winner.result(), True
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+_policy: HedgePolicy | None = None
+
+
+def get_hedge_policy(**options) -> HedgePolicy:
+    """Return the process-wide HedgePolicy, creating it on first use."""
+    global _policy
+    if _policy is None:
+        _policy = HedgePolicy(**options)
+    return _policy
@@ -1,4 +1,4 @@
-from typing import Protocol, Any
+from typing import AsyncIterator, Protocol, Any
 
 
 class LLMProvider(Protocol):
@@ -13,3 +13,9 @@ class ToolCapableLLM(Protocol):
     async def complete_with_tools_messages(
         self, messages: list[dict], tools: list[dict], system: str = ""
     ) -> tuple[str, list[dict]]: ...
+
+
+class StreamingToolCapableLLM(ToolCapableLLM, Protocol):
+    def stream_with_tools_messages(
+        self, messages: list[dict], tools: list[dict], system: str = ""
+    ) -> AsyncIterator[dict]: ...
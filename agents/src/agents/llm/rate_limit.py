@@ -0,0 +1,197 @@
+"""Process-wide rate limiting and concurrency governor for LLM calls.
+
+One RateLimitGovernor per provider is shared by every adapter in the process
+(see get_governor), so all concurrent pipelines started by server.py draw from
+the same request/token budgets. Admission goes through token buckets for
+requests and tokens per minute plus a cap on in-flight requests; the buckets
+are tightened from rate-limit response headers, and 429/529/5xx responses are
+retried with jittered exponential backoff while every caller pauses.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Mapping, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status codes worth retrying: rate limited, overloaded, transient server errors
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+# Status codes that signal the provider wants everyone to back off
+_OVERLOAD_STATUS = {429, 529}
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of allowance."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self._tokens = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def take(self, amount: float) -> None:
+        """Wait until amount is available, then consume it. FIFO via the lock."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self._rate)
+
+    def charge(self, amount: float) -> None:
+        """Consume amount without waiting (may go negative; a negative amount refunds)."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+    def cap(self, remaining: float) -> None:
+        """Lower the balance to what the provider reports as remaining."""
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+
+
+class RateLimitGovernor:
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._cooldown_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+
+    @asynccontextmanager
+    async def admit(self, estimated_tokens: int = 0):
+        """Hold a request slot: waits out any cooldown, both buckets and the in-flight cap."""
+        delay = self._cooldown_until - time.monotonic()
+        if delay > 0:
+            self.stats["throttled"] += 1
+            await asyncio.sleep(delay)
+        if self._requests is not None:
+            await self._requests.take(1)
+        if self._tokens is not None and estimated_tokens:
+            await self._tokens.take(estimated_tokens)
+        async with self._in_flight:
+            self.stats["requests"] += 1
+            yield
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Settle the token bucket to actual usage: charge the shortfall, refund the excess."""
+        if self._tokens is not None and actual_tokens != estimated_tokens:
+            self._tokens.charge(actual_tokens - min(estimated_tokens, self._tokens.capacity))
+
+    def observe_headers(self, headers: Mapping[str, str] | None) -> None:
+        """Tighten the buckets from Anthropic-style rate-limit headers."""
+        if not headers:
+            return
+        remaining = _int_header(headers, "anthropic-ratelimit-requests-remaining")
+        if remaining is not None and self._requests is not None:
+            self._requests.cap(remaining)
+        remaining = _int_header(headers, "anthropic-ratelimit-input-tokens-remaining")
+        if remaining is None:
+            remaining = _int_header(headers, "anthropic-ratelimit-tokens-remaining")
+        if remaining is not None and self._tokens is not None:
+            self._tokens.cap(remaining)
+
+    def retry_delay(self, exc: BaseException, attempt: int) -> float | None:
+        """Seconds to wait before retrying after exc, or None if it should propagate."""
+        if attempt >= self.max_retries:
+            return None
+        status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+        transport_error = isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)) or (
+            type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+        )
+        if status not in _RETRYABLE_STATUS and not transport_error:
+            return None
+
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        retry_after = _float_header(headers, "retry-after") if headers else None
+        if retry_after is not None:
+            delay = min(retry_after, self._max_delay)
+        else:
+            delay = min(self._max_delay, self._base_delay * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.5)
+        if status in _OVERLOAD_STATUS:
+            # Pause every caller sharing this governor, not just the one that hit the limit
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        self.stats["retries"] += 1
+        logger.warning(
+            f"{self.name} call failed ({status or type(exc).__name__}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+        )
+        return delay
+
+    async def run(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int = 0) -> T:
+        """Run fn under admission control, retrying retryable failures."""
+        attempt = 0
+        while True:
+            try:
+                async with self.admit(estimated_tokens):
+                    return await fn()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+def estimate_tokens(*parts: Any) -> int:
+    """Rough input-token estimate (~4 chars per token) for bucket admission."""
+    return sum(len(str(p)) for p in parts if p) // 4
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> int | None:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _float_header(headers: Mapping[str, str], name: str) -> float | None:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_governors: dict[str, RateLimitGovernor] = {}
+
+
+def get_governor(name: str, **limits) -> RateLimitGovernor:
+    """Return the process-wide governor for name, creating it on first use.
+
+    Limits passed on later calls are ignored — the first caller configures it.
+    """
+    governor = _governors.get(name)
+    if governor is None:
+        governor = RateLimitGovernor(name, **limits)
+        _governors[name] = governor
+    return governor
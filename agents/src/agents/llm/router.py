@@ -0,0 +1,66 @@
+"""Model tiering: route each LLM call site to a configured model tier.
+
+Call sites tag themselves with llm_call_site("classify_relevance") and the
+adapter asks its ModelRouter which model to use. Routes and tier models come
+from Settings, so the mapping can be tuned without code changes; the usage
+ledger records the tier of every call alongside latency and cost.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_TIER = "default"
+
+_call_site: ContextVar[str] = ContextVar("llm_call_site", default="")
+
+
+@contextmanager
+def llm_call_site(name: str):
+    """Tag every LLM call made inside this block with a call-site name for routing."""
+    token = _call_site.set(name)
+    try:
+        yield
+    finally:
+        _call_site.reset(token)
+
+
+def current_call_site() -> str:
+    return _call_site.get()
+
+
+class ModelRouter:
+    def __init__(self, tiers: dict[str, str], routes: dict[str, str] | None = None):
+        if DEFAULT_TIER not in tiers:
+            raise ValueError(f"ModelRouter needs a '{DEFAULT_TIER}' tier")
+        self.tiers = {name: model for name, model in tiers.items() if model}
+        self.routes = routes or {}
+
+    def resolve(self, call_site: str | None = None) -> tuple[str, str]:
+        """Return (tier, model) for a call site; unknown sites and tiers fall back to default."""
+        site = current_call_site() if call_site is None else call_site
+        tier = self.routes.get(site, DEFAULT_TIER)
+        if tier not in self.tiers:
+            tier = DEFAULT_TIER
+        return tier, self.tiers[tier]
+
+    @staticmethod
+    def parse_routes(spec: str) -> dict[str, str]:
+        """Parse "site=tier,site=tier" into a dict."""
+        routes = {}
+        for item in spec.split(","):
+            if "=" not in item:
+                continue
+            site, tier = item.split("=", 1)
+            routes[site.strip()] = tier.strip()
+        return routes
+
+    @classmethod
+    def from_settings(cls, settings) -> "ModelRouter":
+        return cls(
+            tiers={
+                DEFAULT_TIER: settings.CLAUDE_MODEL,
+                "fast": settings.CLAUDE_MODEL_FAST,
+                "strong": settings.CLAUDE_MODEL_STRONG or settings.CLAUDE_MODEL,
+            },
+            routes=cls.parse_routes(settings.LLM_MODEL_ROUTES),
+        )
@@ -0,0 +1,204 @@
+"""Per-call token and latency accounting for LLM adapters.
+
+Adapters record every Claude/Gemini call into a UsageLedger. Records are tagged
+with the agent and pipeline phase active in the calling task, set via
+usage_scope() — a contextvar, so concurrent agents under asyncio.gather each
+keep their own tags while sharing one adapter and one ledger.
+"""
+
+import time
+from collections.abc import Awaitable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# USD per million tokens (input, output), matched by model-name prefix.
+# Cache reads bill at 10% of input, cache writes at 125%.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-haiku-4": (1.0, 5.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.3, 2.5),
+}
+
+_current_agent: ContextVar[str] = ContextVar("usage_agent", default="master")
+_current_phase: ContextVar[str] = ContextVar("usage_phase", default="")
+
+
+@contextmanager
+def usage_scope(agent: str | None = None, phase: str | None = None):
+    """Tag every LLM call made inside this block with agent and/or phase."""
+    tokens = []
+    if agent is not None:
+        tokens.append((_current_agent, _current_agent.set(agent)))
+    if phase is not None:
+        tokens.append((_current_phase, _current_phase.set(phase)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+async def run_in_scope(coro: Awaitable[T], agent: str | None = None, phase: str | None = None) -> T:
+    """Await coro inside usage_scope — convenient for coroutines handed to asyncio.gather."""
+    with usage_scope(agent=agent, phase=phase):
+        return await coro
+
+
+def current_agent() -> str:
+    return _current_agent.get()
+
+
+def current_phase() -> str:
+    return _current_phase.get()
+
+
+@dataclass
+class UsageRecord:
+    provider: str  # anthropic, gemini
+    model: str
+    agent: str
+    phase: str
+    tier: str = "default"
+    call_site: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency_s: float = 0.0
+    cost_usd: float = 0.0
+    hedged: bool = False  # a duplicate request was raced against this one
+    timestamp: float = field(default_factory=time.time)
+
+
+class UsageLedger:
+    """Append-only ledger of LLM calls for one pipeline run."""
+
+    def __init__(self):
+        self._records: list[UsageRecord] = []
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        latency_s: float = 0.0,
+        tier: str = "default",
+        call_site: str = "",
+        hedged: bool = False,
+    ) -> UsageRecord:
+        rec = UsageRecord(
+            provider=provider,
+            model=model,
+            agent=current_agent(),
+            phase=current_phase(),
+            tier=tier,
+            call_site=call_site,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_write_tokens=cache_write_tokens,
+            latency_s=latency_s,
+            cost_usd=estimate_cost(model, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens),
+            hedged=hedged,
+        )
+        self._records.append(rec)
+        return rec
+
+    @property
+    def records(self) -> list[UsageRecord]:
+        return list(self._records)
+
+    def rollup(self, phase: str | None = None, group_by: str = "agent") -> dict[str, dict[str, Any]]:
+        """Aggregate records (optionally for one phase) keyed by a UsageRecord field."""
+        groups: dict[str, dict[str, Any]] = {}
+        for rec in self._records:
+            if phase is not None and rec.phase != phase:
+                continue
+            key = str(getattr(rec, group_by))
+            _accumulate(groups.setdefault(key, _empty_totals()), rec)
+        for totals in groups.values():
+            _finalize(totals)
+        return groups
+
+    def totals(self, phase: str | None = None) -> dict[str, Any]:
+        totals = _empty_totals()
+        for rec in self._records:
+            if phase is None or rec.phase == phase:
+                _accumulate(totals, rec)
+        return _finalize(totals)
+
+    def summary(self) -> dict[str, Any]:
+        """JSON-serializable snapshot: overall totals plus per-phase and per-agent roll-ups."""
+        return {
+            "totals": self.totals(),
+            "by_phase": self.rollup(group_by="phase"),
+            "by_agent": self.rollup(group_by="agent"),
+            "by_tier": self.rollup(group_by="tier"),
+            "by_call_site": self.rollup(group_by="call_site"),
+            "calls": [asdict(r) for r in self._records[-50:]],
+        }
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
+    """Approximate USD cost of one call; 0.0 for models missing from MODEL_PRICES."""
+    price = next((p for prefix, p in MODEL_PRICES.items() if model.startswith(prefix)), None)
+    if price is None:
+        return 0.0
+    input_price, output_price = price
+    cost = (
+        input_tokens * input_price
+        + output_tokens * output_price
+        + cache_read_tokens * input_price * 0.1
+        + cache_write_tokens * input_price * 1.25
+    )
+    return cost / 1_000_000
+
+
+def _empty_totals() -> dict[str, Any]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_read_tokens": 0,
+        "cache_write_tokens": 0,
+        "latency_s": 0.0,
+        "max_latency_s": 0.0,
+        "cost_usd": 0.0,
+        "hedged_calls": 0,
+    }
+
+
+def _accumulate(totals: dict[str, Any], rec: UsageRecord) -> None:
+    totals["calls"] += 1
+    totals["input_tokens"] += rec.input_tokens
+    totals["output_tokens"] += rec.output_tokens
+    totals["cache_read_tokens"] += rec.cache_read_tokens
+    totals["cache_write_tokens"] += rec.cache_write_tokens
+    totals["latency_s"] += rec.latency_s
+    totals["max_latency_s"] = max(totals["max_latency_s"], rec.latency_s)
+    totals["cost_usd"] += rec.cost_usd
+    totals["hedged_calls"] += int(rec.hedged)
+
+
+def _finalize(totals: dict[str, Any]) -> dict[str, Any]:
+    totals["latency_s"] = round(totals["latency_s"], 3)
+    totals["max_latency_s"] = round(totals["max_latency_s"], 3)
+    totals["cost_usd"] = round(totals["cost_usd"], 4)
+    totals["avg_latency_s"] = round(totals["latency_s"] / totals["calls"], 3) if totals["calls"] else 0.0
+    return totals
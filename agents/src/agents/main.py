@@ -1,9 +1,12 @@
 import asyncio
 import argparse
 import logging
+import time
 
+from .cassette import RECORD, REPLAY, Cassette, CassetteComposio, CassetteConvexClient, CassetteLLM
 from .config.settings import Settings
 from .llm.factory import create_llm_providers
+from .llm.usage import UsageLedger
 from .storage.convex_client import ConvexClient
 from .integrations.google_workspace import GoogleWorkspaceClient
 from .integrations.composio_client import ComposioIntegration
@@ -15,9 +18,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main(client_id: str):
+async def main(client_id: str, usage_ledger: UsageLedger | None = None, cassette: Cassette | None = None):
     settings = Settings()
-    claude, gemini = create_llm_providers(settings)
+    usage_ledger = usage_ledger or UsageLedger()
+    if cassette is None and settings.CASSETTE_MODE:
+        cassette = Cassette(settings.CASSETTE_PATH, settings.CASSETTE_MODE, settings.CASSETTE_LATENCY_SCALE)
+    claude, gemini = create_llm_providers(settings, ledger=usage_ledger)
+    if cassette:
+        logger.info(f"Cassette {cassette.mode} mode: {cassette.path}")
+        claude = CassetteLLM(claude, cassette, "anthropic")
+        gemini = CassetteLLM(gemini, cassette, "gemini")
 
     # Initialize Composio if API key is set, otherwise fall back to Google service account
     composio: ComposioIntegration | None = None
@@ -31,17 +41,35 @@ async def main(client_id: str):
             auth_configs["googledrive"] = settings.COMPOSIO_DRIVE_AUTH_CONFIG_ID
         if settings.COMPOSIO_SHEETS_AUTH_CONFIG_ID:
             auth_configs["googlesheets"] = settings.COMPOSIO_SHEETS_AUTH_CONFIG_ID
-        composio = ComposioIntegration(settings.COMPOSIO_API_KEY, auth_config_ids=auth_configs)
+        if cassette and cassette.mode == REPLAY:
+            composio = CassetteComposio(None, cassette)
+        else:
+            composio = ComposioIntegration(
+                settings.COMPOSIO_API_KEY,
+                auth_config_ids=auth_configs,
+                max_result_chars=settings.COMPOSIO_MAX_RESULT_CHARS,
+            )
+            if cassette:
+                composio = CassetteComposio(composio, cassette)
     else:
         logger.info("Composio API key not set, using GoogleWorkspaceClient fallback")
         google = GoogleWorkspaceClient(settings.GOOGLE_CREDENTIALS_JSON)
 
-    async with ConvexClient(
-        settings.CONVEX_SITE_URL,
-        settings.CONVEX_AGENT_TOKEN,
+    convex_options = dict(
         timeout=settings.CONVEX_TIMEOUT,
         max_retries=settings.CONVEX_MAX_RETRIES,
-    ) as convex:
+        event_batch_size=settings.EVENT_BATCH_SIZE,
+        event_flush_interval_s=settings.EVENT_FLUSH_INTERVAL_S,
+        pipeline_update_interval_s=settings.PIPELINE_UPDATE_INTERVAL_S,
+    )
+    if cassette:
+        convex_client = CassetteConvexClient(
+            settings.CONVEX_SITE_URL, settings.CONVEX_AGENT_TOKEN, cassette=cassette, **convex_options
+        )
+    else:
+        convex_client = ConvexClient(settings.CONVEX_SITE_URL, settings.CONVEX_AGENT_TOKEN, **convex_options)
+
+    async with convex_client as convex:
         # Try to fetch actual data sources from Convex
         data_sources = await convex.get_data_sources(client_id)
 
@@ -64,9 +92,51 @@ async def main(client_id: str):
             composio=composio,
             composio_user_prefix=settings.COMPOSIO_USER_PREFIX,
             verify_timeout=settings.VERIFY_TIMEOUT,
+            usage_ledger=usage_ledger,
+            history_max_tokens=settings.HISTORY_MAX_TOKENS,
+            history_keep_turns=settings.HISTORY_KEEP_TURNS,
+            tool_concurrency=settings.TOOL_MAX_CONCURRENCY,
+            agent_deadline_s=settings.AGENT_DEADLINE_S,
+            agent_max_tokens=settings.AGENT_MAX_TOKENS,
+            phase_deadline_s=settings.PHASE_DEADLINE_S,
+            phase_max_tokens=settings.PHASE_MAX_TOKENS,
+            result_inline_chars=settings.TOOL_RESULT_INLINE_CHARS,
+            result_max_chars=settings.TOOL_RESULT_MAX_CHARS,
+            structurer_workers=settings.STRUCTURER_WORKERS,
+            structurer_batch_max_bytes=settings.STRUCTURER_BATCH_MAX_BYTES,
+            structurer_batch_max_tokens=settings.STRUCTURER_BATCH_MAX_TOKENS,
+            structurer_batch_max_items=settings.STRUCTURER_BATCH_MAX_ITEMS,
+            pipelined_phases=settings.PIPELINED_PHASES,
+            knowledge_writer_concurrency=settings.KNOWLEDGE_WRITER_CONCURRENCY,
+            reconciliation_concurrency=settings.RECONCILIATION_CONCURRENCY,
+            forum_replica=settings.FORUM_REPLICA,
+            forum_preload_limit=settings.FORUM_PRELOAD_LIMIT,
+            forum_flush_batch_size=settings.FORUM_FLUSH_BATCH_SIZE,
+            # Workspace paths are part of prompts, so replay needs the recorded ones
+            deterministic_workspaces=cassette is not None,
         )
 
+        started = time.perf_counter()
         await master.run(data_sources)
+        if cassette:
+            _log_cassette_report(cassette, time.perf_counter() - started)
+
+
+def _log_cassette_report(cassette: Cassette, elapsed_s: float) -> None:
+    stats = cassette.stats
+    if cassette.mode == REPLAY:
+        # Everything not spent in injected latency is the pipeline's own overhead
+        logger.info(
+            f"Replay finished in {elapsed_s:.2f}s: {stats['calls']} calls, {stats['misses']} misses, "
+            f"{cassette.unused()} unused entries, injected latency {stats['injected_latency_s']:.2f}s "
+            f"(recorded {stats['recorded_latency_s']:.2f}s), "
+            f"own overhead {elapsed_s - stats['injected_latency_s']:.2f}s"
+        )
+    else:
+        logger.info(
+            f"Recorded {stats['calls']} calls in {elapsed_s:.2f}s "
+            f"({stats['recorded_latency_s']:.2f}s spent waiting on external services)"
+        )
 
 
 def cli():
@@ -74,9 +144,22 @@ def cli():
     parser.add_argument(
         "--client-id", required=True, help="Convex client document ID"
     )
+    parser.add_argument("--record", metavar="PATH", help="Record external traffic to a cassette file")
+    parser.add_argument("--replay", metavar="PATH", help="Replay external traffic from a cassette file")
+    parser.add_argument(
+        "--latency-scale", type=float, default=0.0,
+        help="In replay, sleep this multiple of each recorded call latency (default: 0)",
+    )
     args = parser.parse_args()
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
 
-    asyncio.run(main(args.client_id))
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, RECORD)
+    elif args.replay:
+        cassette = Cassette(args.replay, REPLAY, latency_scale=args.latency_scale)
+    asyncio.run(main(args.client_id, cassette=cassette))
 
 
 if __name__ == "__main__":
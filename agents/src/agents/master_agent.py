@@ -2,19 +2,32 @@ import asyncio
 import json
 import logging
 import os
+import re
+from typing import Callable
 
 from .llm.adapters import AnthropicAdapter, GeminiAdapter
-from .tools.definitions import MASTER_TOOLS, EXPLORER_TOOLS, STRUCTURER_TOOLS, SANDBOX_TOOLS, get_tool_schema, ToolCall
+from .llm.budget import AgentBudget, BudgetExceeded
+from .llm.compaction import HistoryCompactor
+from .llm.hedging import hedged_requests
+from .llm.router import llm_call_site
+from .llm.usage import UsageLedger, run_in_scope, usage_scope
+from .tools.definitions import (
+    MASTER_TOOLS, EXPLORER_TOOLS, STRUCTURER_TOOLS, SANDBOX_TOOLS, get_tool_schema, ToolCall, terminal_tool_succeeded,
+)
 from .tools.executor import ToolExecutor
 from .tools.hybrid_executor import HybridToolExecutor
 from .storage.convex_client import ConvexClient
-from .storage.context import PipelineState
+from .storage.blocking import block_findings
+from .storage.context import PipelineState, SubAgentReport
+from .storage.facts import Fact, FactStore
+from .storage.forum_replica import ForumReplica
 from .sub_agents.explorer import ExplorerAgent
 from .sub_agents.structurer import StructurerAgent
+from .sub_agents.structurer_pool import StructurerPool
 from .sub_agents.knowledge_writer import KnowledgeWriterAgent
 from .integrations.google_workspace import GoogleWorkspaceClient
 from .integrations.composio_client import ComposioIntegration
-from .sandbox import SandboxFileManager, CommandExecutor
+from .sandbox import SandboxFileManager, CommandExecutor, ResultStore
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +43,27 @@ class MasterAgent:
         composio: ComposioIntegration | None = None,
         composio_user_prefix: str = "hackeurope26",
         verify_timeout: int = 300,
+        usage_ledger: UsageLedger | None = None,
+        history_max_tokens: int = 60_000,
+        history_keep_turns: int = 4,
+        tool_concurrency: int = 4,
+        agent_deadline_s: int = 900,
+        agent_max_tokens: int = 0,
+        phase_deadline_s: int = 2700,
+        phase_max_tokens: int = 0,
+        result_inline_chars: int = 8000,
+        result_max_chars: int = 5_000_000,
+        structurer_workers: int = 3,
+        structurer_batch_max_bytes: int = 20_000_000,
+        structurer_batch_max_tokens: int = 60_000,
+        structurer_batch_max_items: int = 10,
+        pipelined_phases: bool = False,
+        knowledge_writer_concurrency: int = 4,
+        reconciliation_concurrency: int = 4,
+        forum_replica: bool = True,
+        forum_preload_limit: int = 200,
+        forum_flush_batch_size: int = 20,
+        deterministic_workspaces: bool = False,
     ):
         self.claude = claude
         self.gemini = gemini
@@ -39,23 +73,81 @@ class MasterAgent:
         self.composio = composio
         self.composio_user_id = f"{composio_user_prefix}_{client_id}" if composio else ""
         self.state = PipelineState(client_id=client_id)
+        self.facts = FactStore()
         self.max_turns = 20
         self.verify_timeout = verify_timeout
-        self.file_manager = SandboxFileManager()
+        self.usage_ledger = usage_ledger
+        self.history_max_tokens = history_max_tokens
+        self.history_keep_turns = history_keep_turns
+        self.tool_concurrency = tool_concurrency
+        self.agent_deadline_s = agent_deadline_s
+        self.agent_max_tokens = agent_max_tokens
+        self.phase_deadline_s = phase_deadline_s
+        self.phase_max_tokens = phase_max_tokens
+        self._phase_budget = AgentBudget("pipeline")
+        self.result_inline_chars = result_inline_chars
+        self.result_max_chars = result_max_chars
+        self.structurer_workers = structurer_workers
+        self.structurer_batch_max_bytes = structurer_batch_max_bytes
+        self.structurer_batch_max_tokens = structurer_batch_max_tokens
+        self.structurer_batch_max_items = structurer_batch_max_items
+        self.pipelined_phases = pipelined_phases
+        self.knowledge_writer_concurrency = knowledge_writer_concurrency
+        self.reconciliation_concurrency = reconciliation_concurrency
+        # Local forum index shared by all agents of this run (None: every call goes to Convex)
+        self.forum = (
+            ForumReplica(convex, flush_batch_size=forum_flush_batch_size, preload_limit=forum_preload_limit)
+            if forum_replica
+            else None
+        )
+        self._structure_progress: dict | None = None
+        self._structurer_pool: StructurerPool | None = None
+        self.file_manager = SandboxFileManager(deterministic_names=deterministic_workspaces)
         self.command_executor = CommandExecutor()
 
+    def _new_compactor(self) -> HistoryCompactor:
+        """Fresh history compactor for one agent loop (compactors are per-conversation)."""
+        return HistoryCompactor(
+            max_tokens=self.history_max_tokens, keep_recent_turns=self.history_keep_turns
+        )
+
+    def _new_phase_budget(self, phase: str, start: bool = True) -> AgentBudget:
+        """Budget shared by the master and every sub-agent of one phase (0 means unlimited)."""
+        return AgentBudget(
+            phase, deadline_s=self.phase_deadline_s, max_tokens=self.phase_max_tokens, start=start
+        )
+
+    def _start_phase_budget(self, phase: str) -> AgentBudget:
+        self._phase_budget = self._new_phase_budget(phase)
+        return self._phase_budget
+
+    def _new_agent_budget(self, agent_name: str, parent: AgentBudget | None = None) -> AgentBudget:
+        return AgentBudget(
+            agent_name,
+            deadline_s=self.agent_deadline_s,
+            max_tokens=self.agent_max_tokens,
+            parent=parent or self._phase_budget,
+        )
+
     # ── Sandbox tool registration (workspace-isolated closures) ────
 
-    def _register_sandbox_tools(self, executor: ToolExecutor, workspace_path: str) -> None:
+    def _new_result_store(self, workspace_path: str) -> ResultStore:
+        return ResultStore(
+            workspace_path, inline_chars=self.result_inline_chars, max_chars=self.result_max_chars
+        )
+
+    def _register_sandbox_tools(
+        self, executor: ToolExecutor, workspace_path: str, results: ResultStore
+    ) -> None:
         """Register sandbox tools as closures that capture a specific workspace path."""
         file_manager = self.file_manager
         command_executor = self.command_executor
         google = self.google
 
         async def download_file(file_id: str, filename: str | None = None) -> str:
-            file_bytes = google.read_drive_file(file_id)
+            file_bytes = await asyncio.to_thread(google.read_drive_file, file_id)
             if not filename:
-                files = google.list_drive_files()
+                files = await asyncio.to_thread(google.list_drive_files)
                 filename = file_id
                 for f in files:
                     if f.get("id") == file_id:
@@ -79,6 +171,8 @@ class MasterAgent:
                 if result["return_code"] == -1:
                     raise RuntimeError(f"Command blocked by sandbox: {result['stderr']}")
                 output = f"[exit code {result['return_code']}] {output}"
+            if results.enabled:
+                return results.spill("run_command", output.strip()) or "(no output)"
             if len(output) > 10000:
                 output = output[:10000] + "\n... (truncated)"
             return output.strip() or "(no output)"
@@ -97,6 +191,9 @@ class MasterAgent:
                 return "Workspace is empty."
             return json.dumps(files, indent=2)
 
+        async def read_result(handle: str, offset: int = 0, length: int = 8000, json_path: str = "") -> str:
+            return results.read(handle, offset, length, json_path)
+
         async def install_package(package: str) -> str:
             result = await command_executor.run_command(
                 f"uv pip install --system {package}", workspace_path, timeout=120,
@@ -111,6 +208,7 @@ class MasterAgent:
         executor.register("read_local_file", read_local_file)
         executor.register("list_workspace", list_workspace)
         executor.register("install_package", install_package)
+        executor.register("read_result", read_result)
 
     def _make_extract_content(self, workspace_path: str):
         """Factory returning a closure for the structurer's extract_content tool."""
@@ -130,8 +228,8 @@ class MasterAgent:
                     break
 
             if file_bytes is None:
-                file_bytes = google.read_drive_file(file_id)
-                files = google.list_drive_files()
+                file_bytes = await asyncio.to_thread(google.read_drive_file, file_id)
+                files = await asyncio.to_thread(google.list_drive_files)
                 for f in files:
                     if f.get("id") == file_id:
                         mime_type = f.get("mimeType", "application/pdf")
@@ -154,11 +252,13 @@ class MasterAgent:
         executor.register("check_forum", self._tool_check_forum)
         executor.register("write_to_forum", self._tool_write_forum)
         # Sandbox tools — isolated to this workspace
-        self._register_sandbox_tools(executor, workspace_path)
+        results = self._new_result_store(workspace_path)
+        self._register_sandbox_tools(executor, workspace_path, results)
         return HybridToolExecutor(
             custom_executor=executor,
             composio=self.composio,
             composio_user_id=self.composio_user_id,
+            result_store=results,
         )
 
     def _get_explorer_tools(self, executor: HybridToolExecutor, source_type: str) -> list[dict]:
@@ -181,17 +281,17 @@ class MasterAgent:
         self, query: str = "", max_results: int = 20
     ) -> str:
         # Let exceptions propagate — ToolExecutor catches them and sets is_error=True
-        messages = self.google.list_gmail_messages(query, max_results)
+        messages = await asyncio.to_thread(self.google.list_gmail_messages, query, max_results)
         return json.dumps(messages, indent=2)
 
     async def _tool_list_drive(
         self, folder_id: str | None = None, mime_type: str | None = None
     ) -> str:
-        files = self.google.list_drive_files(folder_id, mime_type)
+        files = await asyncio.to_thread(self.google.list_drive_files, folder_id, mime_type)
         return json.dumps(files, indent=2)
 
     async def _tool_read_sheet(self, spreadsheet_id: str, range: str) -> str:
-        data = self.google.read_sheet(spreadsheet_id, range)
+        data = await asyncio.to_thread(self.google.read_sheet, spreadsheet_id, range)
         return json.dumps(data, indent=2)
 
     async def _tool_check_forum(
@@ -201,9 +301,14 @@ class MasterAgent:
         phase: str | None = None,
         file_type: str | None = None,
     ) -> str:
-        results = await self.convex.search_forum(
-            query, source_type=source_type, phase=phase, file_type=file_type
-        )
+        if self.forum is not None:
+            results = await self.forum.search(
+                query, source_type=source_type, phase=phase, file_type=file_type
+            )
+        else:
+            results = await self.convex.search_forum(
+                query, source_type=source_type, phase=phase, file_type=file_type
+            )
         return json.dumps(results, indent=2) if results else "No forum entries found."
 
     async def _tool_write_forum(
@@ -216,10 +321,40 @@ class MasterAgent:
         phase: str | None = None,
         file_type: str | None = None,
     ) -> str:
-        await self.convex.create_forum_entry(
-            title, category, content, "explorer", tags or [],
+        return await self._create_forum_entry(
+            "explorer", title, category, content, tags,
             source_type=source_type, phase=phase, file_type=file_type,
         )
+
+    async def _create_forum_entry(
+        self,
+        author_agent: str,
+        title: str,
+        category: str,
+        content: str,
+        tags: list[str] | None,
+        source_type: str | None = None,
+        phase: str | None = None,
+        file_type: str | None = None,
+    ) -> str:
+        if self.forum is None:
+            await self.convex.create_forum_entry(
+                title, category, content, author_agent, tags or [],
+                source_type=source_type, phase=phase, file_type=file_type,
+            )
+            return "Forum entry created."
+        entry = {
+            "title": title,
+            "category": category,
+            "content": content,
+            "authorAgent": author_agent,
+            "tags": tags or [],
+        }
+        for field, value in (("sourceType", source_type), ("phase", phase), ("fileType", file_type)):
+            if value is not None:
+                entry[field] = value
+        if not await self.forum.write(entry):
+            return "A forum entry with the same content already exists."
         return "Forum entry created."
 
     # ── Structurer tool executor ────────────────────────────────────
@@ -231,15 +366,18 @@ class MasterAgent:
             executor.register("extract_content", self._make_extract_content(workspace_path))
         executor.register("classify_relevance", self._tool_classify_relevance)
         executor.register("add_contradiction", self._tool_add_contradiction)
+        executor.register("record_fact", self._tool_record_fact)
         executor.register("message_master", self._tool_message_master)
         executor.register("check_forum", self._tool_check_forum)
         executor.register("write_to_forum", self._tool_write_forum_structurer)
         # Sandbox tools — isolated to this workspace
-        self._register_sandbox_tools(executor, workspace_path)
+        results = self._new_result_store(workspace_path)
+        self._register_sandbox_tools(executor, workspace_path, results)
         return HybridToolExecutor(
             custom_executor=executor,
             composio=self.composio,
             composio_user_id=self.composio_user_id,
+            result_store=results,
         )
 
     def _get_structurer_tools(
@@ -284,10 +422,11 @@ class MasterAgent:
             f'- "key_facts": array of key facts extracted\n'
             f'- "reasoning": brief explanation of relevance rating'
         )
-        result = await self.claude.complete(
-            prompt,
-            system="You are a business data classifier. Respond only with valid JSON."
-        )
+        with llm_call_site("classify_relevance"):
+            result = await self.claude.complete(
+                prompt,
+                system="You are a business data classifier. Respond only with valid JSON."
+            )
         return result
 
     async def _tool_add_contradiction(
@@ -314,6 +453,33 @@ class MasterAgent:
         )
         return "Contradiction recorded."
 
+    async def _tool_record_fact(
+        self,
+        entity: str,
+        attribute: str,
+        value: str,
+        source: str,
+        timestamp: str = "",
+    ) -> str:
+        fact = Fact(entity=entity, attribute=attribute, value=value, source=source, timestamp=timestamp)
+        conflicts = self.facts.add(fact)
+        for earlier in conflicts:
+            logger.info(f"Fact conflict on {entity}/{attribute}: {earlier.value!r} vs {value!r}")
+            await self._tool_add_contradiction(
+                description=f"Conflicting {attribute} for {entity}",
+                source_a=earlier.source,
+                source_b=source,
+                value_a=earlier.value,
+                value_b=value,
+            )
+        if not conflicts:
+            return "Fact recorded."
+        return (
+            "Fact recorded. It conflicts with "
+            + ", ".join(f"{f.value!r} from {f.source}" for f in conflicts)
+            + " — contradiction recorded automatically, no need to call add_contradiction for it."
+        )
+
     async def _tool_message_master(self, message: str) -> str:
         logger.info(f"Sub-agent message to master: {message}")
         await self.convex.emit_event(
@@ -334,11 +500,10 @@ class MasterAgent:
         phase: str | None = None,
         file_type: str | None = None,
     ) -> str:
-        await self.convex.create_forum_entry(
-            title, category, content, "structurer", tags or [],
+        return await self._create_forum_entry(
+            "structurer", title, category, content, tags,
             source_type=source_type, phase=phase, file_type=file_type,
         )
-        return "Forum entry created."
 
 
     # ── Knowledge writer tool executor ──────────────────────────────
@@ -346,6 +511,7 @@ class MasterAgent:
     def _build_knowledge_writer_executor(self) -> ToolExecutor:
         executor = ToolExecutor()
         executor.register("write_knowledge_entry", self._tool_write_knowledge_entry)
+        executor.register("write_knowledge_entries", self._tool_write_knowledge_entries)
         executor.register("flag_contradiction", self._tool_flag_contradiction)
         return executor
 
@@ -369,6 +535,30 @@ class MasterAgent:
         entry_id = result.get("id", "unknown") if result else "unknown"
         return f"Knowledge entry created: {entry_id}"
 
+    async def _tool_write_knowledge_entries(self, entries: list[dict]) -> str:
+        invalid = {
+            i for i, e in enumerate(entries)
+            if not isinstance(e, dict) or not all(k in e for k in ("tree_node_id", "title", "content", "confidence"))
+        }
+        valid = [e for i, e in enumerate(entries) if i not in invalid]
+        results = iter(await self.convex.create_knowledge_entries(self.client_id, valid))
+        lines, created = [], 0
+        for i, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                lines.append(f"[{i}]: error: each entry must be an object, got {type(entry).__name__}")
+                continue
+            label = f"[{i}] {entry.get('title', 'untitled')}"
+            if i in invalid:
+                lines.append(f"{label}: error: needs tree_node_id, title, content and confidence")
+                continue
+            result = next(results)
+            if result.get("error") or not result.get("id"):
+                lines.append(f"{label}: error: {result.get('error') or 'no id returned'}")
+            else:
+                created += 1
+                lines.append(f"{label}: created {result['id']}")
+        return f"{created}/{len(entries)} knowledge entries created:\n" + "\n".join(lines)
+
     async def _tool_flag_contradiction(
         self,
         description: str,
@@ -395,8 +585,17 @@ class MasterAgent:
     #  Phase 1: Explore
     # ══════════════════════════════════════════════════════════════════
 
-    async def run_explore_phase(self, data_sources: list[dict]):
-        """Run the explore phase: spawn explorer agents per data source."""
+    async def run_explore_phase(
+        self,
+        data_sources: list[dict],
+        on_report: Callable[[SubAgentReport], None] | None = None,
+    ):
+        """Run the explore phase: spawn explorer agents per data source.
+
+        on_report, if given, is called with each explorer's report as soon as
+        that explorer finishes, before the others are done.
+        """
+        self._start_phase_budget("explore")
         await self.convex.update_pipeline(self.client_id, "explore", 0, ["master"])
         await self.convex.emit_event(
             self.client_id,
@@ -426,6 +625,9 @@ class MasterAgent:
                 tool_names=[t["name"] for t in tools],
                 auth_mode=auth_mode,
                 workspace_path=ws,
+                compactor=self._new_compactor(),
+                tool_concurrency=self.tool_concurrency,
+                budget=self._new_agent_budget(f"explorer-{ds['type']}"),
             )
             explorers.append(agent)
 
@@ -435,8 +637,15 @@ class MasterAgent:
             self.client_id, "explore", 10, ["master"] + active_agents
         )
 
+        async def explore(explorer: ExplorerAgent) -> SubAgentReport:
+            report = await run_in_scope(explorer.run(), agent=f"explorer-{explorer.source_type}")
+            if on_report is not None:
+                on_report(report)
+            return report
+
         reports = await asyncio.gather(
-            *[e.run() for e in explorers], return_exceptions=True
+            *[explore(e) for e in explorers],
+            return_exceptions=True,
         )
 
         # Clean up per-explorer workspaces
@@ -447,6 +656,13 @@ class MasterAgent:
             if isinstance(report, Exception):
                 logger.error(f"Explorer failed: {report}")
                 continue
+            if report.partial:
+                await self.convex.emit_event(
+                    self.client_id,
+                    "master",
+                    "warning",
+                    f"{report.agent_name} ran out of budget; using its partial results",
+                )
             self.state.add_report(report)
             await self.convex.upsert_exploration(
                 self.client_id,
@@ -473,29 +689,74 @@ class MasterAgent:
     #  Phase 2: Structure
     # ══════════════════════════════════════════════════════════════════
 
-    async def run_structure_phase(self):
-        """Run the structure phase: design knowledge tree and process files."""
+    async def run_structure_phase(self, structuring: "asyncio.Task[list[SubAgentReport]] | None" = None):
+        """Run the structure phase: design knowledge tree and process files.
+
+        Tree design and the structurers run concurrently (the structurers never
+        read the tree). In pipelined mode structuring is the already-running
+        structurer pool, fed by the explorers.
+        """
+        if structuring is None:
+            self._start_phase_budget("structure")
         await self.convex.update_pipeline(
             self.client_id, "structure", 0, ["master"]
         )
         await self.convex.emit_event(
             self.client_id, "master", "info", "Starting structure phase"
         )
+        self._structure_progress = {"tree_done": False, "structuring_done": False}
+
+        # Step 1: Spawn structurer sub-agents to process discovered files
+        if structuring is None:
+            structuring = self._start_structuring()
+        await self._report_structure_progress()
+
+        # Step 2: Meanwhile, use Claude to design the knowledge tree based on explorer reports
+        try:
+            tree_nodes_created, structurer_reports = await asyncio.gather(
+                self._design_knowledge_tree(), self._finish_structuring(structuring)
+            )
+        except BaseException:
+            if structuring is not None:
+                structuring.cancel()
+            raise
+
+        if structurer_reports:
+            all_structurer_findings = []
+            for batch, report in enumerate(structurer_reports, start=1):
+                self.state.add_report(report)
+                # Collect contradictions from structurer reports
+                for contradiction in report.contradictions:
+                    if contradiction not in self.state.open_contradictions:
+                        self.state.open_contradictions.append(contradiction)
+                # Accumulate findings for cross-batch reconciliation
+                all_structurer_findings.extend(
+                    (f"batch {batch} ({report.source_type})", str(f)) for f in report.findings
+                )
+
+            # Cross-batch reconciliation: Claude checks the findings that could contradict
+            if all_structurer_findings:
+                await self._run_cross_batch_reconciliation(all_structurer_findings)
+
+        await self.convex.update_pipeline(
+            self.client_id, "structure", 100, ["master"]
+        )
+        await self.convex.emit_event(
+            self.client_id,
+            "master",
+            "complete",
+            f"Structure phase complete. {len(tree_nodes_created)} tree nodes, "
+            f"{len(self.state.open_contradictions)} contradictions found.",
+        )
 
-        # Step 1: Use Claude to design the knowledge tree based on explorer reports
+    async def _design_knowledge_tree(self) -> list[dict]:
+        """Agentic loop in which Claude defines the knowledge tree from the explorer reports."""
         state_summary = self.state.get_summary()
         reports_detail = ""
-        all_file_refs = []
         for report in self.state.sub_agent_reports:
             reports_detail += f"\n--- {report.agent_name} ({report.source_type}) ---\n"
             reports_detail += f"Metrics: {json.dumps(report.metrics, indent=2, default=str)}\n"
             reports_detail += f"Findings: {json.dumps(report.findings, indent=2, default=str)}\n"
-            # Collect file references from metrics for structurer sub-agents
-            if isinstance(report.metrics, dict):
-                # Explorer reports may include file lists in metrics
-                for key in ("files", "file_list", "discovered_files"):
-                    if key in report.metrics and isinstance(report.metrics[key], list):
-                        all_file_refs.extend(report.metrics[key])
 
         system = (
             "You are the master orchestration agent for building a company knowledge base.\n"
@@ -523,16 +784,19 @@ class MasterAgent:
         tree_tool_def = next(t for t in MASTER_TOOLS if t.name == "define_knowledge_tree")
         tools = [get_tool_schema(tree_tool_def)]
 
-        await self.convex.update_pipeline(
-            self.client_id, "structure", 20, ["master"]
-        )
-
         # Agentic loop for tree design
         tree_nodes_created = []
+        compactor = self._new_compactor()
         for turn in range(self.max_turns):
-            text, tool_calls_raw = await self.claude.complete_with_tools_messages(
-                messages, tools, system
-            )
+            try:
+                async with self._phase_budget.limit():
+                    with llm_call_site("tree_design"), hedged_requests():
+                        text, tool_calls_raw = await self.claude.complete_with_tools_messages(
+                            compactor.compact(messages), tools, system
+                        )
+            except BudgetExceeded as e:
+                logger.warning(f"Tree design stopped early: {e}")
+                break
 
             if not tool_calls_raw:
                 break
@@ -596,6 +860,7 @@ class MasterAgent:
                             "type": "tool_result",
                             "tool_use_id": call.id,
                             "content": f"Knowledge tree created with {len(nodes)} nodes: {json.dumps([n['name'] for n in nodes])}",
+                            "is_error": not nodes,
                         }
                     )
                 else:
@@ -610,117 +875,198 @@ class MasterAgent:
 
             messages.append({"role": "user", "content": tool_results})
 
-        await self.convex.update_pipeline(
-            self.client_id, "structure", 50, ["master", "structurer"]
-        )
-
-        # Step 2: Spawn structurer sub-agents to process discovered files
-        # If no file refs were collected from metrics, create a default list
-        # based on what the explorers found
-        if not all_file_refs:
-            # Build file refs from report findings as a fallback
-            for report in self.state.sub_agent_reports:
-                all_file_refs.append(
-                    {
-                        "source_type": report.source_type,
-                        "agent_name": report.agent_name,
-                        "findings": report.findings,
-                        "metrics": report.metrics,
-                    }
-                )
+            # define_knowledge_tree is terminal: stop once the tree exists
+            if terminal_tool_succeeded(tool_calls_raw, tool_results):
+                break
 
-        if all_file_refs:
-            # Split files into batches for parallel processing
-            batch_size = max(1, len(all_file_refs) // 3)
-            batches = [
-                all_file_refs[i : i + batch_size]
-                for i in range(0, len(all_file_refs), batch_size)
-            ]
+        self._structure_progress["tree_done"] = True
+        await self._report_structure_progress()
+        return tree_nodes_created
 
-            # Determine source types for scoping Composio tools
-            source_types = list({r.source_type for r in self.state.sub_agent_reports})
-
-            structurers = []
-            structurer_workspaces = []
-            for i, batch in enumerate(batches):
-                ws = self.file_manager.create_workspace(f"{self.client_id}_structurer_{i}")
-                structurer_workspaces.append(ws)
-                structurer_executor = self._build_structurer_executor(ws)
-                structurer_tools = self._get_structurer_tools(structurer_executor, source_types)
-                agent = StructurerAgent(
-                    claude=self.claude,
-                    gemini=self.gemini,
-                    executor=structurer_executor,
-                    convex=self.convex,
-                    client_id=self.client_id,
-                    file_refs=batch,
-                    tools=structurer_tools,
-                )
-                structurers.append(agent)
-
-            structurer_reports = await asyncio.gather(
-                *[s.run() for s in structurers], return_exceptions=True
-            )
+    def _start_structuring(self) -> "asyncio.Task[list[SubAgentReport]] | None":
+        """Queue the files of every explorer report and start the structurer pool."""
+        all_file_refs = [
+            ref for report in self.state.sub_agent_reports for ref in self._file_refs(report)
+        ]
+        # If no file refs were collected from metrics, fall back to what the explorers found
+        if not all_file_refs:
+            all_file_refs = self._fallback_file_refs()
+        if not all_file_refs:
+            return None
+
+        # Determine source types for scoping Composio tools
+        source_types = list(dict.fromkeys(r.source_type for r in self.state.sub_agent_reports))
+
+        # Shared work queue: structurer workers pull size-bounded batches until it drains
+        pool, structurer_workspaces = self._new_structurer_pool(source_types)
+        pool.submit(all_file_refs)
+        pool.close()
+        return asyncio.create_task(self._run_structurer_pool(pool, structurer_workspaces))
+
+    async def _finish_structuring(
+        self, structuring: "asyncio.Task[list[SubAgentReport]] | None"
+    ) -> list[SubAgentReport]:
+        try:
+            return await structuring if structuring is not None else []
+        finally:
+            self._structure_progress["structuring_done"] = True
+            await self._report_structure_progress()
+
+    async def _on_structurer_progress(self, completed: int, submitted: int) -> None:
+        # In pipelined mode structurers finish batches before the structure phase has started
+        if self._structure_progress is not None:
+            await self._report_structure_progress()
+
+    async def _report_structure_progress(self) -> None:
+        """update_pipeline for the structure phase, combining tree design and file structuring."""
+        progress = self._structure_progress
+        pool = self._structurer_pool
+        if progress["structuring_done"]:
+            files_done = 1.0
+        elif pool is not None and pool.submitted:
+            files_done = pool.completed / pool.submitted
+        else:
+            files_done = 0.0
+        # Tree design is one conversation; files dominate the phase, leave 100 for the end
+        percent = int(95 * (0.25 * progress["tree_done"] + 0.75 * files_done))
+        active_agents = ["master"]
+        if not progress["structuring_done"]:
+            active_agents.append("structurer")
+        await self.convex.update_pipeline(self.client_id, "structure", max(percent, 5), active_agents)
+
+    @staticmethod
+    def _file_refs(report: SubAgentReport) -> list[dict]:
+        """File references an explorer listed in its metrics, for the structurers."""
+        refs = []
+        if isinstance(report.metrics, dict):
+            for key in ("files", "file_list", "discovered_files"):
+                if key in report.metrics and isinstance(report.metrics[key], list):
+                    refs.extend(report.metrics[key])
+        return refs
+
+    def _fallback_file_refs(self) -> list[dict]:
+        """One ref per explorer report, for when no explorer listed individual files."""
+        return [
+            {
+                "source_type": report.source_type,
+                "agent_name": report.agent_name,
+                "findings": report.findings,
+                "metrics": report.metrics,
+            }
+            for report in self.state.sub_agent_reports
+        ]
 
-            # Clean up per-structurer workspaces
-            for ws in structurer_workspaces:
+    async def _run_structurer_pool(
+        self, pool: StructurerPool, workspaces: list[str]
+    ) -> list[SubAgentReport]:
+        try:
+            return await pool.run()
+        finally:
+            # Clean up per-worker workspaces
+            for ws in workspaces:
                 self.file_manager.cleanup(ws)
 
-            all_structurer_findings = []
-            for report in structurer_reports:
-                if isinstance(report, Exception):
-                    logger.error(f"Structurer failed: {report}")
-                    continue
-                self.state.add_report(report)
-                # Collect contradictions from structurer reports
-                for contradiction in report.contradictions:
-                    if contradiction not in self.state.open_contradictions:
-                        self.state.open_contradictions.append(contradiction)
-                # Accumulate findings for cross-batch reconciliation
-                all_structurer_findings.append(
-                    f"=== Batch ({report.source_type}) ===\n"
-                    + "\n".join(f"- {f}" for f in report.findings)
-                )
+    def _new_structurer_pool(
+        self, source_types: list[str], phase_budget: AgentBudget | None = None
+    ) -> tuple[StructurerPool, list[str]]:
+        """Structurer pool whose workers each keep one workspace/executor across batches.
+
+        Returns the pool and the list that collects worker workspaces (for cleanup).
+        """
+        phase_budget = phase_budget or self._phase_budget
+        workers: dict[int, tuple[HybridToolExecutor, list[dict]]] = {}
+        workspaces: list[str] = []
+
+        async def run_batch(worker_id: int, batch: list[dict]) -> SubAgentReport:
+            if worker_id not in workers:
+                ws = self.file_manager.create_workspace(f"{self.client_id}_structurer_{worker_id}")
+                workspaces.append(ws)
+                executor = self._build_structurer_executor(ws)
+                workers[worker_id] = (executor, self._get_structurer_tools(executor, source_types))
+            executor, tools = workers[worker_id]
+            agent = StructurerAgent(
+                claude=self.claude,
+                gemini=self.gemini,
+                executor=executor,
+                convex=self.convex,
+                client_id=self.client_id,
+                file_refs=batch,
+                tools=tools,
+                compactor=self._new_compactor(),
+                tool_concurrency=self.tool_concurrency,
+                budget=self._new_agent_budget(f"structurer-{worker_id}", parent=phase_budget),
+            )
+            return await run_in_scope(agent.run(), agent="structurer")
+
+        pool = StructurerPool(
+            run_batch,
+            workers=self.structurer_workers,
+            on_progress=self._on_structurer_progress,
+            batch_max_bytes=self.structurer_batch_max_bytes,
+            batch_max_tokens=self.structurer_batch_max_tokens,
+            batch_max_items=self.structurer_batch_max_items,
+        )
+        self._structurer_pool = pool
+        return pool, workspaces
 
-            # Cross-batch reconciliation: dedicated Claude call to find contradictions
-            if all_structurer_findings:
-                await self._run_cross_batch_reconciliation(
-                    "\n\n".join(all_structurer_findings)
-                )
+    async def _run_cross_batch_reconciliation(self, findings: list[tuple[str, str]]):
+        """Find contradictions across structurer batches.
 
-        await self.convex.update_pipeline(
-            self.client_id, "structure", 100, ["master"]
+        findings are (batch label, finding) pairs. A local blocking pass groups
+        them by shared invoice/document numbers and entity names and keeps only
+        groups whose amounts, dates or statuses disagree; Claude then checks
+        each such group, several at once.
+        """
+        await self.convex.emit_event(
+            self.client_id, "master", "info",
+            "Running cross-batch reconciliation to detect contradictions...",
         )
+
+        groups, stats = block_findings(findings)
+        logger.info(f"Reconciliation blocking: {json.dumps(stats)}")
         await self.convex.emit_event(
-            self.client_id,
-            "master",
-            "complete",
-            f"Structure phase complete. {len(tree_nodes_created)} tree nodes, "
-            f"{len(self.state.open_contradictions)} contradictions found.",
+            self.client_id, "master", "progress",
+            f"Reconciliation: {stats['findings']} findings, {stats['blocks']} shared keys, "
+            f"{len(groups)} groups with conflicting values to check",
+            metadata=stats,
         )
 
-    async def _run_cross_batch_reconciliation(self, all_findings: str):
-        """Dedicated Claude call to find contradictions across structurer batches."""
+        semaphore = asyncio.Semaphore(max(1, self.reconciliation_concurrency))
+        recorded: set[tuple[str, ...]] = set()  # contradictions already added by any group
+
+        async def check(group_text: str):
+            async with semaphore:
+                await self._reconcile_group(group_text, recorded)
+
+        results = await asyncio.gather(*[check(g.render()) for g in groups], return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Reconciliation group failed: {result}")
+
         await self.convex.emit_event(
             self.client_id, "master", "info",
-            "Running cross-batch reconciliation to detect contradictions...",
+            f"Cross-batch reconciliation complete. {len(self.state.open_contradictions)} total contradictions.",
         )
 
+    async def _reconcile_group(self, group_text: str, recorded: set[tuple[str, ...]]):
+        """Short Claude conversation deciding which conflicts in one candidate group are contradictions."""
         contradiction_tool_def = next(
             t for t in STRUCTURER_TOOLS if t.name == "add_contradiction"
         )
         tools = [get_tool_schema(contradiction_tool_def)]
 
         system = (
-            "You are a contradiction detector. You will receive findings from multiple structurer batches "
-            "that each processed different sets of business documents.\n\n"
-            "Your ONLY job is to find contradictions BETWEEN these batches.\n"
+            "You are a contradiction detector. You will receive a group of findings from structurer batches "
+            "that each processed different sets of business documents. The findings in a group mention "
+            "the same invoice, document or entity and disagree on at least one amount, date or status.\n\n"
+            "Your ONLY job is to decide which of these disagreements are real contradictions.\n"
             "Look for:\n"
             "- Numeric discrepancies (different amounts for the same invoice/transaction)\n"
             "- Status conflicts (paid vs pending, active vs closed)\n"
             "- Version conflicts (draft vs final with different content)\n"
             "- Date mismatches (different dates for the same event)\n"
             "- Entity mismatches (different names/addresses for the same entity)\n\n"
+            "Findings that merely mention the same entity in unrelated contexts do not contradict.\n"
             "For EACH contradiction found, call add_contradiction with specific details.\n"
             "If you find no contradictions, simply state that and stop."
         )
@@ -729,17 +1075,24 @@ class MasterAgent:
             {
                 "role": "user",
                 "content": (
-                    f"Compare these findings from different structurer batches and report any contradictions.\n\n"
-                    f"{all_findings[:15000]}"
+                    f"Check these findings for contradictions.\n\n"
+                    f"{group_text[:15000]}"
                 ),
             }
         ]
 
         max_reconciliation_turns = 5
+        compactor = self._new_compactor()
         for turn in range(max_reconciliation_turns):
-            text, tool_calls_raw = await self.claude.complete_with_tools_messages(
-                messages, tools, system
-            )
+            try:
+                async with self._phase_budget.limit():
+                    with llm_call_site("reconciliation"), hedged_requests():
+                        text, tool_calls_raw = await self.claude.complete_with_tools_messages(
+                            compactor.compact(messages), tools, system
+                        )
+            except BudgetExceeded as e:
+                logger.warning(f"Reconciliation stopped early: {e}")
+                break
 
             if not tool_calls_raw:
                 break
@@ -762,13 +1115,21 @@ class MasterAgent:
             for tc in tool_calls_raw:
                 call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
                 if call.name == "add_contradiction":
-                    result = await self._tool_add_contradiction(
-                        description=call.input.get("description", ""),
-                        source_a=call.input.get("source_a", ""),
-                        source_b=call.input.get("source_b", ""),
-                        value_a=call.input.get("value_a", ""),
-                        value_b=call.input.get("value_b", ""),
+                    key = tuple(
+                        str(call.input.get(k, "")).strip().lower()
+                        for k in ("source_a", "source_b", "value_a", "value_b")
                     )
+                    if key in recorded:
+                        result = "Contradiction already recorded."
+                    else:
+                        recorded.add(key)
+                        result = await self._tool_add_contradiction(
+                            description=call.input.get("description", ""),
+                            source_a=call.input.get("source_a", ""),
+                            source_b=call.input.get("source_b", ""),
+                            value_a=call.input.get("value_a", ""),
+                            value_b=call.input.get("value_b", ""),
+                        )
                     logger.info(f"Cross-batch contradiction: {call.input.get('description', '')}")
                     tool_results.append(
                         {
@@ -788,17 +1149,13 @@ class MasterAgent:
                     )
             messages.append({"role": "user", "content": tool_results})
 
-        await self.convex.emit_event(
-            self.client_id, "master", "info",
-            f"Cross-batch reconciliation complete. {len(self.state.open_contradictions)} total contradictions.",
-        )
-
     # ══════════════════════════════════════════════════════════════════
     #  Phase 3: Verify
     # ══════════════════════════════════════════════════════════════════
 
     async def run_verify_phase(self):
         """Run the verify phase: generate questionnaire from contradictions."""
+        self._start_phase_budget("verify")
         await self.convex.update_pipeline(self.client_id, "verify", 0, ["master"])
         await self.convex.emit_event(
             self.client_id, "master", "info", "Starting verify phase"
@@ -849,10 +1206,17 @@ class MasterAgent:
         )
 
         questionnaire_id = None
+        compactor = self._new_compactor()
         for turn in range(self.max_turns):
-            text, tool_calls_raw = await self.claude.complete_with_tools_messages(
-                messages, tools, system
-            )
+            try:
+                async with self._phase_budget.limit():
+                    with llm_call_site("questionnaire"), hedged_requests():
+                        text, tool_calls_raw = await self.claude.complete_with_tools_messages(
+                            compactor.compact(messages), tools, system
+                        )
+            except BudgetExceeded as e:
+                logger.warning(f"Questionnaire generation stopped early: {e}")
+                break
 
             if not tool_calls_raw:
                 break
@@ -909,6 +1273,7 @@ class MasterAgent:
                             "type": "tool_result",
                             "tool_use_id": call.id,
                             "content": f"Questionnaire created with {len(questions)} questions. ID: {questionnaire_id}",
+                            "is_error": questionnaire_id is None,
                         }
                     )
                 else:
@@ -923,6 +1288,10 @@ class MasterAgent:
 
             messages.append({"role": "user", "content": tool_results})
 
+            # generate_questionnaire is terminal: stop once it has been created
+            if terminal_tool_succeeded(tool_calls_raw, tool_results):
+                break
+
         await self.convex.update_pipeline(
             self.client_id, "verify", 50, ["master"]
         )
@@ -1000,6 +1369,7 @@ class MasterAgent:
 
     async def run_use_phase(self):
         """Run the use phase: write knowledge entries."""
+        self._start_phase_budget("use")
         await self.convex.update_pipeline(self.client_id, "use", 0, ["master"])
         await self.convex.emit_event(
             self.client_id, "master", "info", "Starting use phase -- writing knowledge entries"
@@ -1018,48 +1388,243 @@ class MasterAgent:
             )
             return
 
-        # Build accumulated knowledge summary from all reports
-        accumulated_knowledge_parts = []
-        for report in self.state.sub_agent_reports:
-            accumulated_knowledge_parts.append(
-                f"=== {report.agent_name} ({report.source_type}) ===\n"
-                f"Metrics: {json.dumps(report.metrics, indent=2, default=str)}\n"
-                f"Findings:\n" + "\n".join(f"  - {f}" for f in report.findings)
-            )
-        accumulated_knowledge = "\n\n".join(accumulated_knowledge_parts)
-
-        # Spawn knowledge writer agent
+        # One knowledge writer per domain subtree, a capped number running at once
+        shards = self._shard_tree_by_domain(tree_nodes)
+        knowledge = self._knowledge_for_shards(shards)
         writer_executor = self._build_knowledge_writer_executor()
-        writer = KnowledgeWriterAgent(
-            llm=self.claude,
-            executor=writer_executor,
-            convex=self.convex,
-            client_id=self.client_id,
-            tree_nodes=tree_nodes,
-            accumulated_knowledge=accumulated_knowledge,
-        )
+        writers = []
+        for domain, nodes in shards.items():
+            name = f"knowledge-writer-{_slug(domain)}"
+            writers.append(
+                KnowledgeWriterAgent(
+                    llm=self.claude,
+                    executor=writer_executor,
+                    convex=self.convex,
+                    client_id=self.client_id,
+                    tree_nodes=nodes,
+                    accumulated_knowledge=knowledge[domain],
+                    compactor=self._new_compactor(),
+                    tool_concurrency=self.tool_concurrency,
+                    budget=self._new_agent_budget(name),
+                    agent_name=name,
+                )
+            )
 
-        await self.convex.update_pipeline(
-            self.client_id, "use", 20, ["master", "knowledge-writer"]
+        await self.convex.emit_event(
+            self.client_id,
+            "master",
+            "info",
+            f"Writing knowledge for {len(tree_nodes)} tree nodes with {len(writers)} writers "
+            f"(up to {self.knowledge_writer_concurrency} at once)",
         )
+        await self.convex.update_pipeline(self.client_id, "use", 20, ["master"])
+
+        semaphore = asyncio.Semaphore(max(1, self.knowledge_writer_concurrency))
+        running: list[str] = []
+        finished = 0
+
+        async def write(writer: KnowledgeWriterAgent) -> dict:
+            nonlocal finished
+            async with semaphore:
+                running.append(writer.agent_name)
+                await self.convex.update_pipeline(
+                    self.client_id, "use", 20 + 80 * finished // len(writers), ["master"] + running
+                )
+                try:
+                    return await run_in_scope(writer.run(), agent=writer.agent_name)
+                finally:
+                    running.remove(writer.agent_name)
+                    finished += 1
+                    await self.convex.update_pipeline(
+                        self.client_id, "use", 20 + 80 * finished // len(writers), ["master"] + running
+                    )
 
-        result = await writer.run()
+        results = await asyncio.gather(*[write(w) for w in writers], return_exceptions=True)
+        entries_written = 0
+        for writer, result in zip(writers, results):
+            if isinstance(result, Exception):
+                logger.error(f"{writer.agent_name} failed: {result}")
+                continue
+            entries_written += result.get("entries_written", 0)
+            if result.get("partial"):
+                await self.convex.emit_event(
+                    self.client_id,
+                    "master",
+                    "warning",
+                    f"{writer.agent_name} ran out of budget; its subtree may be incomplete",
+                )
 
         await self.convex.update_pipeline(self.client_id, "use", 100, ["master"])
         await self.convex.emit_event(
             self.client_id,
             "master",
             "complete",
-            f"Use phase complete. {result.get('entries_written', 0)} knowledge entries written.",
+            f"Use phase complete. {entries_written} knowledge entries written.",
         )
 
+    @staticmethod
+    def _shard_tree_by_domain(tree_nodes: list[dict]) -> dict[str, list[dict]]:
+        """Group tree nodes by the top-level node they descend from (via parent_name)."""
+        parents = {node["name"]: node.get("parent_name") for node in tree_nodes}
+        shards: dict[str, list[dict]] = {}
+        for node in tree_nodes:
+            root, seen = node["name"], set()
+            while parents.get(root) in parents and root not in seen:
+                seen.add(root)
+                root = parents[root]
+            shards.setdefault(root, []).append(node)
+        return shards
+
+    def _knowledge_for_shards(self, shards: dict[str, list[dict]]) -> dict[str, str]:
+        """Accumulated knowledge from all reports, narrowed per shard to findings that mention its nodes.
+
+        A report goes to a shard (with its metrics) when any of its findings matches a
+        keyword from the shard's node names. A report that matches no shard is sent
+        whole to every shard rather than dropped; a shard that matches nothing gets everything.
+        """
+        keywords = {
+            domain: {word for node in nodes for word in re.findall(r"[a-z0-9]{4,}", node["name"].lower())}
+            for domain, nodes in shards.items()
+        }
+        all_parts: list[str] = []
+        parts: dict[str, list[str]] = {domain: [] for domain in shards}
+        matched_domains: set[str] = set()
+        unmatched = 0
+        for report in self.state.sub_agent_reports:
+            header = (
+                f"=== {report.agent_name} ({report.source_type}) ===\n"
+                f"Metrics: {json.dumps(report.metrics, indent=2, default=str)}\n"
+                f"Findings:\n"
+            )
+            whole = header + "\n".join(f"  - {f}" for f in report.findings)
+            all_parts.append(whole)
+            matched = False
+            for domain, words in keywords.items():
+                relevant = [f for f in report.findings if any(k in str(f).lower() for k in words)]
+                if relevant:
+                    parts[domain].append(header + "\n".join(f"  - {f}" for f in relevant))
+                    matched_domains.add(domain)
+                    matched = True
+            if not matched:
+                unmatched += 1
+                for domain_parts in parts.values():
+                    domain_parts.append(whole)
+        if unmatched:
+            logger.info(
+                f"{unmatched} of {len(self.state.sub_agent_reports)} reports matched no knowledge shard; "
+                f"sent to all {len(shards)} shards"
+            )
+        return {
+            domain: "\n\n".join(parts[domain] if domain in matched_domains else all_parts)
+            for domain in shards
+        }
+
     # ══════════════════════════════════════════════════════════════════
     #  Run full pipeline
     # ══════════════════════════════════════════════════════════════════
 
     async def run(self, data_sources: list[dict]):
         """Run the full pipeline."""
-        await self.run_explore_phase(data_sources)
-        await self.run_structure_phase()
-        await self.run_verify_phase()
-        await self.run_use_phase()
+        try:
+            if self.forum is not None:
+                await self.forum.preload(
+                    list(dict.fromkeys(ds["type"] for ds in data_sources)), ["explore", "structure"]
+                )
+            if self.pipelined_phases:
+                await self._run_explore_and_structure_pipelined(data_sources)
+            else:
+                with usage_scope(agent="master", phase="explore"):
+                    await self.run_explore_phase(data_sources)
+                await self._finish_phase("explore")
+                with usage_scope(agent="master", phase="structure"):
+                    await self.run_structure_phase()
+                await self._finish_phase("structure")
+            if self.forum is not None:
+                # Only explorers and structurers write to the forum
+                await self.forum.flush()
+            with usage_scope(agent="master", phase="verify"):
+                await self.run_verify_phase()
+            await self._finish_phase("verify")
+            with usage_scope(agent="master", phase="use"):
+                await self.run_use_phase()
+            await self._finish_phase("use")
+        finally:
+            if self.forum is not None:
+                await self.forum.flush()
+                logger.info(f"Forum replica: {json.dumps(self.forum.stats)}")
+            # Files uploaded for multimodal extraction live only as long as the pipeline
+            await self.gemini.cleanup_files()
+
+    async def _run_explore_and_structure_pipelined(self, data_sources: list[dict]):
+        """Explore and structure without a barrier between them.
+
+        The structurer pool starts before the explorers and each explorer's
+        files are queued as soon as it reports, so structuring of fast sources
+        overlaps exploration of slow ones. Tree design and cross-batch
+        reconciliation still wait for every explorer.
+
+        The structure phase's deadline starts when exploration ends, as in
+        sequential mode: structurers working during exploration are bounded by
+        their own agent budgets and share the phase's token allowance.
+        """
+        structure_budget = self._new_phase_budget("structure", start=False)
+        pool, structurer_workspaces = self._new_structurer_pool(
+            list(dict.fromkeys(ds["type"] for ds in data_sources)), phase_budget=structure_budget
+        )
+
+        def queue_files(report: SubAgentReport) -> None:
+            refs = self._file_refs(report)
+            if refs:
+                logger.info(f"Queueing {len(refs)} files from {report.agent_name} for structuring")
+                pool.submit(refs)
+
+        with usage_scope(agent="master", phase="structure"):
+            structuring = asyncio.create_task(self._run_structurer_pool(pool, structurer_workspaces))
+        try:
+            with usage_scope(agent="master", phase="explore"):
+                await self.run_explore_phase(data_sources, on_report=queue_files)
+            if not pool.submitted:
+                pool.submit(self._fallback_file_refs())
+            pool.close()
+        except BaseException:
+            structuring.cancel()
+            raise
+        await self._finish_phase("explore")
+
+        structure_budget.start()
+        self._phase_budget = structure_budget
+        with usage_scope(agent="master", phase="structure"):
+            await self.run_structure_phase(structuring=structuring)
+        await self._finish_phase("structure")
+
+    async def _finish_phase(self, phase: str):
+        """Phase boundary: report usage and send every event still buffered for the phase."""
+        await self._emit_usage_rollup(phase)
+        await self.convex.flush_pipeline_updates()
+        await self.convex.flush_events()
+
+    async def _emit_usage_rollup(self, phase: str):
+        """Log and emit per-agent token/latency totals for a finished phase."""
+        if self.usage_ledger is None:
+            return
+        totals = self.usage_ledger.totals(phase)
+        by_agent = self.usage_ledger.rollup(phase)
+        by_tier = self.usage_ledger.rollup(phase, group_by="tier")
+        logger.info(
+            f"Usage for {phase} phase: {json.dumps(totals)} "
+            f"by agent: {json.dumps(by_agent)} by tier: {json.dumps(by_tier)}"
+        )
+        await self.convex.emit_event(
+            self.client_id,
+            "master",
+            "info",
+            f"Usage for {phase} phase: {totals['calls']} LLM calls, "
+            f"{totals['input_tokens']} input / {totals['output_tokens']} output tokens "
+            f"({totals['cache_read_tokens']} cached), {totals['latency_s']}s total latency, "
+            f"~${totals['cost_usd']}",
+            metadata={"phase": phase, "totals": totals, "by_agent": by_agent, "by_tier": by_tier},
+        )
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "root"
@@ -1,4 +1,5 @@
 from .file_manager import SandboxFileManager
 from .command_executor import CommandExecutor
+from .result_store import ResultStore
 
-__all__ = ["SandboxFileManager", "CommandExecutor"]
+__all__ = ["SandboxFileManager", "CommandExecutor", "ResultStore"]
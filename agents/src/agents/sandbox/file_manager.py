@@ -15,11 +15,26 @@ except ImportError:
 
 
 class SandboxFileManager:
-    """Manages isolated temp directories for pipeline runs."""
+    """Manages isolated temp directories for pipeline runs.
+
+    With deterministic_names, workspaces are numbered in creation order instead
+    of getting a random suffix, so paths (which end up in prompts and tool
+    results) are the same on every run; used for cassette record/replay.
+    """
+
+    def __init__(self, deterministic_names: bool = False):
+        self.deterministic_names = deterministic_names
+        self._created: dict[str, int] = {}
 
     def create_workspace(self, client_id: str) -> str:
         """Create an isolated workspace directory. Returns absolute path."""
-        workspace = f"/tmp/sandbox_{client_id}_{uuid.uuid4().hex[:8]}"
+        if self.deterministic_names:
+            self._created[client_id] = self._created.get(client_id, 0) + 1
+            workspace = f"/tmp/sandbox_{client_id}_{self._created[client_id]}"
+            # A previous run with the same name may have left files behind
+            shutil.rmtree(workspace, ignore_errors=True)
+        else:
+            workspace = f"/tmp/sandbox_{client_id}_{uuid.uuid4().hex[:8]}"
         os.makedirs(workspace, exist_ok=True)
         logger.info(f"Created workspace: {workspace}")
         return workspace
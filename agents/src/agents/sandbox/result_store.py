@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = ".results"
+
+_PATH_TOKEN = re.compile(r"\[(-?\d+)\]|([^.\[\]]+)")
+_SPILL_MARKER = re.compile(r"\.\.\. \[result too large to show: \d+ chars saved as handle '(r\d+)'")
+
+
+class ResultStore:
+    """Spills oversized tool results into a workspace and serves them back in slices.
+
+    Results longer than inline_chars are written to <workspace>/.results/ and the
+    model gets a preview plus a handle instead; read_result(handle, ...) pages
+    through the full text or picks a value out of a JSON result by path. Results
+    beyond max_chars are still cut, but at a size meant for disk, not for context.
+    """
+
+    def __init__(
+        self,
+        workspace: str,
+        inline_chars: int = 8000,
+        preview_chars: int = 2000,
+        max_chars: int = 5_000_000,
+    ):
+        self._dir = os.path.join(workspace, RESULTS_DIR)
+        self.inline_chars = inline_chars
+        self.preview_chars = preview_chars
+        self.max_chars = max_chars
+        self._paths: dict[str, str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.inline_chars > 0
+
+    def spill(self, tool_name: str, content: str) -> str:
+        """Return content unchanged if small enough, else save it and return a preview + handle."""
+        if not self.enabled or len(content) <= self.inline_chars:
+            return content
+        if self.max_chars and len(content) > self.max_chars:
+            logger.warning(f"{tool_name} result truncated before spilling: {len(content)} -> {self.max_chars}")
+            content = content[:self.max_chars]
+        parsed = _parse_json(content)
+        handle = f"r{len(self._paths) + 1}"
+        os.makedirs(self._dir, exist_ok=True)
+        path = os.path.join(self._dir, f"{handle}_{_safe_name(tool_name)}.{'json' if parsed is not None else 'txt'}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._paths[handle] = path
+        logger.info(f"Spilled {tool_name} result ({len(content)} chars) to {path}")
+
+        outline = f"\nStructure: {json.dumps(_outline(parsed))}" if parsed is not None else ""
+        return (
+            f"{content[:self.preview_chars]}\n"
+            f"... [result too large to show: {len(content)} chars saved as handle '{handle}' "
+            f"({os.path.relpath(path, os.path.dirname(self._dir))}).{outline}\n"
+            f"Use read_result(handle='{handle}', offset=..., length=...) to page through it"
+            + (", or json_path='key.list[0].field' to pick out a value" if parsed is not None else "")
+            + "]"
+        )
+
+    def resolve(self, content: str) -> str:
+        """Full text behind a preview returned by spill(); any other content is returned as is."""
+        markers = _SPILL_MARKER.findall(content)
+        path = self._paths.get(markers[-1]) if markers else None
+        if path is None:
+            return content
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def read(self, handle: str, offset: int = 0, length: int = 8000, json_path: str = "") -> str:
+        path = self._paths.get(handle)
+        if path is None:
+            raise ValueError(f"Unknown result handle '{handle}'. Known handles: {sorted(self._paths)}")
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if json_path:
+            data = _parse_json(text)
+            if data is None:
+                raise ValueError(f"Result '{handle}' is not JSON; read it by offset instead")
+            text = json.dumps(_resolve(data, json_path), ensure_ascii=False, default=str)
+        length = max(1, min(length, self.inline_chars or length))
+        chunk = text[offset:offset + length]
+        end = offset + len(chunk)
+        more = f" — continue with offset={end}" if end < len(text) else ""
+        return f"[chars {offset}-{end} of {len(text)}{more}]\n{chunk}"
+
+
+def _parse_json(text: str) -> Any | None:
+    if text[:1] not in ("{", "["):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _resolve(data: Any, path: str) -> Any:
+    """Follow a path like 'messages[2].payload.headers' (or 'messages.2.payload') into data."""
+    current = data
+    for index, key in _PATH_TOKEN.findall(path):
+        try:
+            if index:
+                current = current[int(index)]
+            elif isinstance(current, list):
+                current = current[int(key)]
+            else:
+                current = current[key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError(f"json_path '{path}' not found (failed at '{index or key}')")
+    return current
+
+
+def _outline(data: Any, depth: int = 3) -> Any:
+    """Shallow shape of a JSON value: keys, list lengths and scalar types."""
+    if isinstance(data, dict):
+        if depth == 0:
+            return f"object({len(data)} keys)"
+        return {k: _outline(v, depth - 1) for k, v in list(data.items())[:20]}
+    if isinstance(data, list):
+        if not data:
+            return "list(0)"
+        if depth == 0:
+            return f"list({len(data)})"
+        return [f"list({len(data)}) of", _outline(data[0], depth - 1)]
+    return type(data).__name__
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name)[:60]
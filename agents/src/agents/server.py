@@ -6,6 +6,8 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from .llm.usage import UsageLedger
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s"
 )
@@ -22,6 +24,8 @@ app.add_middleware(
 
 # Track running pipelines
 _running_pipelines: dict[str, asyncio.Task] = {}
+# Usage ledger of the latest run per client (kept after completion for inspection)
+_pipeline_usage: dict[str, UsageLedger] = {}
 
 
 class PipelineRequest(BaseModel):
@@ -34,11 +38,11 @@ class PipelineResponse(BaseModel):
     message: str
 
 
-async def _run_pipeline(client_id: str):
+async def _run_pipeline(client_id: str, usage_ledger: UsageLedger):
     """Run the full agent pipeline for a client."""
     try:
         from .main import main
-        await main(client_id)
+        await main(client_id, usage_ledger=usage_ledger)
         logger.info(f"Pipeline completed for client {client_id}")
     except Exception as e:
         logger.error(f"Pipeline failed for client {client_id}: {e}")
@@ -58,7 +62,9 @@ async def start_pipeline(request: PipelineRequest):
             message=f"Pipeline already running for client {request.client_id}",
         )
 
-    task = asyncio.create_task(_run_pipeline(request.client_id))
+    usage_ledger = UsageLedger()
+    _pipeline_usage[request.client_id] = usage_ledger
+    task = asyncio.create_task(_run_pipeline(request.client_id, usage_ledger))
     _running_pipelines[request.client_id] = task
 
     return PipelineResponse(
@@ -75,6 +81,15 @@ async def pipeline_status(client_id: str):
     return {"status": "idle"}
 
 
+@app.get("/api/pipeline/usage/{client_id}")
+async def pipeline_usage(client_id: str):
+    """Token and latency roll-ups for the client's current or most recent pipeline run."""
+    usage_ledger = _pipeline_usage.get(client_id)
+    if usage_ledger is None:
+        raise HTTPException(status_code=404, detail="No pipeline run recorded for this client")
+    return usage_ledger.summary()
+
+
 @app.get("/api/workspace/{client_id}/files")
 async def workspace_files(client_id: str):
     """Debug endpoint: workspace files are managed by MasterAgent internally."""
@@ -0,0 +1,223 @@
+"""Candidate blocking for cross-batch contradiction detection.
+
+Instead of showing the model every finding at once, findings are grouped
+locally by the keys they mention (invoice/document numbers and entity names).
+Only groups whose findings disagree on an amount, a date or a status need a
+model to look at them; everything else cannot contain a contradiction about
+that key. The cost is linear in the number of findings, plus one small model
+call per conflicting group.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+_MONTH_NAMES = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+# Full names, three-letter abbreviations and "sept" -> month number
+_MONTHS = {
+    **{name: i + 1 for i, name in enumerate(_MONTH_NAMES)},
+    **{name[:3]: i + 1 for i, name in enumerate(_MONTH_NAMES)},
+    "sept": 9,
+}
+
+_DOC_NUMBER = re.compile(
+    r"\b(?:invoice|inv|bill|po|purchase order|order|receipt|contract|credit note|quote)"
+    r"\s*(?:no\.?|number|num|id|ref)?\s*[#:]?\s*([A-Z]{0,5}[-/]?\d[A-Z0-9\-/_.]*[A-Z0-9])",
+    re.IGNORECASE,
+)
+_ENTITY = re.compile(
+    r"\b([A-Z][\w&'\-]*(?:\s+(?:[A-Z][\w&'\-]*|&|of|and|de|la))*\s+"
+    r"(?:Ltd|Limited|LLC|Inc|Corp|Corporation|GmbH|AG|SA|SAS|SARL|BV|NV|PLC|LLP|Co|Company|Group|Holdings))\b\.?"
+)
+_PROPER_NAME = re.compile(r"\b([A-Z][a-z][\w&'\-]*(?:\s+[A-Z][a-z][\w&'\-]*){1,3})\b")
+_EMAIL_DOMAIN = re.compile(r"\b[\w.+-]+@([\w-]+(?:\.[\w-]+)+)\b")
+
+_AMOUNT = re.compile(
+    r"(?:(?P<cur1>[$€£]|USD|EUR|GBP)\s?(?P<num1>\d[\d,]*(?:\.\d+)?)(?P<k1>\s?[kK]\b)?)"
+    r"|(?:(?P<num2>\d[\d,]*(?:\.\d+)?)(?P<k2>\s?[kK]\b)?\s?(?P<cur2>USD|EUR|GBP|dollars|euros|pounds)\b)"
+)
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_SLASH_DATE = re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{2,4})\b")
+_TEXT_DATE = re.compile(
+    r"\b(?:(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})"
+    r"|([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4}))\b"
+)
+_STATUS = re.compile(
+    r"\b(paid|unpaid|pending|overdue|outstanding|cancelled|canceled|void|refunded|"
+    r"active|inactive|closed|open|expired|terminated|draft|final|approved|rejected|signed|unsigned)\b",
+    re.IGNORECASE,
+)
+_STATUS_ALIASES = {"canceled": "cancelled", "outstanding": "unpaid"}
+
+# Capitalized phrases that are not entities
+_NAME_STOPWORDS = {
+    "the", "this", "that", "these", "total", "invoice", "invoices", "amount", "status", "date",
+    "batch", "source", "file", "files", "email", "emails", "sheet", "document", "google", "drive",
+    "gmail", "sheets", "note", "notes", "payment", "payments", "contract", "order",
+}
+
+_CURRENCIES = {"$": "USD", "€": "EUR", "£": "GBP", "dollars": "USD", "euros": "EUR", "pounds": "GBP"}
+
+
+@dataclass
+class Finding:
+    source: str  # which batch/report it came from
+    text: str
+    keys: set[str] = field(default_factory=set)
+    amounts: set[str] = field(default_factory=set)
+    dates: set[str] = field(default_factory=set)
+    statuses: set[str] = field(default_factory=set)
+
+
+@dataclass
+class CandidateGroup:
+    key: str
+    findings: list[Finding]
+    conflicts: list[str]  # which value kinds disagree: "amount", "date", "status"
+
+    def render(self) -> str:
+        lines = [f"Shared key: {self.key} (conflicting {', '.join(self.conflicts)})"]
+        for f in self.findings:
+            lines.append(f"- [{f.source}] {f.text}")
+        return "\n".join(lines)
+
+
+def _normalize_key(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def _normalize_amount(cur: str | None, num: str, thousands: str | None) -> str | None:
+    try:
+        value = float(num.replace(",", ""))
+    except ValueError:
+        return None
+    if thousands:
+        value *= 1000
+    currency = _CURRENCIES.get(cur or "", (cur or "").upper())
+    return f"{currency}{value:.2f}"
+
+
+def _date(year: int, month: int, day: int) -> str | None:
+    if year < 100:
+        year += 2000
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 1900 <= year <= 2100):
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def extract(source: str, text: str) -> Finding:
+    """Pull blocking keys and comparable values out of one finding."""
+    finding = Finding(source=source, text=text)
+    for m in _DOC_NUMBER.finditer(text):
+        # Key on the digits so "INV-2041", "inv 2041" and "#2041" meet; "order 5" is a quantity
+        digits = re.sub(r"\D", "", m.group(1))
+        short = re.sub(r"[^A-Z0-9]", "", m.group(1).upper())
+        if len(digits) >= 3:
+            finding.keys.add(f"doc:{digits}")
+        elif len(short) >= 3:
+            finding.keys.add(f"doc:{short}")
+    entity_spans = []
+    for m in _ENTITY.finditer(text):
+        finding.keys.add(f"entity:{_normalize_key(m.group(1))}")
+        entity_spans.append(m.span())
+    for m in _PROPER_NAME.finditer(text):
+        if any(start <= m.start() < end for start, end in entity_spans):
+            continue
+        words = m.group(1).split()
+        while words and words[0].lower() in _NAME_STOPWORDS:
+            words.pop(0)
+        if len(words) >= 2 and words[0].lower() not in _MONTHS:
+            finding.keys.add(f"entity:{_normalize_key(' '.join(words))}")
+    for m in _EMAIL_DOMAIN.finditer(text):
+        finding.keys.add(f"domain:{m.group(1).lower()}")
+
+    for m in _AMOUNT.finditer(text):
+        amount = (
+            _normalize_amount(m.group("cur1"), m.group("num1"), m.group("k1"))
+            if m.group("num1")
+            else _normalize_amount(m.group("cur2"), m.group("num2"), m.group("k2"))
+        )
+        if amount:
+            finding.amounts.add(amount)
+    for m in _ISO_DATE.finditer(text):
+        if d := _date(int(m.group(1)), int(m.group(2)), int(m.group(3))):
+            finding.dates.add(d)
+    for m in _SLASH_DATE.finditer(text):
+        # Day-first, as in most of the documents we see; ambiguous either way
+        if d := _date(int(m.group(3)), int(m.group(2)), int(m.group(1))):
+            finding.dates.add(d)
+    for m in _TEXT_DATE.finditer(text):
+        day, month, year = (m.group(1), m.group(2), m.group(3)) if m.group(1) else (m.group(5), m.group(4), m.group(6))
+        month_num = _MONTHS.get(month.lower())
+        if month_num and (d := _date(int(year), month_num, int(day))):
+            finding.dates.add(d)
+    finding.statuses = {_STATUS_ALIASES.get(s.lower(), s.lower()) for s in _STATUS.findall(text)}
+    return finding
+
+
+def _conflicts(findings: list[Finding]) -> list[str]:
+    """Value kinds on which findings sharing a key disagree (findings without the kind don't count)."""
+    conflicts = []
+    for attr, kind in (("amounts", "amount"), ("dates", "date"), ("statuses", "status")):
+        values = {frozenset(getattr(f, attr)) for f in findings if getattr(f, attr)}
+        if len(values) > 1:
+            conflicts.append(kind)
+    return conflicts
+
+
+def block_findings(
+    findings: list[tuple[str, str]],
+    max_block_size: int = 40,
+) -> tuple[list[CandidateGroup], dict]:
+    """Group findings by shared key and keep the groups whose values conflict.
+
+    findings are (source, text) pairs. Keys shared by more than max_block_size
+    findings (e.g. the client's own company name) are too broad to be useful
+    and are dropped. Groups covering the same set of findings are merged, and
+    groups whose findings all come from one source are skipped, as they hold
+    nothing to reconcile across batches. Returns the groups and counters for
+    logging.
+    """
+    extracted = [extract(source, text) for source, text in findings]
+    blocks: dict[str, list[int]] = {}
+    for i, f in enumerate(extracted):
+        for key in f.keys:
+            blocks.setdefault(key, []).append(i)
+
+    groups: list[CandidateGroup] = []
+    seen: set[tuple[int, ...]] = set()
+    oversized = single_source = 0
+    # Most specific keys (document numbers) first, so merged groups are labelled by them;
+    # ties are broken by the key itself, so the labels (which go into prompts) never depend on set order
+    for key, members in sorted(blocks.items(), key=lambda kv: (not kv[0].startswith("doc:"), len(kv[1]), kv[0])):
+        if len(members) < 2:
+            continue
+        if len(members) > max_block_size:
+            oversized += 1
+            continue
+        signature = tuple(members)
+        if signature in seen:
+            continue
+        seen.add(signature)
+        group_findings = [extracted[i] for i in members]
+        if len({f.text for f in group_findings}) < 2:
+            continue
+        if len({f.source for f in group_findings}) < 2:
+            single_source += 1
+            continue
+        conflicts = _conflicts(group_findings)
+        if conflicts:
+            groups.append(CandidateGroup(key=key, findings=group_findings, conflicts=conflicts))
+
+    stats = {
+        "findings": len(extracted),
+        "keys": len(blocks),
+        "blocks": sum(1 for m in blocks.values() if len(m) >= 2),
+        "oversized_blocks": oversized,
+        "single_source_blocks": single_source,
+        "conflicting_groups": len(groups),
+        "unkeyed_findings": sum(1 for f in extracted if not f.keys),
+    }
+    return groups, stats
@@ -9,6 +9,7 @@ class SubAgentReport:
     metrics: dict[str, Any] = field(default_factory=dict)
     findings: list[str] = field(default_factory=list)
     contradictions: list[dict] = field(default_factory=list)
+    partial: bool = False  # stopped early (budget exhausted); metrics/findings may be incomplete
 
 
 @dataclass
@@ -1,24 +1,55 @@
 import asyncio
 import logging
+import time
 from typing import Any
 
 import httpx
 
+from .event_buffer import EventBuffer
+
 logger = logging.getLogger(__name__)
 
 # Transient HTTP status codes worth retrying
 _RETRYABLE_STATUS = {502, 503, 504}
+# Knowledge entries sent per bulk request (keeps each Convex mutation small)
+_ENTRY_BATCH_SIZE = 50
+# _post(missing_route_ok=True) result for a route the deployment does not have
+ROUTE_MISSING = {"routeMissing": True}
 
 
 class ConvexClient:
     """HTTP client for communicating with Convex backend endpoints."""
 
-    def __init__(self, base_url: str, auth_token: str, timeout: int = 30, max_retries: int = 3):
+    def __init__(
+        self,
+        base_url: str,
+        auth_token: str,
+        timeout: int = 30,
+        max_retries: int = 3,
+        event_batch_size: int = 50,
+        event_flush_interval_s: float = 0.5,
+        pipeline_update_interval_s: float = 2.0,
+    ):
         self._base_url = base_url.rstrip("/")
         self._auth_token = auth_token
         self._timeout = timeout
         self._max_retries = max_retries
         self._client: httpx.AsyncClient | None = None
+        # Events are queued and sent in batches in the background (0 = send each inline)
+        self._events = (
+            EventBuffer(self._send_events, batch_size=event_batch_size, flush_interval_s=event_flush_interval_s)
+            if event_batch_size > 0
+            else None
+        )
+        # update_pipeline coalescing, per client: latest unsent state, last send, pending timer.
+        # Updates are numbered so one that lost a race to a newer one is never sent after it.
+        self._pipeline_update_interval_s = pipeline_update_interval_s
+        self._pipeline_updates = 0
+        self._pipeline_pending: dict[str, tuple[int, dict]] = {}  # client -> (update number, state)
+        self._pipeline_sent: dict[str, tuple[str, float, int]] = {}  # client -> (phase, monotonic time, number)
+        self._pipeline_timers: dict[str, asyncio.Task] = {}
+        self._pipeline_locks: dict[str, asyncio.Lock] = {}
+        self._pipeline_closing = asyncio.Event()  # wakes sleeping timers on exit
 
     async def __aenter__(self):
         self._client = httpx.AsyncClient(
@@ -29,18 +60,38 @@ class ConvexClient:
             },
             timeout=float(self._timeout),
         )
+        if self._events is not None:
+            self._events.start()
+        self._pipeline_closing.clear()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # Sleeping timers send their state now; one whose POST is in flight is let finish
+        self._pipeline_closing.set()
+        await asyncio.gather(*self._pipeline_timers.values(), return_exceptions=True)
+        self._pipeline_timers.clear()
+        await self.flush_pipeline_updates()
+        if self._events is not None:
+            await self._events.close()
         if self._client:
             await self._client.aclose()
             self._client = None
 
-    async def _post(self, path: str, payload: dict, critical: bool = False) -> dict | None:
+    async def _post(
+        self, path: str, payload: dict, critical: bool = False, missing_route_ok: bool = False
+    ) -> dict | None:
+        """POST with retries; None on failure (or RuntimeError when critical).
+
+        With missing_route_ok, a 404 returns ROUTE_MISSING instead, so bulk
+        callers can tell "this deployment has no such route" (safe to redo the
+        work another way) from a failure after which the write may have landed.
+        """
         last_err: Exception | None = None
         for attempt in range(self._max_retries):
             try:
                 resp = await self._client.post(path, json=payload)
+                if resp.status_code == 404 and missing_route_ok:
+                    return ROUTE_MISSING
                 if resp.status_code in _RETRYABLE_STATUS and attempt < self._max_retries - 1:
                     await asyncio.sleep(2 ** attempt)
                     continue
@@ -79,17 +130,35 @@ class ConvexClient:
         message: str,
         metadata: dict[str, Any] | None = None,
     ) -> dict | None:
-        return await self._post(
-            "/api/agent/event",
-            {
-                "clientId": client_id,
-                "agentName": agent_name,
-                "eventType": event_type,
-                "message": message,
-                "metadata": metadata or {},
-            },
-            critical=True,
-        )
+        """Log an agent event. When buffered, the event is only queued and None is returned."""
+        event = {
+            "clientId": client_id,
+            "agentName": agent_name,
+            "eventType": event_type,
+            "message": message,
+            "metadata": metadata or {},
+        }
+        if self._events is not None:
+            self._events.put(event)
+            return None
+        return await self._post("/api/agent/event", event, critical=True)
+
+    async def flush_events(self) -> None:
+        """Send all queued events now (phase boundaries, shutdown)."""
+        if self._events is not None:
+            await self._events.flush()
+
+    async def _send_events(self, events: list[dict]) -> None:
+        response = await self._post("/api/agent/events", {"events": events}, missing_route_ok=True)
+        if response != ROUTE_MISSING:
+            if response is None:
+                # The batch may have been stored before the failure: resending could duplicate it
+                logger.error(f"Bulk event write failed; dropped {len(events)} events")
+            return
+        # Deployment without the bulk endpoint: same events, one request each, still in order
+        logger.warning(f"No bulk event endpoint; sending {len(events)} events one by one")
+        for event in events:
+            await self._post("/api/agent/event", event, critical=True)
 
     # ── Contradictions ─────────────────────────────────────────────────
 
@@ -178,6 +247,59 @@ class ConvexClient:
             payload["sourceRef"] = source_ref
         return await self._post("/api/agent/knowledge/entry", payload, critical=True)
 
+    async def create_knowledge_entries(self, client_id: str, entries: list[dict]) -> list[dict]:
+        """Create many entries via the bulk endpoint; one {"id"} or {"error"} per entry, in order.
+
+        entries use create_knowledge_entry's argument names. Chunks are only
+        rewritten entry by entry when the deployment has no bulk route: after
+        any other failure (e.g. a timeout) the chunk may have been committed,
+        and writing it again would duplicate user-visible entries, so its
+        entries are reported as errors instead.
+        """
+        results: list[dict] = []
+        for start in range(0, len(entries), _ENTRY_BATCH_SIZE):
+            chunk = entries[start:start + _ENTRY_BATCH_SIZE]
+            payload = {
+                "clientId": client_id,
+                "entries": [
+                    {
+                        "treeNodeId": e["tree_node_id"],
+                        "title": e["title"],
+                        "content": e["content"],
+                        "confidence": e["confidence"],
+                        "verified": e.get("verified", False),
+                        **({"sourceRef": e["source_ref"]} if e.get("source_ref") else {}),
+                    }
+                    for e in chunk
+                ],
+            }
+            response = await self._post("/api/agent/knowledge/entries", payload, missing_route_ok=True)
+            if response != ROUTE_MISSING:
+                if response is not None and len(response.get("results", [])) == len(chunk):
+                    results.extend(response["results"])
+                else:
+                    logger.error(f"Bulk knowledge entry write failed; {len(chunk)} entries not confirmed")
+                    results.extend(
+                        {"error": "bulk write failed; not retried in case it was committed"} for _ in chunk
+                    )
+                continue
+            logger.warning(f"No bulk knowledge entry endpoint; writing {len(chunk)} entries one by one")
+            for e in chunk:
+                try:
+                    result = await self.create_knowledge_entry(
+                        client_id=client_id,
+                        tree_node_id=e["tree_node_id"],
+                        title=e["title"],
+                        content=e["content"],
+                        source_ref=e.get("source_ref", ""),
+                        confidence=e["confidence"],
+                        verified=e.get("verified", False),
+                    )
+                    results.append({"id": result.get("id", "unknown") if result else "unknown"})
+                except Exception as err:
+                    results.append({"error": str(err)})
+        return results
+
     # ── Agent forum ────────────────────────────────────────────────────
 
     async def search_forum(
@@ -225,6 +347,43 @@ class ConvexClient:
             payload["fileType"] = file_type
         return await self._post("/api/agent/forum/create", payload)
 
+    async def list_forum_entries(
+        self, source_types: list[str], phases: list[str], limit: int = 200
+    ) -> list[dict] | None:
+        """Newest entries for each (sourceType, phase) pair; None if the request failed."""
+        result = await self._post(
+            "/api/agent/forum/list",
+            {"sourceTypes": source_types, "phases": phases, "limit": limit},
+        )
+        if isinstance(result, dict):
+            return result.get("results", [])
+        return None
+
+    async def create_forum_entries(self, entries: list[dict]) -> list[str | None]:
+        """Bulk-create forum entries (Convex field names); their IDs in order, None where not written.
+
+        Like create_knowledge_entries, entries are only written one by one when
+        the deployment has no bulk route.
+        """
+        result = await self._post("/api/agent/forum/create-batch", {"entries": entries}, missing_route_ok=True)
+        if result != ROUTE_MISSING:
+            if isinstance(result, dict) and len(result.get("ids", [])) == len(entries):
+                return result["ids"]
+            logger.error(f"Bulk forum write failed; {len(entries)} entries not confirmed")
+            return [None] * len(entries)
+        logger.warning(f"No bulk forum endpoint; writing {len(entries)} entries one by one")
+        ids = []
+        for entry in entries:
+            created = await self.create_forum_entry(
+                entry["title"], entry["category"], entry["content"],
+                entry["authorAgent"], entry.get("tags", []),
+                source_type=entry.get("sourceType"),
+                phase=entry.get("phase"),
+                file_type=entry.get("fileType"),
+            )
+            ids.append(created.get("id") if created else None)
+        return ids
+
     # ── Questionnaire ──────────────────────────────────────────────────
 
     async def create_questionnaire(
@@ -276,13 +435,61 @@ class ConvexClient:
         progress: int,
         active_agents: list[str],
     ) -> dict | None:
-        return await self._post(
-            "/api/agent/pipeline/update",
-            {
-                "clientId": client_id,
-                "currentPhase": phase,
-                "phaseProgress": progress,
-                "activeAgents": active_agents,
-                "lastActivity": int(__import__("time").time() * 1000),
-            },
-        )
+        """Set the pipeline's phase/progress/active agents, coalescing rapid updates per client.
+
+        A phase change is sent immediately. Within a phase at most one update
+        per pipeline_update_interval_s is sent; updates in between only replace
+        the pending state (latest wins), which a timer sends when the interval
+        is up. Returns None when the update was deferred.
+        """
+        state = {
+            "clientId": client_id,
+            "currentPhase": phase,
+            "phaseProgress": progress,
+            "activeAgents": active_agents,
+        }
+        self._pipeline_updates += 1
+        number = self._pipeline_updates
+        last = self._pipeline_sent.get(client_id)
+        if self._pipeline_update_interval_s <= 0 or last is None or last[0] != phase:
+            # Anything still pending belongs to the previous phase and is superseded
+            self._pipeline_pending.pop(client_id, None)
+            return await self._send_pipeline_update(number, state)
+        self._pipeline_pending[client_id] = (number, state)
+        timer = self._pipeline_timers.get(client_id)
+        if timer is None or timer.done():
+            delay = last[1] + self._pipeline_update_interval_s - time.monotonic()
+            self._pipeline_timers[client_id] = asyncio.create_task(
+                self._send_pending_pipeline_update(client_id, max(delay, 0.0))
+            )
+        return None
+
+    async def flush_pipeline_updates(self) -> None:
+        """Send every pending pipeline update now."""
+        for client_id in list(self._pipeline_pending):
+            pending = self._pipeline_pending.pop(client_id, None)
+            if pending is not None:
+                await self._send_pipeline_update(*pending)
+
+    async def _send_pending_pipeline_update(self, client_id: str, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._pipeline_closing.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        pending = self._pipeline_pending.pop(client_id, None)
+        if pending is not None:
+            await self._send_pipeline_update(*pending)
+
+    async def _send_pipeline_update(self, number: int, state: dict) -> dict | None:
+        client_id = state["clientId"]
+        # One update in flight per client, so updates reach Convex in the order they were made
+        async with self._pipeline_locks.setdefault(client_id, asyncio.Lock()):
+            last = self._pipeline_sent.get(client_id)
+            if last is not None and last[2] > number:
+                logger.debug(f"Dropping stale pipeline update for {client_id} ({state['currentPhase']})")
+                return None
+            self._pipeline_sent[client_id] = (state["currentPhase"], time.monotonic(), number)
+            return await self._post(
+                "/api/agent/pipeline/update",
+                {**state, "lastActivity": int(time.time() * 1000)},
+            )
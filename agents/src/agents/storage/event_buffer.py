@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """Queue of agent events sent in batches by a background task.
+
+    put() never blocks; a batch goes out when batch_size events are queued or
+    flush_interval_s after the last send, whichever comes first. A single
+    sender drains the queue front to back, so events keep their order.
+    flush() sends everything queued so far; close() flushes and stops the task.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[list[dict]], Awaitable[None]],
+        batch_size: int = 50,
+        flush_interval_s: float = 0.5,
+    ):
+        self._send_batch = send_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = flush_interval_s
+        self._queue: deque[dict] = deque()
+        self._wakeup = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, event: dict) -> None:
+        self._queue.append(event)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        async with self._send_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                try:
+                    await self._send_batch(batch)
+                    self.sent += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.error(f"Dropped {len(batch)} agent events: {e}")
+
+    async def close(self) -> None:
+        # Let the sender finish its current batch rather than cancelling it mid-request
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,128 @@
+"""Structured facts shared by all structurers of one pipeline run.
+
+Structurers record (entity, attribute, value, source, timestamp) tuples with
+the record_fact tool. Facts are indexed by normalized (entity, attribute), so
+a new fact is only compared with the facts about the same thing: detecting
+conflicting values costs one dict lookup plus the (short) list of earlier
+values, instead of a model noticing them in free text.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import combinations
+
+_CURRENCY = re.compile(r"^([$€£]|usd|eur|gbp)\s*|\s*([$€£]|usd|eur|gbp)$")
+_CURRENCY_CODES = {"$": "USD", "€": "EUR", "£": "GBP"}
+_ENTITY_SUFFIXES = re.compile(
+    r"\b(?:ltd|limited|llc|inc|corp|corporation|gmbh|sarl|sas|plc|llp|co|company)\b\.?$"
+)
+
+
+def normalize_entity(entity: str) -> str:
+    """'ACME Corp.' and 'Acme' -> 'acme'; 'Invoice #INV-2041' -> 'invoice inv 2041'."""
+    text = re.sub(r"[^a-z0-9]+", " ", entity.lower()).strip()
+    return _ENTITY_SUFFIXES.sub("", text).strip() or text
+
+
+def normalize_attribute(attribute: str) -> str:
+    """'Due Date', 'due_date' and 'due-date' -> 'due date'."""
+    return re.sub(r"[^a-z0-9]+", " ", attribute.lower()).strip()
+
+
+def normalize_value(value: str) -> str:
+    """Compare numbers as numbers, keeping the currency; everything else case/space-insensitively.
+
+    '$12,500' and '12500.00 USD' -> 'USD 12500'; '12500 EUR' -> 'EUR 12500'; '12,500' -> '12500'.
+    """
+    text = re.sub(r"\s+", " ", str(value).strip().lower())
+    currency = ""
+    if m := _CURRENCY.search(text):
+        symbol = m.group(1) or m.group(2)
+        currency = _CURRENCY_CODES.get(symbol, symbol.upper())
+    number = _CURRENCY.sub("", text).replace(",", "")
+    try:
+        amount = Decimal(number)
+    except InvalidOperation:
+        return text
+    if not amount.is_finite():  # "nan", "inf" are words here
+        return text
+    digits = format(amount.normalize(), "f")
+    return f"{currency} {digits}" if currency else digits
+
+
+def _same_value(a: str, b: str) -> bool:
+    """Normalized values agree; a bare number agrees with the same amount in any currency."""
+    if a == b:
+        return True
+    for amount, bare in ((a, b), (b, a)):
+        code, _, number = amount.partition(" ")
+        if code in _CURRENCY_CODES.values() and number == bare:
+            return True
+    return False
+
+
+@dataclass
+class Fact:
+    entity: str
+    attribute: str
+    value: str
+    source: str
+    timestamp: str = ""  # as-of date of the value, if the source states one
+    recorded_at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return normalize_entity(self.entity), normalize_attribute(self.attribute)
+
+
+class FactStore:
+    """Facts indexed by normalized (entity, attribute); add() returns the facts a new one conflicts with.
+
+    Two facts conflict when their values differ and they describe the same
+    moment — a value that changed over time (different timestamps) is history,
+    not a contradiction. Each conflicting pair is reported once.
+    """
+
+    def __init__(self):
+        self._index: dict[tuple[str, str], list[Fact]] = {}
+        self._reported: set[tuple[tuple[str, str], frozenset[str]]] = set()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, fact: Fact) -> list[Fact]:
+        key = fact.key
+        value = normalize_value(fact.value)
+        facts = self._index.setdefault(key, [])
+        conflicts = []
+        duplicate = False
+        for earlier in facts:
+            earlier_value = normalize_value(earlier.value)
+            if _same_value(earlier_value, value):
+                duplicate = duplicate or (earlier.source, earlier.timestamp) == (fact.source, fact.timestamp)
+                continue
+            if fact.timestamp and earlier.timestamp and fact.timestamp != earlier.timestamp:
+                continue
+            pair = (key, frozenset((earlier_value, value)))
+            if pair not in self._reported:
+                self._reported.add(pair)
+                conflicts.append(earlier)
+        if not duplicate:
+            facts.append(fact)
+            self._count += 1
+        return conflicts
+
+    def get(self, entity: str, attribute: str) -> list[Fact]:
+        return list(self._index.get((normalize_entity(entity), normalize_attribute(attribute)), []))
+
+    def conflicting_keys(self) -> list[tuple[str, str]]:
+        """(entity, attribute) keys holding values that disagree (over time or not)."""
+        keys = []
+        for key, facts in self._index.items():
+            values = [normalize_value(f.value) for f in facts]
+            if any(not _same_value(a, b) for a, b in combinations(values, 2)):
+                keys.append(key)
+        return keys
@@ -0,0 +1,162 @@
+"""Per-pipeline replica of the agent forum.
+
+At pipeline start the entries relevant to the run (by sourceType and phase,
+plus untagged ones) are loaded once; check_forum is then answered from a
+local BM25 index that also holds the entries this pipeline writes, so
+concurrent agents see each other's notes immediately. The preload is capped
+and the forum is shared across clients, so a search that finds fewer than
+max_results locally is topped up from Convex's full-text search; those
+remote answers are cached per query, so repeated queries cost nothing. New
+entries are deduplicated by content hash and sent to Convex in batches.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any
+
+from .convex_client import ConvexClient
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def content_hash(title: str, content: str) -> str:
+    normalized = " ".join(_tokens(title)) + "\n" + " ".join(_tokens(content))
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class ForumReplica:
+    """Local forum index with write-behind to Convex.
+
+    Usage:
+        forum = ForumReplica(convex)
+        await forum.preload(["gmail", "drive"], ["explore", "structure"])
+        results = await forum.search("vat return pdf", source_type="drive")
+        await forum.write({...})       # Convex field names
+        await forum.flush()            # at phase ends and when the pipeline stops
+    """
+
+    def __init__(
+        self,
+        convex: ConvexClient,
+        flush_batch_size: int = 20,
+        preload_limit: int = 200,
+        max_results: int = 20,
+    ):
+        self.convex = convex
+        self.flush_batch_size = max(1, flush_batch_size)
+        self.preload_limit = preload_limit
+        self.max_results = max_results
+        self._docs: list[dict] = []
+        self._doc_lengths: list[int] = []
+        self._postings: dict[str, dict[int, int]] = {}
+        self._hashes: set[str] = set()
+        self._pending: list[dict] = []
+        self._remote: dict[tuple, list[dict]] = {}  # search_forum results by (query, filters)
+        self._flush_lock = asyncio.Lock()
+        self.stats = {
+            "preloaded": 0, "searches": 0, "remote_searches": 0, "written": 0, "duplicates": 0, "flushed": 0,
+        }
+
+    def _index(self, entry: dict) -> None:
+        doc_id = len(self._docs)
+        terms = Counter(_tokens(" ".join([
+            entry.get("title", ""), entry.get("content", ""), " ".join(entry.get("tags", []))
+        ])))
+        self._docs.append(entry)
+        self._doc_lengths.append(sum(terms.values()))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._hashes.add(content_hash(entry.get("title", ""), entry.get("content", "")))
+
+    async def preload(self, source_types: list[str], phases: list[str]) -> None:
+        entries = await self.convex.list_forum_entries(source_types, phases, limit=self.preload_limit)
+        if entries is None:
+            logger.warning("Forum preload failed; the replica starts with this run's writes only")
+            return
+        seen_ids = set()
+        for entry in entries:
+            if entry.get("_id") in seen_ids:
+                continue
+            seen_ids.add(entry.get("_id"))
+            self._index(entry)
+        self.stats["preloaded"] = len(seen_ids)
+        logger.info(f"Forum replica preloaded {len(seen_ids)} entries for {source_types} x {phases}")
+
+    async def search(
+        self,
+        query: str,
+        source_type: str | None = None,
+        phase: str | None = None,
+        file_type: str | None = None,
+    ) -> list[dict]:
+        """BM25-ranked entries matching query and the given filters (like Convex's search_content)."""
+        self.stats["searches"] += 1
+        filters = {"sourceType": source_type, "phase": phase, "fileType": file_type}
+        n = len(self._docs)
+        scores: dict[int, float] = {}
+        if n:
+            avg_length = sum(self._doc_lengths) / n
+            for term in set(_tokens(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (_BM25_K1 + 1) / norm
+        results = [
+            self._docs[doc_id]
+            for doc_id, _ in sorted(scores.items(), key=lambda kv: -kv[1])
+            if all(value is None or self._docs[doc_id].get(field) == value for field, value in filters.items())
+        ][:self.max_results]
+        if len(results) < self.max_results:
+            # The replica holds a capped subset of the forum (or only this run's writes if the
+            # preload failed): ask Convex for the rest, once per distinct query
+            key = (query, source_type, phase, file_type)
+            if key not in self._remote:
+                self.stats["remote_searches"] += 1
+                self._remote[key] = await self.convex.search_forum(
+                    query, source_type=source_type, phase=phase, file_type=file_type
+                )
+            remote = self._remote[key]
+            known = {content_hash(r.get("title", ""), r.get("content", "")) for r in results}
+            results += [
+                r for r in remote if content_hash(r.get("title", ""), r.get("content", "")) not in known
+            ][:self.max_results - len(results)]
+        return results
+
+    async def write(self, entry: dict[str, Any]) -> bool:
+        """Index an entry locally and queue it for Convex; False if the same content already exists."""
+        if content_hash(entry.get("title", ""), entry.get("content", "")) in self._hashes:
+            self.stats["duplicates"] += 1
+            return False
+        self._index(entry)
+        self._pending.append(entry)
+        self.stats["written"] += 1
+        if len(self._pending) >= self.flush_batch_size:
+            await self.flush()
+        return True
+
+    async def flush(self) -> None:
+        """Send queued entries to Convex in batches."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.flush_batch_size]
+                del self._pending[:len(batch)]
+                ids = await self.convex.create_forum_entries(batch)
+                for entry, entry_id in zip(batch, ids):
+                    if entry_id:
+                        entry["_id"] = entry_id
+                self.stats["flushed"] += sum(1 for i in ids if i)
@@ -2,7 +2,11 @@ import logging
 import json
 
 from ..llm.adapters import AnthropicAdapter
-from ..tools.definitions import ToolCall, EXPLORER_TOOLS, get_tool_schema
+from ..llm.budget import AgentBudget, BudgetExceeded
+from ..llm.compaction import HistoryCompactor
+from ..sandbox.result_store import ResultStore
+from ..tools.definitions import ToolCall, EXPLORER_TOOLS, get_tool_schema, terminal_tool_succeeded
+from ..tools.dispatch import ToolDispatcher
 from ..tools.hybrid_executor import HybridToolExecutor
 from ..tools.loop_detection import ToolLoopDetector
 from ..storage.convex_client import ConvexClient
@@ -10,6 +14,26 @@ from ..storage.context import SubAgentReport
 
 logger = logging.getLogger(__name__)
 
+# Keys that identify a resource in tool results, and keys that name it
+_RESOURCE_ID_KEYS = ("id", "fileId", "file_id", "messageId", "spreadsheetId")
+_RESOURCE_NAME_KEYS = ("name", "title", "subject", "filename")
+
+
+def _collect_resources(value, found: dict[str, dict]) -> None:
+    """Add every object in a parsed tool result that has both an id and a name."""
+    if isinstance(value, dict):
+        resource_id = next((value[k] for k in _RESOURCE_ID_KEYS if isinstance(value.get(k), str)), None)
+        name = next((value[k] for k in _RESOURCE_NAME_KEYS if isinstance(value.get(k), str)), None)
+        if resource_id and name and resource_id not in found:
+            found[resource_id] = {"id": resource_id, "name": name}
+            if isinstance(value.get("mimeType"), str):
+                found[resource_id]["mimeType"] = value["mimeType"]
+        for item in value.values():
+            _collect_resources(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_resources(item, found)
+
 
 class ExplorerAgent:
     def __init__(
@@ -24,6 +48,9 @@ class ExplorerAgent:
         tool_names: list[str] | None = None,
         auth_mode: str = "composio",
         workspace_path: str | None = None,
+        compactor: HistoryCompactor | None = None,
+        tool_concurrency: int = 4,
+        budget: AgentBudget | None = None,
     ):
         self.llm = llm
         self.executor = executor
@@ -35,6 +62,9 @@ class ExplorerAgent:
         self._tool_names = tool_names or []
         self._auth_mode = auth_mode
         self._workspace_path = workspace_path
+        self.compactor = compactor or HistoryCompactor()
+        self.tool_concurrency = tool_concurrency
+        self.budget = budget or AgentBudget(f"explorer-{source_type}")
         self.max_turns = 15
 
     def _get_discovery_strategy(self) -> str:
@@ -97,7 +127,7 @@ class ExplorerAgent:
         ]
         sandbox_tools = [
             n for n in self._tool_names
-            if n in ("download_file", "run_command", "read_local_file", "list_workspace", "install_package")
+            if n in ("download_file", "run_command", "read_local_file", "list_workspace", "install_package", "read_result")
         ]
         utility_tools = [
             n for n in self._tool_names
@@ -160,6 +190,52 @@ class ExplorerAgent:
             f"- Do NOT spend turns trying to set up authentication — it is already done."
         )
 
+    @staticmethod
+    def _partial_metrics(messages: list[dict], reason: str, result_store: ResultStore | None = None) -> dict:
+        """Metrics rebuilt from the conversation, for when the budget ran out before report_metrics.
+
+        discovered_files holds every resource the successful tool calls returned
+        (listed files, fetched messages, downloads), so the structurers can still
+        be given them. Results spilled to result_store are read back in full.
+        """
+        calls: dict[str, tuple[str, dict]] = {}
+        found: dict[str, dict] = {}
+        tools_used = 0
+        for message in messages:
+            if not isinstance(message["content"], list):
+                continue
+            for block in message["content"]:
+                if block.get("type") == "tool_use":
+                    calls[block["id"]] = (block["name"], block["input"])
+                    continue
+                if block.get("type") != "tool_result" or block.get("is_error"):
+                    continue
+                tools_used += 1
+                name, args = calls.get(block["tool_use_id"], ("", {}))
+                content = block["content"]
+                if result_store is not None and isinstance(content, str):
+                    content = result_store.resolve(content)
+                try:
+                    data = json.loads(content)
+                except (TypeError, ValueError):
+                    continue
+                if name == "download_file" and isinstance(data, dict) and args.get("file_id"):
+                    found.setdefault(args["file_id"], {
+                        "id": args["file_id"],
+                        "name": data.get("filename", args["file_id"]),
+                        "mimeType": data.get("mime_type", ""),
+                    })
+                    continue
+                _collect_resources(data, found)
+        return {
+            "summary": (
+                f"Exploration stopped early ({reason}) before report_metrics; "
+                f"{len(found)} resources seen in {tools_used} successful tool calls."
+            ),
+            "discovered_files": list(found.values()),
+            "partial": True,
+        }
+
     async def run(self) -> SubAgentReport:
         await self.convex.emit_event(
             self.client_id,
@@ -190,78 +266,113 @@ class ExplorerAgent:
         detector = ToolLoopDetector()
 
         for turn in range(self.max_turns):
-            text, tool_calls_raw = await self.llm.complete_with_tools_messages(
-                messages, tools, system
-            )
+            # Stream the turn so tool calls start while the model is still writing later ones
+            dispatcher = ToolDispatcher(self.executor.execute, max_concurrency=self.tool_concurrency)
+            tool_results = []
+            try:
+                async with self.budget.limit():
+                    text, tool_calls_raw = "", []
+                    try:
+                        async for event in self.llm.stream_with_tools_messages(
+                            self.compactor.compact(messages), tools, system
+                        ):
+                            if event["type"] == "tool_use":
+                                if event["name"] != "report_metrics":
+                                    dispatcher.dispatch(
+                                        ToolCall(id=event["id"], name=event["name"], input=event["input"])
+                                    )
+                            else:
+                                text, tool_calls_raw = event["text"], event["tool_calls"]
+                    except BaseException:
+                        dispatcher.cancel()
+                        raise
 
-            if text:
-                logger.info(f"[{self.source_type}] turn={turn} text: {text[:300]}")
-            if tool_calls_raw:
-                logger.info(
-                    f"[{self.source_type}] turn={turn} tool calls: "
-                    + ", ".join(
-                        f"{tc['name']}({str(tc['input'])[:80]})" for tc in tool_calls_raw
-                    )
-                )
+                    if text:
+                        logger.info(f"[{self.source_type}] turn={turn} text: {text[:300]}")
+                    if tool_calls_raw:
+                        logger.info(
+                            f"[{self.source_type}] turn={turn} tool calls: "
+                            + ", ".join(
+                                f"{tc['name']}({str(tc['input'])[:80]})" for tc in tool_calls_raw
+                            )
+                        )
 
-            if not tool_calls_raw:
-                break
+                    if not tool_calls_raw:
+                        break
 
-            # Build assistant content block
-            assistant_content = []
-            if text:
-                assistant_content.append({"type": "text", "text": text})
-            for tc in tool_calls_raw:
-                assistant_content.append(
-                    {
-                        "type": "tool_use",
-                        "id": tc["id"],
-                        "name": tc["name"],
-                        "input": tc["input"],
-                    }
-                )
-            messages.append({"role": "assistant", "content": assistant_content})
-
-            # Execute each tool call
-            tool_results = []
-            for tc in tool_calls_raw:
-                call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
-                detector.record(call.name, call.input)
-
-                if call.name == "report_metrics":
-                    report.metrics = call.input
-                    report.findings.append(call.input.get("summary", ""))
-                    await self.convex.emit_event(
-                        self.client_id,
-                        f"explorer-{self.source_type}",
-                        "progress",
-                        f"Metrics: {json.dumps(call.input)}",
-                    )
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": call.id,
-                            "content": "Metrics recorded. Exploration complete.",
-                        }
-                    )
-                else:
-                    result = await self.executor.execute(call)
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": call.id,
-                            "content": result.content,
-                            "is_error": result.is_error,
-                        }
-                    )
+                    # Build assistant content block
+                    assistant_content = []
+                    if text:
+                        assistant_content.append({"type": "text", "text": text})
+                    for tc in tool_calls_raw:
+                        assistant_content.append(
+                            {
+                                "type": "tool_use",
+                                "id": tc["id"],
+                                "name": tc["name"],
+                                "input": tc["input"],
+                            }
+                        )
+                    messages.append({"role": "assistant", "content": assistant_content})
+
+                    # Execute each tool call
+                    for tc in tool_calls_raw:
+                        call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
+                        detector.record(call.name, call.input)
 
-            messages.append({"role": "user", "content": tool_results})
+                        if call.name == "report_metrics":
+                            report.metrics = call.input
+                            report.findings.append(call.input.get("summary", ""))
+                            await self.convex.emit_event(
+                                self.client_id,
+                                f"explorer-{self.source_type}",
+                                "progress",
+                                f"Metrics: {json.dumps(call.input)}",
+                            )
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": "Metrics recorded. Exploration complete.",
+                                }
+                            )
+                        else:
+                            result = await dispatcher.result(call)
+                            detector.record_result(call.name, call.input, result.content, result.is_error)
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": result.content,
+                                    "is_error": result.is_error,
+                                }
+                            )
 
-            # Check for stuck loops after processing all tool calls this turn
-            if detector.is_stuck():
-                logger.warning(
-                    f"Explorer {self.source_type}: loop detected, breaking"
-                )
+                    messages.append({"role": "user", "content": tool_results})
+
+                    # report_metrics is terminal — no need for another model turn
+                    if terminal_tool_succeeded(tool_calls_raw, tool_results):
+                        break
+
+                    # Check for stuck loops after processing all tool calls this turn
+                    if detector.is_stuck():
+                        logger.warning(
+                            f"Explorer {self.source_type}: loop detected, breaking"
+                        )
+                        break
+            except BudgetExceeded as e:
+                dispatcher.cancel()
+                logger.warning(f"Explorer {self.source_type}: {e}, returning partial report")
+                report.partial = True
+                if not report.metrics:
+                    # Results of the interrupted turn count too
+                    history = messages + [{"role": "user", "content": tool_results}]
+                    report.metrics = self._partial_metrics(
+                        history, e.reason, getattr(self.executor, "result_store", None)
+                    )
+                    report.findings.append(report.metrics["summary"])
+                else:
+                    report.findings.append(f"Exploration stopped early ({e.reason}).")
                 break
 
         await self.convex.emit_event(
@@ -1,14 +1,21 @@
 import logging
 import json
+import re
 
 from ..llm.adapters import AnthropicAdapter
+from ..llm.budget import AgentBudget, BudgetExceeded
+from ..llm.compaction import HistoryCompactor
 from ..tools.definitions import KNOWLEDGE_WRITER_TOOLS, get_tool_schema, ToolCall
+from ..tools.dispatch import ToolDispatcher
 from ..tools.executor import ToolExecutor
 from ..tools.loop_detection import ToolLoopDetector
 from ..storage.convex_client import ConvexClient
 
 logger = logging.getLogger(__name__)
 
+# One line per entry the write_knowledge_entries tool got an id back for
+_CREATED_ENTRY = re.compile(r"^\[\d+\] .*: created \S+$", re.MULTILINE)
+
 
 class KnowledgeWriterAgent:
     """Writes verified knowledge entries to the knowledge base."""
@@ -21,6 +28,10 @@ class KnowledgeWriterAgent:
         client_id: str,
         tree_nodes: list[dict],
         accumulated_knowledge: str = "",
+        compactor: HistoryCompactor | None = None,
+        tool_concurrency: int = 4,
+        budget: AgentBudget | None = None,
+        agent_name: str = "knowledge-writer",
     ):
         self.llm = llm
         self.executor = executor
@@ -28,13 +39,17 @@ class KnowledgeWriterAgent:
         self.client_id = client_id
         self.tree_nodes = tree_nodes
         self.accumulated_knowledge = accumulated_knowledge
+        self.compactor = compactor or HistoryCompactor()
+        self.tool_concurrency = tool_concurrency
+        self.agent_name = agent_name
+        self.budget = budget or AgentBudget(agent_name)
         self.max_turns = 25
         self.entries_written = 0
 
     async def run(self) -> dict:
         await self.convex.emit_event(
             self.client_id,
-            "knowledge-writer",
+            self.agent_name,
             "info",
             f"Starting knowledge writer with {len(self.tree_nodes)} tree nodes",
         )
@@ -45,7 +60,8 @@ class KnowledgeWriterAgent:
             "You are a knowledge writer agent responsible for populating a knowledge base.\n"
             "You have verified tree nodes and accumulated knowledge from previous pipeline phases.\n"
             "Your tools:\n"
-            "- write_knowledge_entry: Write a knowledge entry to a specific tree node\n"
+            "- write_knowledge_entries: Write several knowledge entries at once (preferred)\n"
+            "- write_knowledge_entry: Write a single knowledge entry to a specific tree node\n"
             "- flag_contradiction: Flag contradictions found during writing\n\n"
             "For each tree node, generate appropriate knowledge entries based on the accumulated data.\n"
             "Each entry should have:\n"
@@ -56,7 +72,8 @@ class KnowledgeWriterAgent:
             "- confidence: A score from 0 to 1 indicating confidence in the information\n\n"
             "Write entries that are factual, well-structured, and useful for business decision-making.\n"
             "If you encounter contradictory information, flag it with flag_contradiction.\n"
-            "Process all tree nodes systematically."
+            "Process all tree nodes systematically, batching the entries of several nodes "
+            "into each write_knowledge_entries call."
         )
 
         messages = [
@@ -73,66 +90,91 @@ class KnowledgeWriterAgent:
         tools = [get_tool_schema(t) for t in KNOWLEDGE_WRITER_TOOLS]
 
         detector = ToolLoopDetector()
+        partial = False
 
         for turn in range(self.max_turns):
-            text, tool_calls_raw = await self.llm.complete_with_tools_messages(
-                messages, tools, system
-            )
-
-            if not tool_calls_raw:
-                # No more tool calls -- agent is done
-                break
-
-            # Build assistant content block
-            assistant_content = []
-            if text:
-                assistant_content.append({"type": "text", "text": text})
-            for tc in tool_calls_raw:
-                assistant_content.append(
-                    {
-                        "type": "tool_use",
-                        "id": tc["id"],
-                        "name": tc["name"],
-                        "input": tc["input"],
-                    }
-                )
-            messages.append({"role": "assistant", "content": assistant_content})
-
-            # Execute each tool call
-            tool_results = []
-            for tc in tool_calls_raw:
-                call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
-                detector.record(call.name, call.input)
-
-                if call.name == "write_knowledge_entry":
-                    self.entries_written += 1
-                    await self.convex.emit_event(
-                        self.client_id,
-                        "knowledge-writer",
-                        "progress",
-                        f"Writing entry #{self.entries_written}: {call.input.get('title', 'untitled')}",
+            try:
+                async with self.budget.limit():
+                    text, tool_calls_raw = await self.llm.complete_with_tools_messages(
+                        self.compactor.compact(messages), tools, system
                     )
 
-                result = await self.executor.execute(call)
-                tool_results.append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": call.id,
-                        "content": result.content,
-                        "is_error": result.is_error,
-                    }
-                )
-
-            messages.append({"role": "user", "content": tool_results})
-
-            # Check for stuck loops after processing all tool calls this turn
-            if detector.is_stuck():
-                logger.warning("KnowledgeWriter: loop detected, breaking")
+                    if not tool_calls_raw:
+                        # No more tool calls -- agent is done
+                        break
+
+                    # Build assistant content block
+                    assistant_content = []
+                    if text:
+                        assistant_content.append({"type": "text", "text": text})
+                    for tc in tool_calls_raw:
+                        assistant_content.append(
+                            {
+                                "type": "tool_use",
+                                "id": tc["id"],
+                                "name": tc["name"],
+                                "input": tc["input"],
+                            }
+                        )
+                    messages.append({"role": "assistant", "content": assistant_content})
+
+                    # Execute the turn's tool calls concurrently; results are collected in call order
+                    calls = [ToolCall(id=tc["id"], name=tc["name"], input=tc["input"]) for tc in tool_calls_raw]
+                    dispatcher = ToolDispatcher(self.executor.execute, max_concurrency=self.tool_concurrency)
+                    dispatcher.dispatch_all(calls)
+                    tool_results = []
+                    try:
+                        for call in calls:
+                            detector.record(call.name, call.input)
+
+                            if call.name == "write_knowledge_entry":
+                                self.entries_written += 1
+                                await self.convex.emit_event(
+                                    self.client_id,
+                                    self.agent_name,
+                                    "progress",
+                                    f"Writing entry #{self.entries_written}: {call.input.get('title', 'untitled')}",
+                                )
+                            elif call.name == "write_knowledge_entries":
+                                batch = call.input.get("entries", [])
+                                await self.convex.emit_event(
+                                    self.client_id,
+                                    self.agent_name,
+                                    "progress",
+                                    f"Writing {len(batch)} entries ({self.entries_written} written so far)",
+                                )
+
+                            result = await dispatcher.result(call)
+                            if call.name == "write_knowledge_entries" and not result.is_error:
+                                # Entries are counted once Convex has returned their ids
+                                self.entries_written += len(_CREATED_ENTRY.findall(result.content))
+                            detector.record_result(call.name, call.input, result.content, result.is_error)
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": result.content,
+                                    "is_error": result.is_error,
+                                }
+                            )
+                    except BaseException:
+                        dispatcher.cancel()
+                        raise
+
+                    messages.append({"role": "user", "content": tool_results})
+
+                    # Check for stuck loops after processing all tool calls this turn
+                    if detector.is_stuck():
+                        logger.warning(f"{self.agent_name}: loop detected, breaking")
+                        break
+            except BudgetExceeded as e:
+                logger.warning(f"{self.agent_name}: {e}, stopping with {self.entries_written} entries written")
+                partial = True
                 break
 
         await self.convex.emit_event(
             self.client_id,
-            "knowledge-writer",
+            self.agent_name,
             "complete",
             f"Knowledge writing complete: {self.entries_written} entries written",
         )
@@ -140,4 +182,5 @@ class KnowledgeWriterAgent:
         return {
             "entries_written": self.entries_written,
             "tree_nodes_processed": len(self.tree_nodes),
+            "partial": partial,
         }
@@ -2,7 +2,10 @@ import logging
 import json
 
 from ..llm.adapters import AnthropicAdapter, GeminiAdapter
+from ..llm.budget import AgentBudget, BudgetExceeded
+from ..llm.compaction import HistoryCompactor
 from ..tools.definitions import ToolCall, STRUCTURER_TOOLS, SANDBOX_TOOLS, get_tool_schema
+from ..tools.dispatch import ToolDispatcher
 from ..tools.executor import ToolExecutor
 from ..tools.loop_detection import ToolLoopDetector
 from ..storage.convex_client import ConvexClient
@@ -23,6 +26,9 @@ class StructurerAgent:
         client_id: str,
         file_refs: list[dict],
         tools: list[dict] | None = None,
+        compactor: HistoryCompactor | None = None,
+        tool_concurrency: int = 4,
+        budget: AgentBudget | None = None,
     ):
         self.claude = claude
         self.gemini = gemini
@@ -31,6 +37,9 @@ class StructurerAgent:
         self.client_id = client_id
         self.file_refs = file_refs
         self._tools = tools
+        self.compactor = compactor or HistoryCompactor()
+        self.tool_concurrency = tool_concurrency
+        self.budget = budget or AgentBudget("structurer")
         self.max_turns = 20
 
     async def run(self) -> SubAgentReport:
@@ -62,10 +71,12 @@ class StructurerAgent:
             "1. Fetch/read its content using the available tools\n"
             "2. Classify its relevance using classify_relevance\n"
             "3. Extract key facts (amounts, dates, entity names, statuses) from each resource\n"
-            "4. Write key facts to the forum via write_to_forum so other structurer batches can cross-reference\n"
-            "5. Check the forum via check_forum for findings from other structurers and compare against your facts\n"
-            "6. If you find contradictions, report EACH one with add_contradiction\n"
-            "7. When done processing all resources, send a summary to the master via message_master\n\n"
+            "4. Record each key fact with record_fact (entity, attribute, value, source); conflicting values "
+            "across all structurer batches are detected and reported as contradictions automatically\n"
+            "5. Write notable findings to the forum via write_to_forum so other structurer batches can cross-reference\n"
+            "6. Check the forum via check_forum for findings from other structurers and compare against your facts\n"
+            "7. If you find contradictions record_fact cannot express, report EACH one with add_contradiction\n"
+            "8. When done processing all resources, send a summary to the master via message_master\n\n"
 
             "## Contradiction Detection (IMPORTANT)\n"
             "You MUST actively look for contradictions between sources. Types to watch for:\n"
@@ -99,94 +110,117 @@ class StructurerAgent:
         detector = ToolLoopDetector()
 
         for turn in range(self.max_turns):
-            text, tool_calls_raw = await self.claude.complete_with_tools_messages(
-                messages, tools, system
-            )
-
-            if not tool_calls_raw:
-                # No more tool calls -- agent is done
-                if text:
-                    report.findings.append(text)
-                break
-
-            # Build assistant content block with text + tool_use blocks
-            assistant_content = []
-            if text:
-                assistant_content.append({"type": "text", "text": text})
-            for tc in tool_calls_raw:
-                assistant_content.append(
-                    {
-                        "type": "tool_use",
-                        "id": tc["id"],
-                        "name": tc["name"],
-                        "input": tc["input"],
-                    }
-                )
-            messages.append({"role": "assistant", "content": assistant_content})
-
-            # Execute each tool call
-            tool_results = []
-            for tc in tool_calls_raw:
-                call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
-                detector.record(call.name, call.input)
-
-                # Intercept add_contradiction to capture in report
-                if call.name == "add_contradiction":
-                    contradiction = {
-                        "description": call.input.get("description", ""),
-                        "source_a": call.input.get("source_a", ""),
-                        "source_b": call.input.get("source_b", ""),
-                        "value_a": call.input.get("value_a", ""),
-                        "value_b": call.input.get("value_b", ""),
-                    }
-                    report.contradictions.append(contradiction)
-                    logger.info(f"Contradiction found: {contradiction['description']}")
-
-                    # Also execute it via the executor to store in Convex
-                    result = await self.executor.execute(call)
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": call.id,
-                            "content": result.content,
-                            "is_error": result.is_error,
-                        }
-                    )
-
-                elif call.name == "message_master":
-                    # Capture the message as a finding
-                    msg = call.input.get("message", "")
-                    report.findings.append(msg)
-                    await self.convex.emit_event(
-                        self.client_id,
-                        "structurer",
-                        "progress",
-                        f"Structurer message: {msg[:200]}",
-                    )
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": call.id,
-                            "content": "Message delivered to master agent.",
-                        }
-                    )
-
-                else:
-                    result = await self.executor.execute(call)
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": call.id,
-                            "content": result.content,
-                            "is_error": result.is_error,
-                        }
-                    )
-
-            messages.append({"role": "user", "content": tool_results})
-
-            # Check for stuck loops after processing all tool calls this turn
-            if detector.is_stuck():
-                logger.warning("Structurer: loop detected, breaking")
+            # Stream the turn so tool calls start while the model is still writing later ones
+            dispatcher = ToolDispatcher(self.executor.execute, max_concurrency=self.tool_concurrency)
+            try:
+                async with self.budget.limit():
+                    text, tool_calls_raw = "", []
+                    try:
+                        async for event in self.claude.stream_with_tools_messages(
+                            self.compactor.compact(messages), tools, system
+                        ):
+                            if event["type"] == "tool_use":
+                                if event["name"] != "message_master":
+                                    dispatcher.dispatch(
+                                        ToolCall(id=event["id"], name=event["name"], input=event["input"])
+                                    )
+                            else:
+                                text, tool_calls_raw = event["text"], event["tool_calls"]
+                    except BaseException:
+                        dispatcher.cancel()
+                        raise
+
+                    if not tool_calls_raw:
+                        # No more tool calls -- agent is done
+                        if text:
+                            report.findings.append(text)
+                        break
+
+                    # Build assistant content block with text + tool_use blocks
+                    assistant_content = []
+                    if text:
+                        assistant_content.append({"type": "text", "text": text})
+                    for tc in tool_calls_raw:
+                        assistant_content.append(
+                            {
+                                "type": "tool_use",
+                                "id": tc["id"],
+                                "name": tc["name"],
+                                "input": tc["input"],
+                            }
+                        )
+                    messages.append({"role": "assistant", "content": assistant_content})
+
+                    # Execute each tool call
+                    tool_results = []
+                    for tc in tool_calls_raw:
+                        call = ToolCall(id=tc["id"], name=tc["name"], input=tc["input"])
+                        detector.record(call.name, call.input)
+
+                        # Intercept add_contradiction to capture in report
+                        if call.name == "add_contradiction":
+                            contradiction = {
+                                "description": call.input.get("description", ""),
+                                "source_a": call.input.get("source_a", ""),
+                                "source_b": call.input.get("source_b", ""),
+                                "value_a": call.input.get("value_a", ""),
+                                "value_b": call.input.get("value_b", ""),
+                            }
+                            report.contradictions.append(contradiction)
+                            logger.info(f"Contradiction found: {contradiction['description']}")
+
+                            # Also execute it via the executor to store in Convex
+                            result = await dispatcher.result(call)
+                            detector.record_result(call.name, call.input, result.content, result.is_error)
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": result.content,
+                                    "is_error": result.is_error,
+                                }
+                            )
+
+                        elif call.name == "message_master":
+                            # Capture the message as a finding
+                            msg = call.input.get("message", "")
+                            report.findings.append(msg)
+                            await self.convex.emit_event(
+                                self.client_id,
+                                "structurer",
+                                "progress",
+                                f"Structurer message: {msg[:200]}",
+                            )
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": "Message delivered to master agent.",
+                                }
+                            )
+
+                        else:
+                            result = await dispatcher.result(call)
+                            detector.record_result(call.name, call.input, result.content, result.is_error)
+                            tool_results.append(
+                                {
+                                    "type": "tool_result",
+                                    "tool_use_id": call.id,
+                                    "content": result.content,
+                                    "is_error": result.is_error,
+                                }
+                            )
+
+                    messages.append({"role": "user", "content": tool_results})
+
+                    # Check for stuck loops after processing all tool calls this turn
+                    if detector.is_stuck():
+                        logger.warning("Structurer: loop detected, breaking")
+                        break
+            except BudgetExceeded as e:
+                dispatcher.cancel()
+                logger.warning(f"Structurer: {e}, returning partial report")
+                report.partial = True
                 break
 
         await self.convex.emit_event(
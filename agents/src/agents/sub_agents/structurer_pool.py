@@ -0,0 +1,128 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Awaitable, Callable
+
+from ..storage.context import SubAgentReport
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a resource when the explorer did not report one, by MIME type prefix
+_DEFAULT_BYTES = {
+    "application/pdf": 300_000,
+    "application/vnd.google-apps.spreadsheet": 100_000,
+    "application/vnd.openxmlformats-officedocument": 150_000,
+    "application/vnd.google-apps.document": 50_000,
+    "image/": 500_000,
+    "audio/": 2_000_000,
+    "video/": 10_000_000,
+    "message/": 10_000,
+}
+_FALLBACK_BYTES = 20_000
+_CHARS_PER_TOKEN = 4
+# Extracted text is much smaller than the raw file; cap the per-file token estimate
+_MAX_TOKENS_PER_REF = 25_000
+
+
+def estimate_ref_cost(ref: dict) -> tuple[int, int]:
+    """Estimated (bytes, tokens) it takes a structurer to process one file ref."""
+    size = ref.get("size") or ref.get("sizeBytes") or ref.get("size_bytes")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        mime = str(ref.get("mimeType") or ref.get("mime_type") or "")
+        size = next((b for prefix, b in _DEFAULT_BYTES.items() if mime.startswith(prefix)), _FALLBACK_BYTES)
+    ref_tokens = len(json.dumps(ref, default=str)) // _CHARS_PER_TOKEN
+    return size, ref_tokens + min(size // _CHARS_PER_TOKEN, _MAX_TOKENS_PER_REF)
+
+
+class StructurerPool:
+    """Shared queue of file refs consumed by a fixed number of structurer workers.
+
+    Each worker repeatedly takes the next batch — as many queued refs as fit in
+    the byte/token/item limits, at least one — and runs a structurer over it, so
+    load balances itself: a worker stuck on large PDFs simply takes fewer batches.
+    Refs can be submitted while workers are running; close() marks the end of input.
+    on_progress(completed, submitted) is awaited after every batch.
+
+    Usage:
+        pool = StructurerPool(run_batch, workers=3)
+        pool.submit(file_refs)
+        pool.close()
+        reports = await pool.run()
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[int, list[dict]], Awaitable[SubAgentReport]],
+        workers: int = 3,
+        batch_max_bytes: int = 20_000_000,
+        batch_max_tokens: int = 60_000,
+        batch_max_items: int = 10,
+        on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    ):
+        self._run_batch = run_batch
+        self.workers = max(1, workers)
+        self._batch_max_bytes = batch_max_bytes
+        self._batch_max_tokens = batch_max_tokens
+        self._batch_max_items = max(1, batch_max_items)
+        self._on_progress = on_progress
+        self._pending: deque[dict] = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self.submitted = 0
+        self.completed = 0
+
+    def submit(self, refs: list[dict]) -> None:
+        if self._closed:
+            raise RuntimeError("StructurerPool is closed")
+        self._pending.extend(refs)
+        self.submitted += len(refs)
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """No more refs will be submitted; workers exit once the queue drains."""
+        self._closed = True
+        self._wakeup.set()
+
+    async def run(self) -> list[SubAgentReport]:
+        results = await asyncio.gather(*[self._worker(i) for i in range(self.workers)])
+        return [report for reports in results for report in reports]
+
+    async def _next_batch(self) -> list[dict]:
+        """Wait for the next ref, then greedily add queued refs while they fit. Empty means closed."""
+        while not self._pending:
+            if self._closed:
+                return []
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        # Never take more than a fair share of what is queued, so idle workers get work too
+        max_items = min(self._batch_max_items, -(-len(self._pending) // self.workers))
+        first = self._pending.popleft()
+        batch = [first]
+        total_bytes, total_tokens = estimate_ref_cost(first)
+        while self._pending and len(batch) < max_items:
+            ref_bytes, ref_tokens = estimate_ref_cost(self._pending[0])
+            if total_bytes + ref_bytes > self._batch_max_bytes or total_tokens + ref_tokens > self._batch_max_tokens:
+                break
+            batch.append(self._pending.popleft())
+            total_bytes += ref_bytes
+            total_tokens += ref_tokens
+        return batch
+
+    async def _worker(self, worker_id: int) -> list[SubAgentReport]:
+        reports = []
+        while batch := await self._next_batch():
+            logger.info(f"Structurer worker {worker_id}: batch of {len(batch)} refs ({len(self._pending)} queued)")
+            try:
+                reports.append(await self._run_batch(worker_id, batch))
+            except Exception as e:
+                logger.error(f"Structurer worker {worker_id} batch failed: {e}")
+            self.completed += len(batch)
+            if self._on_progress is not None:
+                try:
+                    await self._on_progress(self.completed, self.submitted)
+                except Exception as e:
+                    logger.warning(f"Structurer progress callback failed: {e}")
+        return reports
@@ -7,6 +7,8 @@ class ToolDefinition:
     name: str
     description: str
     parameters: dict[str, Any]
+    serial: bool = False  # side effects must stay ordered: never run concurrently with other calls
+    terminal: bool = False  # a successful call ends the agent loop without another model turn
 
 
 @dataclass
@@ -153,6 +155,7 @@ EXPLORER_TOOLS = [
             },
             "required": ["summary", "discovered_files"],
         },
+        terminal=True,
     ),
     ToolDefinition(
         name="check_forum",
@@ -223,6 +226,27 @@ STRUCTURER_TOOLS = [
             "required": ["description", "source_a", "source_b", "value_a", "value_b"],
         },
     ),
+    ToolDefinition(
+        name="record_fact",
+        description=(
+            "Record one structured fact (e.g. entity='Invoice INV-2041', attribute='amount', value='12500 EUR'). "
+            "Facts from all structurers are compared automatically: a conflicting value for the same "
+            "entity and attribute is reported as a contradiction for you"
+        ),
+        parameters={
+            "properties": {
+                "entity": {"type": "string", "description": "What the fact is about (invoice, contract, company, person)"},
+                "attribute": {"type": "string", "description": "Which property (amount, due_date, status, address)"},
+                "value": {"type": "string", "description": "The value as stated in the source"},
+                "source": {"type": "string", "description": "Reference to the source (file name/ID, email subject)"},
+                "timestamp": {
+                    "type": "string",
+                    "description": "Date the value applies to, if the source states one (YYYY-MM-DD)",
+                },
+            },
+            "required": ["entity", "attribute", "value", "source"],
+        },
+    ),
     ToolDefinition(
         name="message_master",
         description="Send a message to the master agent with findings or questions",
@@ -288,6 +312,7 @@ MASTER_TOOLS = [
             },
             "required": ["nodes"],
         },
+        terminal=True,
     ),
     ToolDefinition(
         name="generate_questionnaire",
@@ -310,6 +335,7 @@ MASTER_TOOLS = [
             },
             "required": ["title", "questions"],
         },
+        terminal=True,
     ),
     ToolDefinition(
         name="advance_phase",
@@ -321,6 +347,7 @@ MASTER_TOOLS = [
             },
             "required": ["next_phase", "reason"],
         },
+        serial=True,
     ),
 ]
 
@@ -339,6 +366,7 @@ SANDBOX_TOOLS = [
             },
             "required": ["file_id"],
         },
+        serial=True,  # writes the workspace: reads in the same turn must see the finished file
     ),
     ToolDefinition(
         name="run_command",
@@ -361,6 +389,7 @@ SANDBOX_TOOLS = [
             },
             "required": ["command"],
         },
+        serial=True,
     ),
     ToolDefinition(
         name="read_local_file",
@@ -394,6 +423,24 @@ SANDBOX_TOOLS = [
             },
             "required": ["package"],
         },
+        serial=True,
+    ),
+    ToolDefinition(
+        name="read_result",
+        description=(
+            "Read part of a large tool result that was saved to the workspace instead of being shown in full. "
+            "Page through it with offset/length, or pick a value out of a JSON result with json_path "
+            "(e.g. 'messages[3].subject')."
+        ),
+        parameters={
+            "properties": {
+                "handle": {"type": "string", "description": "Result handle from the truncated output (e.g. 'r2')"},
+                "offset": {"type": "integer", "description": "Character offset to start from (default 0)", "default": 0},
+                "length": {"type": "integer", "description": "Characters to read (default 8000)", "default": 8000},
+                "json_path": {"type": "string", "description": "Dotted path into a JSON result (optional)"},
+            },
+            "required": ["handle"],
+        },
     ),
 ]
 
@@ -413,6 +460,32 @@ KNOWLEDGE_WRITER_TOOLS = [
             "required": ["tree_node_id", "title", "content", "confidence"],
         },
     ),
+    ToolDefinition(
+        name="write_knowledge_entries",
+        description=(
+            "Write several knowledge entries in one call (preferred over write_knowledge_entry). "
+            "Returns the result of each entry; failed entries can be retried on their own"
+        ),
+        parameters={
+            "properties": {
+                "entries": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tree_node_id": {"type": "string", "description": "ID of the tree node to attach to"},
+                            "title": {"type": "string"},
+                            "content": {"type": "string"},
+                            "source_ref": {"type": "string"},
+                            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+                        },
+                        "required": ["tree_node_id", "title", "content", "confidence"],
+                    },
+                },
+            },
+            "required": ["entries"],
+        },
+    ),
     ToolDefinition(
         name="flag_contradiction",
         description="Flag a new contradiction found during knowledge writing",
@@ -428,3 +501,27 @@ KNOWLEDGE_WRITER_TOOLS = [
         },
     ),
 ]
+
+_ALL_TOOLS = EXPLORER_TOOLS + STRUCTURER_TOOLS + MASTER_TOOLS + SANDBOX_TOOLS + KNOWLEDGE_WRITER_TOOLS
+SERIAL_TOOLS = frozenset(t.name for t in _ALL_TOOLS if t.serial)
+TERMINAL_TOOLS = frozenset(t.name for t in _ALL_TOOLS if t.terminal)
+
+
+def is_serial_tool(name: str) -> bool:
+    """Whether calls to this tool must not overlap other calls in the same turn.
+
+    Tools not defined here (e.g. Composio's Google Workspace tools) are reads and run concurrently.
+    """
+    return name in SERIAL_TOOLS
+
+
+def is_terminal_tool(name: str) -> bool:
+    return name in TERMINAL_TOOLS
+
+
+def terminal_tool_succeeded(tool_calls: list[dict], tool_results: list[dict]) -> bool:
+    """Whether a terminal tool succeeded this turn (tool_results in tool_calls order)."""
+    return any(
+        is_terminal_tool(tc["name"]) and not result.get("is_error")
+        for tc, result in zip(tool_calls, tool_results)
+    )
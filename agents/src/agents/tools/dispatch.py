@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from .definitions import ToolCall, ToolResult, is_serial_tool
+
+logger = logging.getLogger(__name__)
+
+
+class ToolDispatcher:
+    """Starts tool calls as soon as the model has finished emitting them.
+
+    Used with streaming completions: each tool_use block is dispatched the moment
+    it is complete, so tool I/O overlaps with the model still writing later calls.
+    Independent calls run concurrently, at most max_concurrency at a time. Serial
+    tools (ToolDefinition.serial) act as barriers: a serial call waits for every
+    call dispatched before it, and later calls wait for it. Results are collected
+    per call, so callers keep tool_result order regardless of completion order.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[ToolCall], Awaitable[ToolResult]],
+        max_concurrency: int = 4,
+        is_serial: Callable[[str], bool] = is_serial_tool,
+    ):
+        self._execute = execute
+        self._is_serial = is_serial
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._barrier: asyncio.Task | None = None  # last serial call
+        self._since_barrier: list[asyncio.Task] = []  # concurrent calls dispatched after it
+
+    def dispatch(self, call: ToolCall) -> None:
+        if self._is_serial(call.name):
+            waits_for = self._since_barrier + ([self._barrier] if self._barrier else [])
+            task = asyncio.create_task(self._run(call, waits_for))
+            self._barrier = task
+            self._since_barrier = []
+        else:
+            task = asyncio.create_task(self._run(call, [self._barrier] if self._barrier else []))
+            self._since_barrier.append(task)
+        self._tasks[call.id] = task
+
+    def dispatch_all(self, calls: list[ToolCall]) -> None:
+        for call in calls:
+            self.dispatch(call)
+
+    async def _run(self, call: ToolCall, waits_for: list[asyncio.Task]) -> ToolResult:
+        if waits_for:
+            await asyncio.wait(waits_for)
+        async with self._semaphore:
+            return await self._execute(call)
+
+    async def result(self, call: ToolCall) -> ToolResult:
+        """Return the result for call, executing it now if it was never dispatched."""
+        task = self._tasks.pop(call.id, None)
+        if task is None:
+            return await self._execute(call)
+        return await task
+
+    def cancel(self) -> None:
+        """Cancel every dispatched call that has not been collected yet."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._barrier = None
+        self._since_barrier = []
@@ -1,8 +1,10 @@
+import asyncio
 import logging
 
 from .definitions import ToolCall, ToolResult
 from .executor import ToolExecutor
 from ..integrations.composio_client import ComposioIntegration
+from ..sandbox.result_store import ResultStore
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +17,13 @@ class HybridToolExecutor:
         custom_executor: ToolExecutor,
         composio: ComposioIntegration | None = None,
         composio_user_id: str = "",
+        result_store: ResultStore | None = None,
     ):
         self.custom_executor = custom_executor
         self.composio = composio
         self.composio_user_id = composio_user_id
+        # When set, oversized Composio results are spilled to the workspace instead of cut
+        self.result_store = result_store
 
     async def execute(self, tool_call: ToolCall) -> ToolResult:
         """Route tool call to appropriate executor."""
@@ -30,9 +35,14 @@ class HybridToolExecutor:
         """Execute a Composio tool call."""
         try:
             logger.info(f"Executing Composio tool: {tool_call.name}")
-            content = self.composio.execute_tool(
-                tool_call.name, tool_call.input, self.composio_user_id
+            # The Composio SDK is blocking; run it off the loop so concurrent calls overlap
+            spilling = self.result_store is not None and self.result_store.enabled
+            max_chars = self.result_store.max_chars if spilling else None
+            content = await asyncio.to_thread(
+                self.composio.execute_tool, tool_call.name, tool_call.input, self.composio_user_id, max_chars
             )
+            if spilling:
+                content = self.result_store.spill(tool_call.name, content)
             return ToolResult(tool_call_id=tool_call.id, content=content)
         except Exception as e:
             logger.error(f"Composio tool {tool_call.name} failed: {e}")
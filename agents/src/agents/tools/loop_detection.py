@@ -1,16 +1,66 @@
 """Mechanical tool-loop detector for agent loops.
 
 Inspired by OpenClaw's tool-loop-detection.ts. Detects when an agent
-is stuck repeating the same tool calls and signals the loop to break.
+is stuck repeating the same tool calls, or making different calls that
+keep returning the same result, and signals the loop to break.
 """
 
 import hashlib
 import json
 import logging
+import re
 from collections import deque
 
 logger = logging.getLogger(__name__)
 
+# Version specifiers (==, >=, <=, ~=, !=, <, >) in install commands
+_VERSION_SPEC = re.compile(r'[><=!~]=?\s*[\d\w.*]+')
+
+
+def _hash(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class _WindowCounter:
+    """Counts of the last maxlen keys, updated in O(1) per append.
+
+    Tracks how many keys currently reach threshold, so "is any key at or
+    above the threshold" needs no scan.
+    """
+
+    def __init__(self, maxlen: int, threshold: int):
+        self._window: deque[str] = deque()
+        self._maxlen = maxlen
+        self._threshold = threshold
+        self._counts: dict[str, int] = {}
+        self.over_threshold = 0
+
+    def append(self, key: str) -> None:
+        if len(self._window) == self._maxlen:
+            self._discard(self._window.popleft())
+        self._window.append(key)
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if count == self._threshold:
+            self.over_threshold += 1
+
+    def _discard(self, key: str) -> None:
+        count = self._counts[key]
+        if count == self._threshold:
+            self.over_threshold -= 1
+        if count == 1:
+            del self._counts[key]
+        else:
+            self._counts[key] = count - 1
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._counts.clear()
+        self.over_threshold = 0
+
 
 class ToolLoopDetector:
     """Detects stuck agent loops by tracking repeated tool call patterns.
@@ -21,16 +71,36 @@ class ToolLoopDetector:
             ...
             for tc in tool_calls:
                 detector.record(tc["name"], tc["input"])
+                result = ...
+                detector.record_result(tc["name"], tc["input"], result.content, result.is_error)
             if detector.is_stuck():
                 logger.warning("Agent stuck in loop, breaking")
                 break
+
+    record_result is optional; without it only call repetition is detected.
+    Short successful results ("Fact recorded.") are acknowledgements rather
+    than data and are not compared.
     """
 
-    def __init__(self, repeat_threshold: int = 3, history_size: int = 20, name_frequency_multiplier: int = 4):
+    def __init__(
+        self,
+        repeat_threshold: int = 3,
+        history_size: int = 20,
+        name_frequency_multiplier: int = 4,
+        stall_threshold: int = 4,
+        min_result_chars: int = 32,
+    ):
         self._repeat_threshold = repeat_threshold
-        self._name_frequency_multiplier = name_frequency_multiplier
-        self._history: deque[str] = deque(maxlen=history_size)
-        self._name_history: deque[str] = deque(maxlen=history_size)
+        self._history_size = history_size
+        self._min_result_chars = min_result_chars
+        self._calls = _WindowCounter(history_size, repeat_threshold)
+        self._names = _WindowCounter(history_size, repeat_threshold * name_frequency_multiplier)
+        # Distinct calls per identical result: a (result, call) pair is counted once
+        self._stall_threshold = stall_threshold
+        self._results: deque[tuple[str, str]] = deque()
+        self._result_pairs: dict[tuple[str, str], int] = {}
+        self._result_calls: dict[str, int] = {}
+        self._stalled_results = 0
 
     @staticmethod
     def _normalize_args(tool_name: str, tool_args: dict) -> dict:
@@ -39,45 +109,68 @@ class ToolLoopDetector:
             normalized = {}
             for k, v in tool_args.items():
                 if isinstance(v, str) and k in ("command", "package"):
-                    # Strip version specifiers (==, >=, <=, ~=, !=, <, >)
-                    import re
-                    v = re.sub(r'[><=!~]=?\s*[\d\w.*]+', '', v)
-                    # Normalize whitespace
-                    v = ' '.join(v.split())
+                    v = ' '.join(_VERSION_SPEC.sub('', v).split())
                 normalized[k] = v
             return normalized
         return tool_args
 
+    def _call_hash(self, tool_name: str, tool_args: dict) -> str:
+        normalized = self._normalize_args(tool_name, tool_args)
+        return _hash(f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}")
+
     def record(self, tool_name: str, tool_args: dict) -> None:
         """Record a tool call. Call once per tool invocation."""
-        normalized = self._normalize_args(tool_name, tool_args)
-        key = f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
-        h = hashlib.md5(key.encode()).hexdigest()
-        self._history.append(h)
-        self._name_history.append(tool_name)
+        self._calls.append(self._call_hash(tool_name, tool_args))
+        self._names.append(tool_name)
+
+    def record_result(self, tool_name: str, tool_args: dict, content: str, is_error: bool = False) -> None:
+        """Record what a call returned, to catch different calls making no progress."""
+        content = str(content)
+        if not is_error and len(content) < self._min_result_chars:
+            return
+        pair = (_hash(f"{tool_name}:{content}"), self._call_hash(tool_name, tool_args))
+        if len(self._results) == self._history_size:
+            self._discard_result(self._results.popleft())
+        self._results.append(pair)
+        self._result_pairs[pair] = self._result_pairs.get(pair, 0) + 1
+        if self._result_pairs[pair] == 1:
+            result = pair[0]
+            self._result_calls[result] = self._result_calls.get(result, 0) + 1
+            if self._result_calls[result] == self._stall_threshold:
+                self._stalled_results += 1
+
+    def _discard_result(self, pair: tuple[str, str]) -> None:
+        self._result_pairs[pair] -= 1
+        if self._result_pairs[pair]:
+            return
+        del self._result_pairs[pair]
+        result = pair[0]
+        if self._result_calls[result] == self._stall_threshold:
+            self._stalled_results -= 1
+        self._result_calls[result] -= 1
+        if not self._result_calls[result]:
+            del self._result_calls[result]
 
     def is_stuck(self) -> bool:
-        """Return True if:
+        """Return True if, within the recent history:
         - any exact call (same tool + same args) repeats >= repeat_threshold times, OR
-        - any single tool name appears >= repeat_threshold * name_frequency_multiplier times (catches varied-args loops).
+        - any single tool name appears >= repeat_threshold * name_frequency_multiplier times (catches varied-args loops), OR
+        - stall_threshold different calls to a tool returned the identical result (no progress).
         """
-        if len(self._history) < self._repeat_threshold:
+        if len(self._calls) < self._repeat_threshold:
             return False
-        from collections import Counter
-
-        exact_counts = Counter(self._history)
-        for count in exact_counts.values():
-            if count >= self._repeat_threshold:
-                return True
-
-        name_counts = Counter(self._name_history)
-        for count in name_counts.values():
-            if count >= self._repeat_threshold * self._name_frequency_multiplier:
-                return True
-
+        if self._calls.over_threshold or self._names.over_threshold:
+            return True
+        if self._stalled_results:
+            logger.info("Tool loop: different calls keep returning the same result")
+            return True
         return False
 
     def reset(self) -> None:
         """Clear history."""
-        self._history.clear()
-        self._name_history.clear()
+        self._calls.clear()
+        self._names.clear()
+        self._results.clear()
+        self._result_pairs.clear()
+        self._result_calls.clear()
+        self._stalled_results = 0
@@ -0,0 +1,135 @@
+"""Run MasterAgent.run against scripted backends through a cassette.
+
+    python tests/cassette_pipeline.py record|replay CASSETTE
+
+Used by test_cassette.py, which records and replays in separate processes
+(with different hash seeds) so anything that differs between runs shows up
+as a CassetteMiss. In replay the backends raise if they are ever reached.
+"""
+
+import asyncio
+import json
+import sys
+
+from agents.cassette import RECORD, REPLAY, Cassette, CassetteConvexClient, CassetteLLM
+from agents.master_agent import MasterAgent
+from agents.storage.convex_client import ConvexClient
+
+DATA_SOURCES = [
+    {"_id": "ds_gmail", "type": "gmail", "label": "Company Gmail"},
+    {"_id": "ds_drive", "type": "drive", "label": "Company Drive"},
+]
+
+
+class ScriptedLLM:
+    """Answers from the conversation alone, so concurrent agents get the same replies on every run."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _turn(self, messages: list[dict], system: str) -> list[dict]:
+        turn = sum(1 for m in messages if m["role"] == "assistant")
+        if "explorer agent" in system:
+            source = "gmail" if "gmail data source" in system else "drive"
+            if turn == 0:
+                return [
+                    {"id": f"toolu_{source}_0", "name": "list_workspace", "input": {}},
+                    {"id": f"toolu_{source}_1", "name": "run_command", "input": {"command": "pwd"}},
+                ]
+            if turn == 1:
+                return [{
+                    "id": f"toolu_{source}_2",
+                    "name": "report_metrics",
+                    "input": {
+                        "summary": f"{source}: 2 invoices",
+                        "discovered_files": [
+                            {"id": f"{source}-inv-1", "name": "INV-2041.pdf", "mimeType": "application/pdf"},
+                            {"id": f"{source}-inv-2", "name": "INV-2042.pdf", "mimeType": "application/pdf"},
+                        ],
+                    },
+                }]
+        return []
+
+    async def complete(self, prompt: str, system: str = "") -> str:
+        self.calls += 1
+        return "{}"
+
+    async def complete_with_tools_messages(self, messages, tools, system=""):
+        self.calls += 1
+        return "", self._turn(messages, system)
+
+    async def stream_with_tools_messages(self, messages, tools, system=""):
+        self.calls += 1
+        calls = self._turn(messages, system)
+        for call in calls:
+            yield {"type": "tool_use", **call}
+        yield {"type": "done", "text": "", "tool_calls": calls}
+
+    async def cleanup_files(self):
+        pass
+
+
+class UnreachableLLM:
+    def __getattr__(self, name):
+        raise AssertionError(f"replay reached the LLM ({name})")
+
+    async def cleanup_files(self):
+        pass
+
+
+class ScriptedConvex(ConvexClient):
+    """Convex backend stand-in behind the cassette."""
+
+    async def _post(self, path, payload, critical=False, missing_route_ok=False):
+        if path == "/api/agent/forum/list":
+            return {"results": []}
+        if path == "/api/agent/forum/search":
+            return {"results": []}
+        if path == "/api/agent/forum/create-batch":
+            return {"ids": [f"forum_{i}" for i in range(len(payload["entries"]))]}
+        if path == "/api/agent/knowledge/entries":
+            return {"results": [{"id": f"entry_{i}"} for i in range(len(payload["entries"]))]}
+        return {"id": f"id_{len(json.dumps(payload, sort_keys=True))}"}
+
+    async def _get(self, path: str) -> dict | None:
+        return {}
+
+
+class UnreachableConvex(ConvexClient):
+    async def _post(self, path, payload, critical=False, missing_route_ok=False):
+        raise AssertionError(f"replay reached Convex (POST {path})")
+
+    async def _get(self, path: str) -> dict | None:
+        raise AssertionError(f"replay reached Convex (GET {path})")
+
+
+async def run_pipeline(mode: str, path: str) -> dict:
+    cassette = Cassette(path, mode)
+    recording = mode == RECORD
+    llm = CassetteLLM(ScriptedLLM() if recording else UnreachableLLM(), cassette, "anthropic")
+    backend = ScriptedConvex if recording else UnreachableConvex
+    # CassetteConvexClient's super() calls land on the stand-in backend
+    convex_cls = type("Convex", (CassetteConvexClient, backend), {})
+    async with convex_cls("http://convex.invalid", "token", cassette=cassette) as convex:
+        master = MasterAgent(
+            claude=llm,
+            gemini=llm,
+            convex=convex,
+            google=None,
+            client_id="cassette_test",
+            verify_timeout=0,
+            deterministic_workspaces=True,
+        )
+        await master.run(DATA_SOURCES)
+    return {
+        "calls": cassette.stats["calls"],
+        "misses": cassette.stats["misses"],
+        "unused": cassette.unused() if mode == REPLAY else 0,
+        "reports": len(master.state.sub_agent_reports),
+    }
+
+
+if __name__ == "__main__":
+    mode, path = sys.argv[1], sys.argv[2]
+    assert mode in (RECORD, REPLAY)
+    print(json.dumps(asyncio.run(run_pipeline(mode, path))))
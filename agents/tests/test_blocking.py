@@ -0,0 +1,122 @@
+from agents.storage.blocking import block_findings, extract
+
+
+def test_document_numbers_meet_across_formats():
+    keys = [extract("s", text).keys for text in (
+        "Invoice INV-2041 from Acme Corp is paid",
+        "inv 2041 total $12,500",
+        "Facture #2041 (invoice no. 2041)",
+    )]
+    assert all("doc:2041" in k for k in keys)
+
+
+def test_short_document_ids_keep_their_letters_and_quantities_are_not_ids():
+    assert "doc:C77" in extract("s", "Contract C-77 signed").keys
+    assert not extract("s", "order 5 units").keys
+
+
+def test_slash_dates_are_day_first():
+    assert extract("s", "Due 03/04/2024").dates == {"2024-04-03"}
+
+
+def test_text_and_iso_dates_normalize_to_the_same_value():
+    assert extract("s", "paid on March 3rd, 2024").dates == {"2024-03-03"}
+    assert extract("s", "paid on 3 Mar 2024").dates == {"2024-03-03"}
+    assert extract("s", "paid on 2024-03-03").dates == {"2024-03-03"}
+
+
+def test_amounts_normalize_currency_separators_and_thousands_suffix():
+    assert extract("s", "amount €12.5k").amounts == {"EUR12500.00"}
+    assert extract("s", "Paid 12,500 EUR").amounts == {"EUR12500.00"}
+    assert extract("s", "total $12,500").amounts == {"USD12500.00"}
+
+
+def test_statuses_are_aliased():
+    assert extract("s", "Invoice is outstanding").statuses == {"unpaid"}
+    assert extract("s", "Order canceled").statuses == {"cancelled"}
+
+
+def test_stop_words_and_months_are_not_entities():
+    assert extract("s", "Invoice Jane Doe sent").keys == {"entity:jane doe"}
+    assert not extract("s", "March Payments Review done").keys
+    assert not extract("s", "The Total Amount Due is open").keys
+
+
+def test_entities_and_email_domains_are_keys():
+    keys = extract("s", "Acme Corp wrote from bob@acme.co.uk").keys
+    assert {"entity:acme corp", "domain:acme.co.uk"} <= keys
+
+
+def test_conflicting_findings_on_a_shared_key_are_grouped():
+    groups, stats = block_findings([
+        ("gmail", "Invoice INV-2041 is paid, total $12,500"),
+        ("drive", "inv 2041 is unpaid, total $12,500"),
+        ("drive", "Unrelated note about the office move"),
+    ])
+    assert [g.key for g in groups] == ["doc:2041"]
+    assert groups[0].conflicts == ["status"]
+    assert [f.source for f in groups[0].findings] == ["gmail", "drive"]
+    assert stats["findings"] == 3
+    assert stats["unkeyed_findings"] == 1
+
+
+def test_agreeing_findings_are_not_grouped():
+    groups, _ = block_findings([
+        ("gmail", "Invoice INV-2041 is paid, total $12,500"),
+        ("drive", "INV 2041: paid. Amount 12,500 USD"),
+    ])
+    assert groups == []
+
+
+def test_findings_without_a_value_do_not_count_as_disagreeing():
+    groups, _ = block_findings([
+        ("gmail", "Invoice INV-2041 is paid"),
+        ("drive", "Invoice INV-2041 total $12,500"),
+    ])
+    assert groups == []
+
+
+def test_keys_with_the_same_members_are_merged_under_the_document_key():
+    groups, _ = block_findings([
+        ("gmail", "Acme Corp invoice INV-2041 is paid"),
+        ("drive", "Acme Corp invoice INV-2041 is unpaid"),
+    ])
+    assert len(groups) == 1
+    assert groups[0].key == "doc:2041"
+
+
+def test_findings_from_a_single_source_are_not_grouped():
+    groups, stats = block_findings([
+        ("batch-1", "Invoice INV-2041 is paid"),
+        ("batch-1", "Invoice INV-2041 is unpaid"),
+        ("batch-2", "Invoice INV-7 is paid"),
+    ])
+    assert groups == []
+    assert stats["single_source_blocks"] == 1
+
+
+def test_oversized_blocks_are_dropped():
+    findings = [(f"batch-{i}", f"Acme Corp payment {i} is {'paid' if i % 2 else 'unpaid'}") for i in range(5)]
+    groups, stats = block_findings(findings, max_block_size=4)
+    assert groups == []
+    assert stats["oversized_blocks"] == 1
+
+
+def test_render_lists_every_finding_with_its_source():
+    groups, _ = block_findings([
+        ("gmail", "Invoice INV-2041 is paid"),
+        ("drive", "Invoice INV-2041 is unpaid"),
+    ])
+    rendered = groups[0].render()
+    assert rendered.startswith("Shared key: doc:2041 (conflicting status)")
+    assert "- [gmail] Invoice INV-2041 is paid" in rendered
+    assert "- [drive] Invoice INV-2041 is unpaid" in rendered
+
+
+def test_merged_group_label_does_not_depend_on_set_order():
+    groups, _ = block_findings([
+        ("gmail", "Acme Corp (bob@acme.com) says the retainer is paid"),
+        ("drive", "Acme Corp (bob@acme.com) says the retainer is unpaid"),
+    ])
+    # Same members and size: the alphabetically first key labels the group
+    assert [g.key for g in groups] == ["domain:acme.com"]
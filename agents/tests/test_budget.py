@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import agents.master_agent as master_agent
+from agents.llm.budget import AgentBudget, BudgetExceeded
+from agents.storage.context import SubAgentReport
+
+
+def test_unstarted_budget_has_no_deadline_until_started():
+    budget = AgentBudget("structure", deadline_s=5, start=False)
+    assert budget.remaining_s() is None
+    budget.start()
+    assert 4.9 < budget.remaining_s() <= 5
+
+
+def test_child_inherits_the_nearer_deadline():
+    parent = AgentBudget("phase", deadline_s=1)
+    child = AgentBudget("agent", deadline_s=10, parent=parent)
+    assert child.remaining_s() <= 1
+
+
+def test_limit_turns_the_deadline_into_budget_exceeded():
+    async def main():
+        budget = AgentBudget("agent", deadline_s=0.05)
+        with pytest.raises(BudgetExceeded):
+            async with budget.limit():
+                await asyncio.sleep(1)
+
+    asyncio.run(main())
+
+
+def test_tokens_are_charged_to_parents():
+    parent = AgentBudget("phase", max_tokens=100)
+    child = AgentBudget("agent", parent=parent)
+    child.charge(100)
+    with pytest.raises(BudgetExceeded):
+        child.check()
+
+
+class _SlowExplorer:
+    def __init__(self, **kwargs):
+        self.source_type = kwargs["source_type"]
+
+    async def run(self):
+        await asyncio.sleep(0.5)
+        return SubAgentReport(agent_name=f"explorer-{self.source_type}", source_type=self.source_type)
+
+
+class _Convex:
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            return [] if name == "list_forum_entries" else {"id": name}
+
+        return call
+
+
+def test_pipelined_structure_deadline_starts_after_exploration(monkeypatch):
+    monkeypatch.setattr(master_agent, "ExplorerAgent", _SlowExplorer)
+    master = master_agent.MasterAgent(
+        claude=None, gemini=None, convex=_Convex(), google=None, client_id="c",
+        pipelined_phases=True, phase_deadline_s=1, forum_replica=False,
+    )
+    monkeypatch.setattr(master, "_build_explorer_executor", lambda ws: None)
+    monkeypatch.setattr(master, "_get_explorer_tools", lambda executor, source_type: [])
+    remaining = []
+
+    async def structure_phase(structuring=None):
+        remaining.append(master._phase_budget.remaining_s())
+        structuring.cancel()
+
+    monkeypatch.setattr(master, "run_structure_phase", structure_phase)
+
+    asyncio.run(master._run_explore_and_structure_pipelined([{"_id": "1", "type": "drive", "label": "D"}]))
+    # Exploration took half the deadline; none of it counts against structuring
+    assert remaining[0] > 0.9
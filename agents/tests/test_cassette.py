@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+HARNESS = Path(__file__).with_name("cassette_pipeline.py")
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _run(mode: str, cassette: Path, hash_seed: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": str(SRC), "PYTHONHASHSEED": hash_seed}
+    proc = subprocess.run(
+        [sys.executable, str(HARNESS), mode, str(cassette)],
+        env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-3000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_pipeline_replays_from_recording(tmp_path):
+    cassette = tmp_path / "pipeline.jsonl"
+    recorded = _run("record", cassette, hash_seed="1")
+    # A different hash seed reorders sets: anything set-ordered in a request would miss
+    replayed = _run("replay", cassette, hash_seed="2")
+
+    assert recorded["calls"] > 0
+    assert replayed["misses"] == 0
+    assert replayed["unused"] == 0
+    assert replayed["reports"] == recorded["reports"]
@@ -0,0 +1,43 @@
+from agents.llm.compaction import HistoryCompactor
+from agents.sandbox.result_store import ResultStore
+
+
+def _history(results: list[str]) -> list[dict]:
+    messages = [{"role": "user", "content": "Explore"}]
+    for i, result in enumerate(results):
+        messages.append({"role": "assistant", "content": [{"type": "tool_use", "id": f"t{i}", "name": "x", "input": {}}]})
+        messages.append({"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"t{i}", "content": result}]})
+    return messages
+
+
+def _result(compacted: list[dict], i: int) -> str:
+    return compacted[2 + 2 * i]["content"][0]["content"]
+
+
+def test_old_results_are_elided_recent_ones_kept_and_input_untouched():
+    results = ["x" * 4000 for _ in range(6)]
+    messages = _history(results)
+    compacted = HistoryCompactor(max_tokens=3000, keep_recent_turns=2, preview_chars=100).compact(messages)
+    assert "elided to save context: 4000 chars total" in _result(compacted, 0)
+    assert _result(compacted, 5) == results[5]
+    assert messages == _history(results)
+    # Every tool_use still has its tool_result
+    assert [b["tool_use_id"] for m in compacted[2::2] for b in m["content"]] == [f"t{i}" for i in range(6)]
+
+
+def test_elided_result_keeps_its_short_last_line():
+    note = "Use read_result(handle='r1', offset=..., length=...) to page through it]"
+    results = ["a" * 3000 + "\n" + note, "b" * 3000 + "\n" + "c" * 500, "d" * 100, "e" * 100]
+    compactor = HistoryCompactor(max_tokens=100, keep_recent_turns=2, preview_chars=300)
+    compacted = compactor.compact(_history(results))
+    assert _result(compacted, 0).endswith("chars total]\n" + note)
+    # A long last line is not kept
+    assert _result(compacted, 1).endswith("chars total]")
+    assert compactor.compact(_history(results)) == compacted
+
+
+def test_elided_spilled_result_keeps_its_read_result_handle(tmp_path):
+    store = ResultStore(str(tmp_path), inline_chars=1000, preview_chars=500)
+    spilled = store.spill("GMAIL_FETCH_EMAILS", "[" + "1," * 2000 + "1]")
+    compacted = HistoryCompactor(max_tokens=50, keep_recent_turns=1).compact(_history([spilled, "ok"]))
+    assert "read_result(handle='r1'" in _result(compacted, 0)
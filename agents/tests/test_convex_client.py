@@ -0,0 +1,199 @@
+import asyncio
+import json
+
+import httpx
+
+from agents.storage.convex_client import ConvexClient
+
+
+def _client(handler, **kwargs) -> ConvexClient:
+    """ConvexClient whose HTTP requests go to handler(request) -> httpx.Response."""
+    client = ConvexClient("http://convex.test", "token", max_retries=1, event_batch_size=0, **kwargs)
+    client._client = httpx.AsyncClient(base_url="http://convex.test", transport=httpx.MockTransport(handler))
+    return client
+
+
+def _entries(n: int) -> list[dict]:
+    return [
+        {"tree_node_id": "node", "title": f"Entry {i}", "content": "...", "confidence": 0.9}
+        for i in range(n)
+    ]
+
+
+def test_knowledge_entries_fall_back_one_by_one_when_bulk_route_is_missing():
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path == "/api/agent/knowledge/entries":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"id": f"id{len(paths)}"})
+
+    results = asyncio.run(_client(handler).create_knowledge_entries("c", _entries(3)))
+    assert paths == ["/api/agent/knowledge/entries"] + ["/api/agent/knowledge/entry"] * 3
+    assert all("id" in r for r in results)
+
+
+def test_knowledge_entries_are_not_rewritten_after_a_failed_bulk_request():
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        # The mutation may have committed before the error reached us
+        return httpx.Response(500)
+
+    results = asyncio.run(_client(handler).create_knowledge_entries("c", _entries(3)))
+    assert paths == ["/api/agent/knowledge/entries"]
+    assert len(results) == 3
+    assert all("error" in r for r in results)
+
+
+def test_forum_entries_fall_back_only_when_bulk_route_is_missing():
+    entries = [
+        {"title": f"t{i}", "category": "tip", "content": "c", "authorAgent": "a", "tags": []}
+        for i in range(2)
+    ]
+
+    def missing(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/agent/forum/create-batch":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"id": json.loads(request.content)["title"]})
+
+    def failing(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/agent/forum/create-batch"
+        return httpx.Response(500)
+
+    assert asyncio.run(_client(missing).create_forum_entries(entries)) == ["t0", "t1"]
+    assert asyncio.run(_client(failing).create_forum_entries(entries)) == [None, None]
+
+
+def test_events_are_batched_and_fall_back_to_single_posts_in_order():
+    posts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        posts.append((request.url.path, body))
+        if request.url.path == "/api/agent/events" and len(posts) > 1:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"ok": True})
+
+    async def main():
+        client = ConvexClient(
+            "http://convex.test", "token", max_retries=1, event_batch_size=2, event_flush_interval_s=10
+        )
+        async with client:
+            await client._client.aclose()
+            client._client = httpx.AsyncClient(base_url="http://convex.test", transport=httpx.MockTransport(handler))
+            for i in range(4):
+                await client.emit_event("c", "agent", "info", f"m{i}")
+            await client.flush_events()
+
+    asyncio.run(main())
+    assert posts[0][0] == "/api/agent/events"
+    assert [e["message"] for e in posts[0][1]["events"]] == ["m0", "m1"]
+    # Second batch hit a deployment without the bulk route: same events, one by one, in order
+    assert [path for path, _ in posts[1:]] == ["/api/agent/events", "/api/agent/event", "/api/agent/event"]
+    assert [body["message"] for _, body in posts[2:]] == ["m2", "m3"]
+
+
+class _PipelineRecorder(ConvexClient):
+    def __init__(self, interval_s: float, post_delay_s: float = 0.0):
+        super().__init__("http://convex.test", "token", event_batch_size=0, pipeline_update_interval_s=interval_s)
+        self.sent: list[tuple[str, int]] = []
+        self.post_delay_s = post_delay_s
+
+    async def _post(self, path, payload, critical=False, missing_route_ok=False):
+        assert path == "/api/agent/pipeline/update"
+        assert "lastActivity" in payload
+        await asyncio.sleep(self.post_delay_s)
+        self.sent.append((payload["currentPhase"], payload["phaseProgress"]))
+        return {}
+
+
+def test_pipeline_updates_within_a_phase_are_coalesced_latest_wins():
+    async def main():
+        client = _PipelineRecorder(interval_s=0.1)
+        await client.update_pipeline("c", "explore", 0, ["master"])
+        for progress in range(1, 10):
+            await client.update_pipeline("c", "explore", progress, ["master"])
+        assert client.sent == [("explore", 0)]
+        await asyncio.sleep(0.15)
+        assert client.sent == [("explore", 0), ("explore", 9)]
+
+    asyncio.run(main())
+
+
+def test_phase_change_is_sent_immediately_and_supersedes_pending_updates():
+    async def main():
+        client = _PipelineRecorder(interval_s=10)
+        await client.update_pipeline("c", "explore", 0, ["master"])
+        await client.update_pipeline("c", "explore", 50, ["master"])
+        await client.update_pipeline("c", "structure", 0, ["master"])
+        await client.flush_pipeline_updates()
+        assert client.sent == [("explore", 0), ("structure", 0)]
+
+    asyncio.run(main())
+
+
+def test_pending_update_is_flushed_on_demand_and_on_exit():
+    async def main():
+        client = _PipelineRecorder(interval_s=10)
+        async with client:
+            await client.update_pipeline("c", "use", 0, ["master"])
+            await client.update_pipeline("c", "use", 20, ["master"])
+            await client.flush_pipeline_updates()
+            assert client.sent[-1] == ("use", 20)
+            await client.update_pipeline("c", "use", 100, ["master"])
+        assert client.sent == [("use", 0), ("use", 20), ("use", 100)]
+
+    asyncio.run(main())
+
+
+def test_clients_are_coalesced_independently_and_zero_interval_sends_everything():
+    async def main():
+        client = _PipelineRecorder(interval_s=10)
+        await client.update_pipeline("a", "explore", 0, [])
+        await client.update_pipeline("b", "explore", 0, [])
+        assert client.sent == [("explore", 0), ("explore", 0)]
+
+        uncoalesced = _PipelineRecorder(interval_s=0)
+        for progress in range(3):
+            await uncoalesced.update_pipeline("a", "explore", progress, [])
+        assert uncoalesced.sent == [("explore", 0), ("explore", 1), ("explore", 2)]
+
+    asyncio.run(main())
+
+
+def test_exit_waits_for_a_timer_whose_post_is_in_flight():
+    async def main():
+        client = _PipelineRecorder(interval_s=0.05, post_delay_s=0.1)
+        async with client:
+            await client.update_pipeline("c", "use", 0, ["master"])
+            await client.update_pipeline("c", "use", 90, ["master"])
+            await asyncio.sleep(0.08)  # the timer has taken the update and is posting it
+        assert client.sent == [("use", 0), ("use", 90)]
+
+    asyncio.run(main())
+
+
+def test_exit_sends_what_a_sleeping_timer_holds_without_waiting_out_the_interval():
+    async def main():
+        client = _PipelineRecorder(interval_s=60)
+        async with client:
+            await client.update_pipeline("c", "use", 0, ["master"])
+            await client.update_pipeline("c", "use", 90, ["master"])
+        assert client.sent == [("use", 0), ("use", 90)]
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_update_overtaken_by_a_newer_one_is_dropped():
+    async def main():
+        client = _PipelineRecorder(interval_s=10)
+        state = {"clientId": "c", "currentPhase": "explore", "phaseProgress": 50, "activeAgents": []}
+        await client.update_pipeline("c", "structure", 0, ["master"])
+        # An explore update made before the phase change reaches the lock only now
+        assert await client._send_pipeline_update(0, state) is None
+        assert client.sent == [("structure", 0)]
+
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+import asyncio
+
+from agents.tools.definitions import ToolCall, ToolResult, is_serial_tool
+from agents.tools.dispatch import ToolDispatcher
+
+
+class Recorder:
+    """Tool executor that logs start/end of each call; each call takes delays[name] seconds."""
+
+    def __init__(self, delays: dict[str, float] | None = None):
+        self.delays = delays or {}
+        self.log: list[tuple[str, str]] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def execute(self, call: ToolCall) -> ToolResult:
+        self.log.append(("start", call.id))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delays.get(call.name, 0.01))
+        self.running -= 1
+        self.log.append(("end", call.id))
+        return ToolResult(tool_call_id=call.id, content=f"{call.name} done")
+
+
+def _call(call_id: str, name: str) -> ToolCall:
+    return ToolCall(id=call_id, name=name, input={})
+
+
+def _collect(dispatcher: ToolDispatcher, calls: list[ToolCall]) -> list[ToolResult]:
+    async def collect():
+        return [await dispatcher.result(call) for call in calls]
+
+    return collect()
+
+
+def test_independent_calls_overlap_up_to_max_concurrency():
+    async def main():
+        recorder = Recorder()
+        dispatcher = ToolDispatcher(recorder.execute, max_concurrency=2)
+        calls = [_call(f"c{i}", "read_local_file") for i in range(5)]
+        dispatcher.dispatch_all(calls)
+        results = await _collect(dispatcher, calls)
+        assert [r.tool_call_id for r in results] == ["c0", "c1", "c2", "c3", "c4"]
+        assert recorder.max_running == 2
+
+    asyncio.run(main())
+
+
+def test_results_keep_call_order_when_calls_finish_out_of_order():
+    async def main():
+        recorder = Recorder({"slow": 0.05, "fast": 0.0})
+        dispatcher = ToolDispatcher(recorder.execute)
+        calls = [_call("a", "slow"), _call("b", "fast")]
+        dispatcher.dispatch_all(calls)
+        results = await _collect(dispatcher, calls)
+        assert recorder.log.index(("end", "b")) < recorder.log.index(("end", "a"))
+        assert [r.tool_call_id for r in results] == ["a", "b"]
+
+    asyncio.run(main())
+
+
+def test_serial_call_is_a_barrier():
+    async def main():
+        recorder = Recorder()
+        dispatcher = ToolDispatcher(recorder.execute, is_serial=lambda name: name == "write")
+        calls = [_call("r1", "read"), _call("r2", "read"), _call("w", "write"), _call("r3", "read")]
+        dispatcher.dispatch_all(calls)
+        await _collect(dispatcher, calls)
+        log = recorder.log
+        assert log.index(("start", "w")) > max(log.index(("end", "r1")), log.index(("end", "r2")))
+        assert log.index(("start", "r3")) > log.index(("end", "w"))
+
+    asyncio.run(main())
+
+
+def test_download_file_finishes_before_a_read_of_the_workspace_starts():
+    assert is_serial_tool("download_file")
+
+    async def main():
+        recorder = Recorder({"download_file": 0.05})
+        dispatcher = ToolDispatcher(recorder.execute)
+        calls = [_call("dl", "download_file"), _call("read", "read_local_file")]
+        dispatcher.dispatch_all(calls)
+        await _collect(dispatcher, calls)
+        assert recorder.log.index(("start", "read")) > recorder.log.index(("end", "dl"))
+
+    asyncio.run(main())
+
+
+def test_result_runs_a_call_that_was_never_dispatched():
+    async def main():
+        recorder = Recorder()
+        dispatcher = ToolDispatcher(recorder.execute)
+        result = await dispatcher.result(_call("late", "read_local_file"))
+        assert result.tool_call_id == "late"
+
+    asyncio.run(main())
+
+
+def test_cancel_stops_pending_calls():
+    async def main():
+        recorder = Recorder({"slow": 1.0})
+        dispatcher = ToolDispatcher(recorder.execute)
+        dispatcher.dispatch(_call("s", "slow"))
+        await asyncio.sleep(0.01)
+        dispatcher.cancel()
+        await asyncio.sleep(0.01)
+        assert ("end", "s") not in recorder.log
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import asyncio
+
+from agents.storage.event_buffer import EventBuffer
+
+
+class Sender:
+    def __init__(self, delay: float = 0.0, fail_on: int | None = None):
+        self.batches: list[list[dict]] = []
+        self.delay = delay
+        self.fail_on = fail_on
+
+    async def send(self, batch: list[dict]) -> None:
+        await asyncio.sleep(self.delay)
+        if self.fail_on is not None and len(self.batches) == self.fail_on:
+            self.batches.append([])
+            raise RuntimeError("Convex unavailable")
+        self.batches.append(batch)
+
+
+def _events(n: int, start: int = 0) -> list[dict]:
+    return [{"n": i} for i in range(start, start + n)]
+
+
+def test_full_batch_is_sent_without_waiting_for_the_interval():
+    async def main():
+        sender = Sender()
+        buffer = EventBuffer(sender.send, batch_size=3, flush_interval_s=10)
+        buffer.start()
+        for event in _events(3):
+            buffer.put(event)
+        await asyncio.sleep(0.05)
+        assert sender.batches == [_events(3)]
+        await buffer.close()
+
+    asyncio.run(main())
+
+
+def test_partial_batch_is_sent_after_the_interval():
+    async def main():
+        sender = Sender()
+        buffer = EventBuffer(sender.send, batch_size=50, flush_interval_s=0.05)
+        buffer.start()
+        buffer.put({"n": 0})
+        assert sender.batches == []
+        await asyncio.sleep(0.15)
+        assert sender.batches == [[{"n": 0}]]
+        await buffer.close()
+
+    asyncio.run(main())
+
+
+def test_flush_sends_everything_in_order_and_in_batch_sized_chunks():
+    async def main():
+        sender = Sender()
+        buffer = EventBuffer(sender.send, batch_size=2, flush_interval_s=10)
+        for event in _events(5):
+            buffer.put(event)
+        await buffer.flush()
+        assert sender.batches == [_events(2), _events(2, 2), _events(1, 4)]
+        assert buffer.sent == 5
+
+    asyncio.run(main())
+
+
+def test_close_waits_for_the_batch_in_flight_and_sends_the_rest():
+    async def main():
+        sender = Sender(delay=0.05)
+        buffer = EventBuffer(sender.send, batch_size=2, flush_interval_s=10)
+        buffer.start()
+        for event in _events(3):
+            buffer.put(event)
+        await asyncio.sleep(0.01)  # the first batch is now being sent
+        await buffer.close()
+        assert [e for batch in sender.batches for e in batch] == _events(3)
+
+    asyncio.run(main())
+
+
+def test_failed_batch_is_dropped_and_later_batches_still_go_out():
+    async def main():
+        sender = Sender(fail_on=0)
+        buffer = EventBuffer(sender.send, batch_size=2, flush_interval_s=10)
+        for event in _events(4):
+            buffer.put(event)
+        await buffer.flush()
+        assert sender.batches[1] == _events(2, 2)
+        assert (buffer.sent, buffer.dropped) == (2, 2)
+
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from agents.llm.budget import AgentBudget
+from agents.sandbox.result_store import ResultStore
+from agents.sub_agents.explorer import ExplorerAgent
+from agents.tools.definitions import ToolCall, ToolResult
+
+
+class SlowSecondTurnLLM:
+    """Lists and downloads files on the first turn, then outlives the budget."""
+
+    def __init__(self):
+        self.turns = 0
+
+    async def stream_with_tools_messages(self, messages, tools, system=""):
+        self.turns += 1
+        if self.turns > 1:
+            await asyncio.sleep(10)
+        calls = [
+            {"id": "t1", "name": "GOOGLEDRIVE_LIST_FILES", "input": {}},
+            {"id": "t2", "name": "download_file", "input": {"file_id": "f-3"}},
+            {"id": "t3", "name": "GOOGLEDRIVE_LIST_FILES", "input": {"q": "broken"}},
+        ]
+        for call in calls:
+            yield {"type": "tool_use", **call}
+        yield {"type": "done", "text": "", "tool_calls": calls}
+
+
+class Executor:
+    async def execute(self, call: ToolCall) -> ToolResult:
+        if call.name == "download_file":
+            content = json.dumps({"path": "/tmp/ws/vat.pdf", "filename": "vat.pdf", "mime_type": "application/pdf"})
+            return ToolResult(tool_call_id=call.id, content=content)
+        if call.input.get("q") == "broken":
+            return ToolResult(tool_call_id=call.id, content='{"files": [{"id": "bad", "name": "x"}]}', is_error=True)
+        files = {"files": [
+            {"id": "f-1", "name": "INV-2041.pdf", "mimeType": "application/pdf"},
+            {"id": "f-2", "name": "Payroll.xlsx", "mimeType": "application/vnd.ms-excel"},
+        ]}
+        return ToolResult(tool_call_id=call.id, content=json.dumps(files))
+
+
+class Convex:
+    async def emit_event(self, *args, **kwargs):
+        return None
+
+
+def test_budget_exhaustion_returns_what_was_discovered():
+    explorer = ExplorerAgent(
+        llm=SlowSecondTurnLLM(),
+        executor=Executor(),
+        convex=Convex(),
+        client_id="c",
+        source_type="drive",
+        source_label="Drive",
+        tools=[],
+        budget=AgentBudget("explorer-drive", deadline_s=0.3),
+    )
+    report = asyncio.run(explorer.run())
+
+    assert report.partial
+    files = {f["id"]: f for f in report.metrics["discovered_files"]}
+    assert set(files) == {"f-1", "f-2", "f-3"}
+    assert files["f-1"] == {"id": "f-1", "name": "INV-2041.pdf", "mimeType": "application/pdf"}
+    assert files["f-3"]["name"] == "vat.pdf"
+    assert "stopped early" in report.findings[-1]
+
+
+def test_partial_metrics_are_read_from_tool_results():
+    messages = [
+        {"role": "user", "content": "Explore"},
+        {"role": "assistant", "content": [
+            {"type": "tool_use", "id": "a", "name": "GMAIL_FETCH_EMAILS", "input": {}},
+        ]},
+        {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": "a",
+             "content": json.dumps({"messages": [{"messageId": "m1", "subject": "Facture 2041"}]})},
+        ]},
+    ]
+    metrics = ExplorerAgent._partial_metrics(messages, "deadline passed")
+    assert metrics["discovered_files"] == [{"id": "m1", "name": "Facture 2041"}]
+    assert "1 resources seen in 1 successful tool calls" in metrics["summary"]
+
+
+def test_partial_metrics_read_spilled_results_back_in_full(tmp_path):
+    store = ResultStore(str(tmp_path), inline_chars=500, preview_chars=100)
+    files = [{"id": f"f-{i}", "name": f"invoice-{i}.pdf"} for i in range(20)]
+    spilled = store.spill("GOOGLEDRIVE_LIST_FILES", json.dumps({"files": files}))
+    assert "read_result" in spilled
+    messages = [
+        {"role": "assistant", "content": [
+            {"type": "tool_use", "id": "a", "name": "GOOGLEDRIVE_LIST_FILES", "input": {}},
+        ]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": "a", "content": spilled}]},
+    ]
+    assert ExplorerAgent._partial_metrics(messages, "deadline passed")["discovered_files"] == []
+    metrics = ExplorerAgent._partial_metrics(messages, "deadline passed", store)
+    assert metrics["discovered_files"] == files
@@ -0,0 +1,92 @@
+from agents.storage.facts import Fact, FactStore, normalize_attribute, normalize_entity, normalize_value
+
+
+def test_normalize_entity_drops_legal_suffixes_and_punctuation():
+    assert normalize_entity("ACME Corp.") == "acme"
+    assert normalize_entity("Acme") == "acme"
+    assert normalize_entity("Invoice #INV-2041") == "invoice inv 2041"
+    # A name that is only a suffix is kept as is
+    assert normalize_entity("Company") == "company"
+
+
+def test_normalize_attribute():
+    assert normalize_attribute("Due Date") == normalize_attribute("due_date") == normalize_attribute("due-date")
+
+
+def test_normalize_value_compares_numbers_and_keeps_currency():
+    assert normalize_value("$12,500") == normalize_value("12500.00 USD") == "USD 12500"
+    assert normalize_value("12500 EUR") == "EUR 12500"
+    assert normalize_value("£ 3.50") == "GBP 3.5"
+    assert normalize_value("12,500") == "12500"
+    assert normalize_value("1234567") != normalize_value("1234568")
+    assert normalize_value("  Paid ") == "paid"
+    assert normalize_value("NaN") == "nan"
+
+
+def _fact(value: str, source: str = "a.pdf", timestamp: str = "", entity: str = "Acme Corp") -> Fact:
+    return Fact(entity=entity, attribute="invoice total", value=value, source=source, timestamp=timestamp)
+
+
+def test_different_values_conflict():
+    store = FactStore()
+    first = _fact("$12,500")
+    assert store.add(first) == []
+    assert store.add(_fact("$13,000", source="b.pdf")) == [first]
+    assert store.conflicting_keys() == [("acme", "invoice total")]
+
+
+def test_same_amount_in_different_currencies_conflicts():
+    store = FactStore()
+    first = _fact("12500 EUR")
+    store.add(first)
+    assert store.add(_fact("$12,500", source="b.pdf")) == [first]
+
+
+def test_bare_number_agrees_with_the_same_amount_in_a_currency():
+    store = FactStore()
+    store.add(_fact("12,500"))
+    assert store.add(_fact("$12,500", source="b.pdf")) == []
+    assert store.conflicting_keys() == []
+
+
+def test_equal_values_from_different_sources_are_kept_without_conflict():
+    store = FactStore()
+    store.add(_fact("$12,500", entity="ACME Corp."))
+    assert store.add(_fact("12500 USD", source="b.pdf", entity="Acme")) == []
+    assert len(store) == 2
+    assert len(store.get("acme", "Invoice Total")) == 2
+
+
+def test_exact_duplicates_are_stored_once():
+    store = FactStore()
+    store.add(_fact("$12,500"))
+    store.add(_fact("$12,500"))
+    assert len(store) == 1
+
+
+def test_values_at_different_timestamps_are_history_not_conflicts():
+    store = FactStore()
+    store.add(_fact("$12,500", timestamp="2024-01"))
+    assert store.add(_fact("$13,000", source="b.pdf", timestamp="2024-06")) == []
+    # Still listed as a key whose value changed
+    assert store.conflicting_keys() == [("acme", "invoice total")]
+
+
+def test_value_without_timestamp_conflicts_with_timestamped_one():
+    store = FactStore()
+    first = _fact("$12,500", timestamp="2024-01")
+    store.add(first)
+    assert store.add(_fact("$13,000", source="b.pdf")) == [first]
+
+
+def test_each_conflicting_pair_is_reported_once():
+    store = FactStore()
+    first = _fact("$12,500")
+    store.add(first)
+    assert store.add(_fact("$13,000", source="b.pdf")) == [first]
+    assert store.add(_fact("$13,000", source="c.pdf")) == []
+    assert store.add(_fact("$12,500", source="d.pdf")) == []
+    # A third value conflicts with both earlier ones, once each
+    third = store.add(_fact("$14,000", source="e.pdf"))
+    assert {f.value for f in third} == {"$12,500", "$13,000"}
+    assert len(third) == 2
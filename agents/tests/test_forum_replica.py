@@ -0,0 +1,78 @@
+import asyncio
+
+from agents.storage.forum_replica import ForumReplica
+
+
+def _entry(title: str, content: str, **fields) -> dict:
+    return {"title": title, "category": "tip", "content": content, "authorAgent": "a", "tags": [], **fields}
+
+
+class Convex:
+    def __init__(self, preload: list[dict] | None, remote: list[dict] | None = None):
+        self.preload = preload
+        self.remote = remote or []
+        self.searches = []
+        self.batches = []
+
+    async def list_forum_entries(self, source_types, phases, limit=200):
+        return self.preload
+
+    async def search_forum(self, query, source_type=None, phase=None, file_type=None):
+        self.searches.append(query)
+        return self.remote
+
+    async def create_forum_entries(self, entries):
+        self.batches.append(list(entries))
+        return [f"id{i}" for i in range(len(entries))]
+
+
+def test_search_ranks_preloaded_entries_and_applies_filters():
+    async def main():
+        convex = Convex([
+            _entry("VAT return PDFs", "Use pdftotext on VAT return PDFs", _id="1", sourceType="drive"),
+            _entry("Gmail threads", "Fetch metadata first", _id="2", sourceType="gmail"),
+        ])
+        forum = ForumReplica(convex, max_results=1)
+        await forum.preload(["drive", "gmail"], ["explore"])
+        results = await forum.search("vat pdf", source_type="drive")
+        assert [r["_id"] for r in results] == ["1"]
+        assert convex.searches == []  # max_results found locally
+
+    asyncio.run(main())
+
+
+def test_short_local_results_are_topped_up_from_convex_once_per_query():
+    async def main():
+        local = _entry("VAT return PDFs", "Use pdftotext", _id="1", sourceType="drive")
+        # Outside the preload: another source type, untagged, or past the cap
+        remote = [dict(local), _entry("VAT on invoices", "Check the VAT number", _id="9")]
+        convex = Convex([local], remote)
+        forum = ForumReplica(convex, max_results=5)
+        await forum.preload(["drive"], ["explore"])
+        first = await forum.search("vat")
+        second = await forum.search("vat")
+        assert [r["_id"] for r in first] == ["1", "9"]  # the duplicate of the local entry is dropped
+        assert second == first
+        assert convex.searches == ["vat"]
+        assert forum.stats["remote_searches"] == 1
+
+    asyncio.run(main())
+
+
+def test_writes_are_searchable_deduplicated_and_flushed_in_batches():
+    async def main():
+        convex = Convex([])
+        forum = ForumReplica(convex, flush_batch_size=2, max_results=1)
+        await forum.preload(["drive"], ["explore"])
+        assert await forum.write(_entry("Scanned PDFs", "Run OCR on scanned PDFs"))
+        assert not await forum.write(_entry("scanned pdfs", "Run OCR  on scanned PDFs!"))
+        assert [r["title"] for r in await forum.search("ocr")] == ["Scanned PDFs"]
+        assert convex.batches == []
+        await forum.write(_entry("Sheets", "Use the batch get tool"))
+        assert [len(b) for b in convex.batches] == [2]
+        await forum.flush()
+        assert forum.stats == {
+            "preloaded": 0, "searches": 1, "remote_searches": 0, "written": 2, "duplicates": 1, "flushed": 2,
+        }
+
+    asyncio.run(main())
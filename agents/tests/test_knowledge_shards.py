@@ -0,0 +1,33 @@
+from agents.master_agent import MasterAgent
+from agents.storage.context import SubAgentReport
+
+
+def _master(*reports: SubAgentReport) -> MasterAgent:
+    master = MasterAgent(claude=None, gemini=None, convex=None, google=None, client_id="c")
+    for report in reports:
+        master.state.add_report(report)
+    return master
+
+
+def test_reports_go_to_the_shards_they_mention_and_unmatched_ones_to_all():
+    master = _master(
+        SubAgentReport("explorer-drive", "drive", {"files": 3}, ["Invoices for 2024 are in /Finance"]),
+        SubAgentReport("explorer-gmail", "gmail", {"messages": 40}, ["Payroll runs monthly", "Vendor list"]),
+        SubAgentReport("explorer-sheets", "sheets", {"sheets": 7}, ["Seven untitled spreadsheets"]),
+    )
+    knowledge = master._knowledge_for_shards({
+        "Finance": [{"name": "Invoices"}],
+        "People": [{"name": "Payroll"}],
+    })
+    assert "Invoices for 2024" in knowledge["Finance"] and "Payroll" not in knowledge["Finance"]
+    assert "Payroll runs monthly" in knowledge["People"] and "Vendor list" not in knowledge["People"]
+    # The sheets report matched neither shard: both get it, metrics included
+    for text in knowledge.values():
+        assert "Seven untitled spreadsheets" in text
+        assert '"sheets": 7' in text
+
+
+def test_shard_matching_nothing_gets_every_report():
+    master = _master(SubAgentReport("explorer-drive", "drive", {}, ["Invoices for 2024"]))
+    knowledge = master._knowledge_for_shards({"Finance": [{"name": "Invoices"}], "Legal": [{"name": "Contracts"}]})
+    assert knowledge["Legal"] == knowledge["Finance"]
@@ -0,0 +1,68 @@
+import asyncio
+
+from agents.master_agent import MasterAgent
+from agents.sub_agents.knowledge_writer import KnowledgeWriterAgent
+from agents.tools.definitions import ToolCall, ToolResult
+
+
+def _entry(title: str) -> dict:
+    return {"tree_node_id": "n1", "title": title, "content": "...", "confidence": 0.9}
+
+
+class Convex:
+    """Commits every entry except those titled 'reject'."""
+
+    def __init__(self):
+        self.written: list[dict] = []
+
+    async def create_knowledge_entries(self, client_id, entries):
+        self.written.extend(entries)
+        return [{"error": "rejected"} if e["title"] == "reject" else {"id": f"k{i}"} for i, e in enumerate(entries)]
+
+    async def emit_event(self, *args, **kwargs):
+        return None
+
+
+def test_batch_tool_reports_each_entry_and_rejects_malformed_ones():
+    convex = Convex()
+    master = MasterAgent(claude=None, gemini=None, convex=convex, google=None, client_id="c")
+    entries = [_entry("ok"), "not an entry", {"title": "no node"}, _entry("reject")]
+    text = asyncio.run(master._tool_write_knowledge_entries(entries))
+    lines = text.splitlines()
+    assert lines[0] == "1/4 knowledge entries created:"
+    assert lines[1] == "[0] ok: created k0"
+    assert lines[2] == "[1]: error: each entry must be an object, got str"
+    assert lines[3] == "[2] no node: error: needs tree_node_id, title, content and confidence"
+    assert lines[4] == "[3] reject: error: rejected"
+    assert [e["title"] for e in convex.written] == ["ok", "reject"]
+
+
+class BatchThenStopLLM:
+    def __init__(self):
+        self.turns = 0
+
+    async def complete_with_tools_messages(self, messages, tools, system=""):
+        self.turns += 1
+        if self.turns > 1:
+            return "done", []
+        entries = [_entry("ok"), _entry("reject"), _entry("also ok")]
+        return "", [{"id": "t1", "name": "write_knowledge_entries", "input": {"entries": entries}}]
+
+
+class Executor:
+    def __init__(self, master: MasterAgent):
+        self.master = master
+
+    async def execute(self, call: ToolCall) -> ToolResult:
+        content = await self.master._tool_write_knowledge_entries(**call.input)
+        return ToolResult(tool_call_id=call.id, content=content)
+
+
+def test_writer_counts_only_entries_that_were_created():
+    convex = Convex()
+    master = MasterAgent(claude=None, gemini=None, convex=convex, google=None, client_id="c")
+    writer = KnowledgeWriterAgent(
+        llm=BatchThenStopLLM(), executor=Executor(master), convex=convex, client_id="c", tree_nodes=[{"id": "n1"}]
+    )
+    result = asyncio.run(writer.run())
+    assert result["entries_written"] == 2
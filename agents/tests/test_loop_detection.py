@@ -0,0 +1,95 @@
+from agents.tools.loop_detection import ToolLoopDetector
+
+
+def test_distinct_calls_are_not_stuck():
+    detector = ToolLoopDetector()
+    for i in range(10):
+        detector.record("read_local_file", {"filepath": f"file{i}.txt"})
+    assert not detector.is_stuck()
+
+
+def test_exact_repeats_are_stuck():
+    detector = ToolLoopDetector(repeat_threshold=3)
+    for _ in range(2):
+        detector.record("list_workspace", {})
+    assert not detector.is_stuck()
+    detector.record("list_workspace", {})
+    assert detector.is_stuck()
+
+
+def test_argument_order_does_not_matter():
+    detector = ToolLoopDetector(repeat_threshold=2)
+    detector.record("run_command", {"command": "ls", "timeout": 5})
+    detector.record("run_command", {"timeout": 5, "command": "ls"})
+    assert detector.is_stuck()
+
+
+def test_install_retries_with_different_versions_are_repeats():
+    detector = ToolLoopDetector(repeat_threshold=3)
+    for spec in ("pandas==2.0", "pandas>=1.5", "pandas"):
+        detector.record("install_package", {"package": spec})
+    assert detector.is_stuck()
+
+
+def test_one_tool_with_varied_args_is_stuck_past_the_name_threshold():
+    detector = ToolLoopDetector(repeat_threshold=2, name_frequency_multiplier=3)
+    for i in range(5):
+        detector.record("run_command", {"command": f"cat part{i}"})
+    assert not detector.is_stuck()
+    detector.record("run_command", {"command": "cat part5"})
+    assert detector.is_stuck()
+
+
+def test_old_calls_leave_the_window():
+    detector = ToolLoopDetector(repeat_threshold=2, history_size=3)
+    detector.record("list_workspace", {})
+    for i in range(3):
+        detector.record("read_local_file", {"filepath": f"f{i}"})
+    detector.record("list_workspace", {})
+    assert not detector.is_stuck()
+
+
+def test_different_calls_returning_the_same_result_are_stuck():
+    detector = ToolLoopDetector(stall_threshold=3)
+    same = "No files matched the query; the folder is empty or you lack access."
+    for i in range(3):
+        args = {"q": f"name contains 'invoice {i}'"}
+        detector.record("GOOGLEDRIVE_LIST_FILES", args)
+        detector.record_result("GOOGLEDRIVE_LIST_FILES", args, same)
+    assert detector.is_stuck()
+
+
+def test_repeating_one_call_counts_once_towards_a_stall():
+    detector = ToolLoopDetector(repeat_threshold=4, stall_threshold=2)
+    same = "No files matched the query; the folder is empty or you lack access."
+    detector.record("list_workspace", {})
+    for _ in range(3):
+        detector.record("GOOGLEDRIVE_LIST_FILES", {"q": "x"})
+        detector.record_result("GOOGLEDRIVE_LIST_FILES", {"q": "x"}, same)
+    assert not detector.is_stuck()
+
+
+def test_short_acknowledgements_are_not_compared_but_errors_are():
+    detector = ToolLoopDetector(stall_threshold=2)
+    for i in range(3):
+        detector.record("record_fact", {"value": i})
+        detector.record_result("record_fact", {"value": i}, "Fact recorded.")
+    assert not detector.is_stuck()
+    for i in range(2):
+        detector.record("read_local_file", {"filepath": f"f{i}"})
+        detector.record_result("read_local_file", {"filepath": f"f{i}"}, "Not found", is_error=True)
+    assert detector.is_stuck()
+
+
+def test_reset_clears_everything():
+    detector = ToolLoopDetector(repeat_threshold=2, stall_threshold=2)
+    same = "x" * 40
+    for i in range(2):
+        detector.record("list_workspace", {})
+        detector.record_result("read_local_file", {"filepath": f"f{i}"}, same)
+    assert detector.is_stuck()
+    detector.reset()
+    assert not detector.is_stuck()
+    detector.record("list_workspace", {})
+    detector.record("list_workspace", {})
+    assert detector.is_stuck()
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from agents.llm.adapters import AnthropicAdapter
+from agents.llm.rate_limit import RateLimitGovernor, estimate_tokens
+
+SYSTEM = "You are an explorer agent. " * 400
+TOOLS = [{"name": "list_workspace", "description": "List files. " * 100, "input_schema": {}}]
+
+
+def _history(turns: int) -> list[dict]:
+    messages = [{"role": "user", "content": "Explore the drive. " * 200}]
+    for i in range(turns):
+        messages.append({"role": "assistant", "content": [{"type": "tool_use", "id": f"t{i}", "name": "x", "input": {}}]})
+        messages.append({"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"t{i}", "content": f"r{i}"}]})
+    return messages
+
+
+def test_later_turns_are_admitted_for_the_uncached_tail_only():
+    adapter = AnthropicAdapter(api_key="test")
+    first = _history(0)
+    assert adapter._estimate_uncached_tokens(first, SYSTEM, TOOLS) == estimate_tokens(SYSTEM, first, TOOLS)
+    later = _history(5)
+    tail = adapter._estimate_uncached_tokens(later, SYSTEM, TOOLS)
+    assert tail == estimate_tokens(later[-2:])
+    assert tail < estimate_tokens(SYSTEM) // 10
+
+    uncached = AnthropicAdapter(api_key="test", prompt_caching=False)
+    assert uncached._estimate_uncached_tokens(later, SYSTEM, TOOLS) == estimate_tokens(SYSTEM, later, TOOLS)
+
+
+def test_uncached_input_counts_cache_writes_but_not_reads():
+    usage = SimpleNamespace(input_tokens=120, cache_creation_input_tokens=3000, cache_read_input_tokens=50000)
+    assert AnthropicAdapter._uncached_input_tokens(SimpleNamespace(usage=usage)) == 3120
+
+
+def test_reconcile_charges_shortfalls_and_refunds_overestimates():
+    async def main():
+        governor = RateLimitGovernor("test", tokens_per_minute=60000)
+        bucket = governor._tokens
+        async with governor.admit(10000):
+            pass
+        governor.reconcile(10000, 2000)
+        assert round(bucket._tokens, -2) == 58000
+        governor.reconcile(0, 8000)
+        assert round(bucket._tokens, -2) == 50000
+        # A refund never lifts the balance past one minute of allowance
+        governor.reconcile(100000, 0)
+        assert bucket._tokens <= bucket.capacity
+
+    asyncio.run(main())
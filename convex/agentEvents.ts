@@ -28,6 +28,45 @@ export const emit = internalMutation({
   },
 });
 
+const eventTypeValidator = v.union(
+  v.literal('info'),
+  v.literal('progress'),
+  v.literal('warning'),
+  v.literal('error'),
+  v.literal('complete'),
+);
+
+// Batched variant of emit; events are inserted in the order given
+export const emitMany = internalMutation({
+  args: {
+    events: v.array(
+      v.object({
+        clientId: v.id('clients'),
+        agentName: v.string(),
+        eventType: eventTypeValidator,
+        message: v.string(),
+        metadata: v.optional(v.any()),
+      }),
+    ),
+  },
+  returns: v.array(v.id('agent_events')),
+  handler: async (ctx, args) => {
+    const ids = [];
+    for (const event of args.events) {
+      ids.push(
+        await ctx.db.insert('agent_events', {
+          clientId: event.clientId,
+          agentName: event.agentName,
+          eventType: event.eventType,
+          message: event.message,
+          metadata: event.metadata,
+        }),
+      );
+    }
+    return ids;
+  },
+});
+
 export const listByClient = query({
   args: {
     clientId: v.id('clients'),
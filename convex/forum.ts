@@ -65,6 +65,72 @@ export const create = internalMutation({
   },
 });
 
+const forumEntryInputValidator = v.object({
+  title: v.string(),
+  category: v.string(),
+  content: v.string(),
+  authorAgent: v.string(),
+  tags: v.array(v.string()),
+  sourceType: v.optional(v.string()),
+  phase: v.optional(v.string()),
+  fileType: v.optional(v.string()),
+});
+
+// Entries an agent pipeline preloads into its local forum replica: the newest
+// entries for each (sourceType, phase) pair, including entries that have no
+// sourceType and/or no phase (shared notes apply to every run)
+export const listForReplica = internalQuery({
+  args: {
+    sourceTypes: v.array(v.string()),
+    phases: v.array(v.string()),
+    limit: v.optional(v.number()),
+  },
+  returns: v.array(forumEntryDocValidator),
+  handler: async (ctx, args) => {
+    const limit = args.limit ?? 200;
+    const entries = [];
+    for (const sourceType of [...args.sourceTypes, undefined]) {
+      for (const phase of [...args.phases, undefined]) {
+        const batch = await ctx.db
+          .query('forum_entries')
+          .withIndex('by_sourceType_and_phase', (q) =>
+            q.eq('sourceType', sourceType).eq('phase', phase),
+          )
+          .order('desc')
+          .take(limit);
+        entries.push(...batch);
+      }
+    }
+    return entries;
+  },
+});
+
+export const createMany = internalMutation({
+  args: {
+    entries: v.array(forumEntryInputValidator),
+  },
+  returns: v.array(v.id('forum_entries')),
+  handler: async (ctx, args) => {
+    const ids = [];
+    for (const entry of args.entries) {
+      ids.push(
+        await ctx.db.insert('forum_entries', {
+          title: entry.title,
+          category: entry.category,
+          content: entry.content,
+          authorAgent: entry.authorAgent,
+          tags: entry.tags,
+          upvotes: 0,
+          ...(entry.sourceType !== undefined && { sourceType: entry.sourceType }),
+          ...(entry.phase !== undefined && { phase: entry.phase }),
+          ...(entry.fileType !== undefined && { fileType: entry.fileType }),
+        }),
+      );
+    }
+    return ids;
+  },
+});
+
 export const list = query({
   args: {},
   returns: v.array(forumEntryDocValidator),
@@ -39,6 +39,21 @@ http.route({
   }),
 });
 
+// POST /api/agent/events
+http.route({
+  path: '/api/agent/events',
+  method: 'POST',
+  handler: httpAction(async (ctx, request) => {
+    const token = process.env.AGENT_AUTH_TOKEN;
+    if (!validateAuth(request, token)) {
+      return errorResponse('Unauthorized', 401);
+    }
+    const body = await request.json();
+    const ids = await ctx.runMutation(internal.agentEvents.emitMany, body);
+    return jsonResponse({ ids });
+  }),
+});
+
 // POST /api/agent/contradiction
 http.route({
   path: '/api/agent/contradiction',
@@ -109,6 +124,26 @@ http.route({
   }),
 });
 
+// POST /api/agent/knowledge/entries
+http.route({
+  path: '/api/agent/knowledge/entries',
+  method: 'POST',
+  handler: httpAction(async (ctx, request) => {
+    const token = process.env.AGENT_AUTH_TOKEN;
+    if (!validateAuth(request, token)) {
+      return errorResponse('Unauthorized', 401);
+    }
+    const body = await request.json();
+    try {
+      const results = await ctx.runMutation(internal.knowledge.createEntries, body);
+      return jsonResponse({ results });
+    } catch (e) {
+      console.error('knowledge/entries error:', String(e));
+      return errorResponse(String(e), 500);
+    }
+  }),
+});
+
 // POST /api/agent/forum/create
 http.route({
   path: '/api/agent/forum/create',
@@ -139,6 +174,36 @@ http.route({
   }),
 });
 
+// POST /api/agent/forum/list
+http.route({
+  path: '/api/agent/forum/list',
+  method: 'POST',
+  handler: httpAction(async (ctx, request) => {
+    const token = process.env.AGENT_AUTH_TOKEN;
+    if (!validateAuth(request, token)) {
+      return errorResponse('Unauthorized', 401);
+    }
+    const body = await request.json();
+    const results = await ctx.runQuery(internal.forum.listForReplica, body);
+    return jsonResponse({ results });
+  }),
+});
+
+// POST /api/agent/forum/create-batch
+http.route({
+  path: '/api/agent/forum/create-batch',
+  method: 'POST',
+  handler: httpAction(async (ctx, request) => {
+    const token = process.env.AGENT_AUTH_TOKEN;
+    if (!validateAuth(request, token)) {
+      return errorResponse('Unauthorized', 401);
+    }
+    const body = await request.json();
+    const ids = await ctx.runMutation(internal.forum.createMany, body);
+    return jsonResponse({ ids });
+  }),
+});
+
 // POST /api/agent/questionnaire/create
 http.route({
   path: '/api/agent/questionnaire/create',
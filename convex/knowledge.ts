@@ -88,6 +88,51 @@ export const createEntry = internalMutation({
   },
 });
 
+const entryResultValidator = v.object({
+  id: v.optional(v.id('knowledge_entries')),
+  error: v.optional(v.string()),
+});
+
+// Insert many entries in one transaction; a bad item is reported, not fatal
+export const createEntries = internalMutation({
+  args: {
+    clientId: v.id('clients'),
+    entries: v.array(
+      v.object({
+        treeNodeId: v.string(),
+        title: v.string(),
+        content: v.string(),
+        sourceRef: v.optional(v.string()),
+        confidence: v.number(),
+        verified: v.optional(v.boolean()),
+      }),
+    ),
+  },
+  returns: v.array(entryResultValidator),
+  handler: async (ctx, args) => {
+    const results = [];
+    for (const entry of args.entries) {
+      const treeNodeId = ctx.db.normalizeId('knowledge_tree', entry.treeNodeId);
+      const node = treeNodeId ? await ctx.db.get(treeNodeId) : null;
+      if (!treeNodeId || !node || node.clientId !== args.clientId) {
+        results.push({ error: `Unknown tree node: ${entry.treeNodeId}` });
+        continue;
+      }
+      const id = await ctx.db.insert('knowledge_entries', {
+        clientId: args.clientId,
+        treeNodeId,
+        title: entry.title,
+        content: entry.content,
+        sourceRef: entry.sourceRef,
+        confidence: entry.confidence,
+        verified: entry.verified ?? false,
+      });
+      results.push({ id });
+    }
+    return results;
+  },
+});
+
 export const listEntriesByNode = query({
   args: {
     treeNodeId: v.id('knowledge_tree'),
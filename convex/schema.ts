@@ -105,6 +105,7 @@ export default defineSchema({
   })
     .index('by_category', ['category'])
     .index('by_authorAgent', ['authorAgent'])
+    .index('by_sourceType_and_phase', ['sourceType', 'phase'])
     .searchIndex('search_content', {
       searchField: 'content',
       filterFields: ['sourceType', 'phase', 'fileType', 'category'],